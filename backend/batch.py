@@ -0,0 +1,198 @@
+import io
+import json
+import os
+import re
+import tarfile
+import threading
+import zipfile
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+from backend.yaml_loader import SafeLoader, YAMLError
+
+# Batch validation limits
+BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", "1000"))  # Documents accepted per request
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(50 * 1024 * 1024)))  # Uncompressed archive size cap
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "2"))  # Batches validated at the same time
+BATCH_QUEUE_TIMEOUT = float(os.getenv("BATCH_QUEUE_TIMEOUT", "30"))  # Seconds a batch waits for a free slot
+
+# File extensions picked up from archives
+YAML_EXTENSIONS = (".yaml", ".yml", ".json")
+
+# A document marker line ("---" or "...", alone or followed by content); YAML forbids them
+# inside a document, so a broken document can't run past one
+DOCUMENT_MARKER = re.compile(r"^(?:---|\.\.\.)(?=[ \t\r\n]|$)", re.MULTILINE)
+# Stretches with no document content: only whitespace and comments, or also directives,
+# which belong to the document after them
+_BLANK = re.compile(r"(?:\s|#[^\n]*)*\Z")
+_PREAMBLE = re.compile(r"(?:\s|#[^\n]*|%[^\n]*)*\Z")
+
+
+class BatchDocument(NamedTuple):
+    key: str  # Filename inside an archive, or the document index
+    content: Any  # YAML text, or already-parsed data for JSON arrays of objects
+    parsed: bool = False
+
+
+class BatchError(Exception):
+    """Raised for batches that are malformed or exceed the configured limits."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _check_count(count: int):
+    if count > BATCH_MAX_DOCUMENTS:
+        raise BatchError(f"Batch contains more than {BATCH_MAX_DOCUMENTS} documents", status_code=413)
+
+
+def _check_bytes(total: int):
+    if total > BATCH_MAX_BYTES:
+        raise BatchError(f"Batch expands to more than {BATCH_MAX_BYTES} bytes", status_code=413)
+
+
+def _wanted(name: str) -> bool:
+    return name.lower().endswith(YAML_EXTENSIONS) and not os.path.basename(name).startswith(".")
+
+
+def _from_zip(data: bytes) -> List[BatchDocument]:
+    documents, total = [], 0
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir() and _wanted(info.filename)]
+        _check_count(len(members))
+        for info in members:
+            total += info.file_size
+            _check_bytes(total)
+            documents.append(BatchDocument(info.filename, archive.read(info).decode("utf-8")))
+    return documents
+
+
+def _from_tar(data: bytes) -> List[BatchDocument]:
+    documents, total = [], 0
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as archive:
+        members = [member for member in archive.getmembers() if member.isfile() and _wanted(member.name)]
+        _check_count(len(members))
+        for member in members:
+            total += member.size
+            _check_bytes(total)
+            documents.append(BatchDocument(member.name, archive.extractfile(member).read().decode("utf-8")))
+    return documents
+
+
+def _from_json_array(items: list) -> List[BatchDocument]:
+    _check_count(len(items))
+    # Strings are YAML text to parse; anything else is an already-parsed document
+    return [BatchDocument(str(index), item, parsed=not isinstance(item, str)) for index, item in enumerate(items)]
+
+
+def _is_empty(event) -> bool:
+    # The implicit empty scalar the parser reports for a document with no content
+    return (isinstance(event, yaml.ScalarEvent) and event.value == "" and event.style is None
+            and event.tag is None and event.anchor is None)
+
+
+def _segments(text: str) -> Iterator[Tuple[int, int]]:
+    """(start, end) of the stretches between document markers, each starting at its marker."""
+    start = 0
+    for marker in DOCUMENT_MARKER.finditer(text):
+        if marker.start() > start:
+            yield start, marker.start()
+            start = marker.start()
+    if start < len(text):
+        yield start, len(text)
+
+
+def _document_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    (start, end) offsets of each non-empty document in a YAML stream. YAML forbids marker
+    lines inside a document, so the markers are found in one pass and the parser only
+    sees the stretch between two of them; a broken document then runs to the next
+    marker and costs no more than a valid one. Stretches holding only comments are
+    skipped unparsed and directives are kept with the stretch they precede, so every
+    parse yields at least one span and a caller that stops counting bounds the work.
+    """
+    pending = None  # Start of directives waiting for their document
+    for start, end in _segments(text):
+        if pending is not None:
+            start, pending = pending, None
+        body = text[start:end]
+        marker = DOCUMENT_MARKER.match(body)
+        if _BLANK.match(body, marker.end() if marker else 0):
+            continue
+        if not body.startswith("---") and _PREAMBLE.match(body, marker.end() if marker else 0):
+            pending = start + (marker.end() if marker else 0)  # Past a "..." ending the previous document
+            continue
+        spans, content = [], False
+        try:
+            for event in yaml.parse(body, Loader=SafeLoader):
+                if isinstance(event, yaml.DocumentStartEvent):
+                    document, content = start + event.start_mark.index, False
+                elif isinstance(event, yaml.DocumentEndEvent):
+                    if content:
+                        spans.append((document, start + event.end_mark.index))
+                elif isinstance(event, yaml.NodeEvent) and not _is_empty(event):
+                    content = True
+        except YAMLError:
+            spans = [(start, end)]
+        yield from spans
+    if pending is not None:
+        yield pending, len(text)  # Directives with no document after them, reported as broken
+
+
+def _from_yaml_stream(text: str) -> List[BatchDocument]:
+    documents = []
+    for start, end in _document_spans(text):
+        # Checked as spans arrive, so an oversized stream is refused one document past the limit
+        _check_count(len(documents) + 1)
+        documents.append(BatchDocument(str(len(documents)), text[start:end]))
+    return documents
+
+
+def _is_tar(data: bytes, filename: str) -> bool:
+    name = filename.lower()
+    if name.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+        return True
+    return data[257:262] == b"ustar" or data[:2] == b"\x1f\x8b"
+
+
+def extract_documents(data: bytes, filename: Optional[str] = None) -> List[BatchDocument]:
+    """
+    Split an uploaded batch into documents.
+
+    Supports zip and tar archives (YAML/JSON members), a JSON array of documents,
+    and a multi-document YAML stream.
+    """
+    filename = filename or ""
+    if zipfile.is_zipfile(io.BytesIO(data)):
+        return _from_zip(data)
+    if _is_tar(data, filename):
+        try:
+            return _from_tar(data)
+        except tarfile.TarError as e:
+            raise BatchError(f"Invalid tar archive: {e}")
+
+    text = data.decode("utf-8")
+    if text.lstrip().startswith("["):
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError:
+            items = None  # A YAML flow sequence, not JSON
+        if isinstance(items, list):
+            return _from_json_array(items)
+    return _from_yaml_stream(text)
+
+
+# Limits how many batches are validated at the same time across the worker
+_batch_slots = threading.BoundedSemaphore(BATCH_CONCURRENCY)
+
+
+def run_limited(func, *args):
+    """Run func in one of the batch slots, waiting up to BATCH_QUEUE_TIMEOUT for a free one."""
+    if not _batch_slots.acquire(timeout=BATCH_QUEUE_TIMEOUT):
+        raise BatchError("Too many batch validations in progress, retry later", status_code=503)
+    try:
+        return func(*args)
+    finally:
+        _batch_slots.release()
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark: precompiled jsonschema validators vs. generated Python validators.
+
+Both sides check the same valid and invalid documents; the generated validator only
+falls back to jsonschema to describe the errors of invalid ones.
+
+Run with:
+    python -m backend.benchmarks.bench_codegen [--number N]
+"""
+import argparse
+import timeit
+
+from jsonschema.exceptions import best_match
+
+from backend.Schema import SCHEMA
+from backend.benchmarks.bench_validators import DOCUMENT
+from backend.validators import ValidatorRegistry
+
+INVALID = {**DOCUMENT, "age": -1}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="Validations per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs (best is reported)")
+    args = parser.parse_args()
+
+    validators = {
+        "jsonschema": ValidatorRegistry(backend="jsonschema").get(SCHEMA),
+        "codegen": ValidatorRegistry(backend="codegen").get(SCHEMA),
+    }
+    print(f"{'check':<28}{'jsonschema us':>15}{'codegen us':>12}{'speedup':>10}")
+    checks = {
+        "is_valid (valid doc)": lambda v: v.is_valid(DOCUMENT),
+        "is_valid (invalid doc)": lambda v: v.is_valid(INVALID),
+        "best_match (valid doc)": lambda v: best_match(v.iter_errors(DOCUMENT)),
+        "best_match (invalid doc)": lambda v: best_match(v.iter_errors(INVALID)),
+    }
+    for label, check in checks.items():
+        timings = {}
+        for name, validator in validators.items():
+            best = min(timeit.repeat(lambda: check(validator), number=args.number, repeat=args.repeat))
+            timings[name] = best / args.number * 1e6
+        print(f"{label:<28}{timings['jsonschema']:>15.2f}{timings['codegen']:>12.2f}"
+              f"{timings['jsonschema'] / timings['codegen']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
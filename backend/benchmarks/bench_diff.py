@@ -0,0 +1,72 @@
+"""
+Diff benchmark: DeepDiff(ignore_order=True) vs. the structural diff engine.
+
+Each pair is a generated config and a copy with its `services` list shuffled,
+a few settings edited and one service added, the kind of change /compare-schemas
+sees on large configs.
+
+Run with:
+    python -m backend.benchmarks.bench_diff [--corpus small medium] [--skip-deepdiff-above BYTES]
+"""
+import argparse
+import copy
+import random
+import time
+
+import yaml
+from deepdiff import DeepDiff
+
+from backend.benchmarks.corpus import SIZES, Dumper, make_document
+from backend.diff import diff_trees
+
+
+def make_pair(target_bytes: int, seed: int = 0):
+    old = make_document(target_bytes, seed)
+    new = copy.deepcopy(old)
+    rng = random.Random(seed)
+    services = new.get("services")
+    if services:
+        rng.shuffle(services)
+        for service in rng.sample(services, min(3, len(services))):
+            service["settings"]["key0"] = "edited"
+        services.append({"id": len(services), "name": "service-new", "settings": {}})
+    new["age"] += 1
+    return old, new
+
+
+def best_time(func, min_time: float):
+    best, spent, runs = float("inf"), 0.0, 0
+    while spent < min_time or runs == 0:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds spent per corpus and engine")
+    parser.add_argument("--skip-deepdiff-above", type=int, default=SIZES["medium"] * 4,
+                        help="Skip DeepDiff for corpora larger than this many bytes (it can take minutes)")
+    args = parser.parse_args()
+
+    print(f"{'corpus':<8}{'bytes':>12}{'engine':>22}{'ms/diff':>12}{'changes':>10}")
+    for name in args.corpus:
+        old, new = make_pair(SIZES[name])
+        size = len(yaml.dump(old, Dumper=Dumper))
+        engines = {
+            "structural": lambda: diff_trees(old, new),
+            "structural (ordered)": lambda: diff_trees(old, new, ordered=True),
+        }
+        if size <= args.skip_deepdiff_above:
+            engines["deepdiff"] = lambda: DeepDiff(old, new, ignore_order=True)
+        for label, run in engines.items():
+            seconds = best_time(run, args.min_time)
+            changes = sum(len(group) for group in run().values()) if label == "deepdiff" else len(run())
+            print(f"{name:<8}{size:>12}{label:>22}{seconds * 1000:>12.2f}{changes:>10}")
+
+
+if __name__ == "__main__":
+    main()
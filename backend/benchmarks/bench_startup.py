@@ -0,0 +1,89 @@
+"""
+Startup benchmark: cold import time of the app, and how long a fresh server takes
+to answer its first requests in each STARTUP_MODE.
+
+Every run starts a new interpreter. "import" is the time to import backend.main;
+"first response" is from spawning uvicorn until GET / succeeds; "first validate" is
+the latency of the first /validate after that, which pays for the lazily imported
+and compiled validator when the background warm-up hasn't got to it yet.
+
+Pass --db-host with an unroutable address (e.g. 10.255.255.1) to see a database
+that times out on connect: blocking mode waits for it before serving, background
+mode doesn't.
+
+Run with:
+    python -m backend.benchmarks.bench_startup [--runs N] [--db-host HOST]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+VALID_YAML = b"name: John Doe\nage: 25\nemail: john@example.com\n"
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import backend.main; print(time.perf_counter() - t)"
+
+
+def import_seconds():
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_requests(mode, db_host, timeout=60.0):
+    """(seconds until GET / answers, seconds for the first /validate) for a fresh server."""
+    port = free_port()
+    env = {**os.environ, "STARTUP_MODE": mode, "DB_HOST": db_host}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while True:
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError(f"Server didn't answer within {timeout}s")
+                try:
+                    client.get("/").raise_for_status()
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            ready = time.perf_counter() - started
+
+            sent = time.perf_counter()
+            client.post("/validate", files={"file": ("a.yaml", VALID_YAML)}).raise_for_status()
+            return ready, time.perf_counter() - sent
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--db-host", default=os.getenv("DB_HOST", "localhost"), help="DB_HOST for the servers")
+    args = parser.parse_args()
+
+    imports = [import_seconds() for _ in range(args.runs)]
+    print(f"{'import backend.main':<36}{statistics.median(imports) * 1000:>10.1f} ms (median of {args.runs})")
+
+    print(f"{'mode':<12}{'first response ms':>20}{'first validate ms':>20}")
+    for mode in ("blocking", "background"):
+        runs = [first_requests(mode, args.db_host) for _ in range(args.runs)]
+        ready = statistics.median(run[0] for run in runs) * 1000
+        validate = statistics.median(run[1] for run in runs) * 1000
+        print(f"{mode:<12}{ready:>20.1f}{validate:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: jsonschema.validate() per call vs. the precompiled registry.
+
+Run with:
+    python -m backend.benchmarks.bench_validators [--number N]
+"""
+import argparse
+import timeit
+
+from jsonschema import validate
+from jsonschema.exceptions import best_match
+
+from backend.Schema import SCHEMA
+from backend.validators import get_validator, warm_validators
+
+# A typical small config, like the ones uploaded to /validate
+DOCUMENT = {
+    "name": "John Doe",
+    "age": 25,
+    "email": "john@example.com",
+    "is_active": True,
+    "hobbies": ["reading", "basketball"],
+    "address": {"street": "123 Some St", "city": "London", "zip_code": 12345},
+}
+
+
+def validate_per_call():
+    validate(instance=DOCUMENT, schema=SCHEMA)
+
+
+def validate_precompiled():
+    error = best_match(get_validator().iter_errors(DOCUMENT))
+    if error is not None:
+        raise error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=5000, help="Validations per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs (best is reported)")
+    args = parser.parse_args()
+
+    warm_validators()
+    results = {}
+    for label, func in (("jsonschema.validate", validate_per_call), ("precompiled", validate_precompiled)):
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        results[label] = best / args.number * 1e6
+        print(f"{label:<22} {results[label]:8.2f} us/validation")
+
+    speedup = results["jsonschema.validate"] / results["precompiled"]
+    print(f"{'speedup':<22} {speedup:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
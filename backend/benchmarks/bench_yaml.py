@@ -0,0 +1,66 @@
+"""
+YAML parser benchmark: libyaml (CSafeLoader) vs. pure Python (SafeLoader).
+
+Parses small, medium and multi-megabyte corpora and reports throughput. Use --json
+to append the numbers to a file so parse throughput can be tracked over time.
+
+Run with:
+    python -m backend.benchmarks.bench_yaml [--corpus small medium large] [--json results.jsonl]
+"""
+import argparse
+import json
+import platform
+import time
+
+import yaml
+
+from backend.benchmarks.corpus import SIZES, make_corpus
+from backend.yaml_loader import LOADER_BACKEND
+
+LOADERS = {"python": yaml.SafeLoader}
+if hasattr(yaml, "CSafeLoader"):
+    LOADERS["libyaml"] = yaml.CSafeLoader
+
+
+def time_parse(text: str, loader, min_time: float):
+    """Best seconds-per-parse over repeated runs lasting at least min_time in total."""
+    best, spent, runs = float("inf"), 0.0, 0
+    while spent < min_time or runs == 0:
+        started = time.perf_counter()
+        yaml.load(text, Loader=loader)
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+        runs += 1
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds spent per corpus and loader")
+    parser.add_argument("--json", help="Append results as one JSON line to this file")
+    args = parser.parse_args()
+
+    print(f"Active backend: {LOADER_BACKEND}")
+    print(f"{'corpus':<8}{'bytes':>12}{'loader':>10}{'ms/parse':>12}{'MB/s':>10}")
+    results = []
+    for name in args.corpus:
+        text = make_corpus(name)
+        size = len(text.encode("utf-8"))
+        for label, loader in LOADERS.items():
+            seconds = time_parse(text, loader, args.min_time)
+            throughput = size / seconds / 1e6
+            results.append({"corpus": name, "bytes": size, "loader": label,
+                            "ms_per_parse": seconds * 1000, "mb_per_s": throughput})
+            print(f"{name:<8}{size:>12}{label:>10}{seconds * 1000:>12.3f}{throughput:>10.2f}")
+
+    if args.json:
+        record = {"timestamp": time.time(), "python": platform.python_version(),
+                  "pyyaml": yaml.__version__, "results": results}
+        with open(args.json, "a") as out:
+            out.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
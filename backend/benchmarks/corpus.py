@@ -0,0 +1,68 @@
+"""
+Deterministic synthetic YAML corpora for the benchmarks.
+"""
+import random
+
+import yaml
+
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Named corpus sizes used across the benchmark suite (approximate bytes of YAML)
+SIZES = {
+    "small": 300,
+    "medium": 64 * 1024,
+    "large": 4 * 1024 * 1024,
+}
+
+CITIES = ["London", "Paris", "Toronto", "Berlin", "Madrid", "Tokyo", "Lima", "Oslo"]
+HOBBIES = ["reading", "chess", "running", "coding", "painting", "hiking", "music", "cooking"]
+
+
+def make_config(rng: random.Random, index: int):
+    """One document matching backend.Schema.SCHEMA."""
+    return {
+        "name": f"User {chr(65 + index % 26)}",
+        "age": rng.randint(0, 99),
+        "email": f"user{index}@example.com",
+        "is_active": rng.random() < 0.5,
+        "hobbies": rng.sample(HOBBIES, rng.randint(0, 4)),
+        "address": {
+            "street": f"{rng.randint(1, 999)} Main St",
+            "city": rng.choice(CITIES),
+            "zip_code": rng.choice([f"{rng.randint(10000, 99999)}", rng.randint(10000, 99999)]),
+        },
+    }
+
+
+def make_tree(rng: random.Random, depth: int, breadth: int):
+    """A nested mapping/list tree, for exercising parsers and diffing on deep documents."""
+    if depth == 0:
+        return rng.choice([rng.randint(0, 10_000), f"value-{rng.randint(0, 10_000)}", rng.random() < 0.5])
+    node = {f"key{i}": make_tree(rng, depth - 1, breadth) for i in range(breadth)}
+    node["items"] = [{"id": i, "name": f"item-{i}", "weight": rng.randint(0, 100)} for i in range(breadth)]
+    return node
+
+
+def make_document(target_bytes: int, seed: int = 0):
+    """
+    A single config document of roughly target_bytes when dumped: the SCHEMA fields
+    plus a `services` list that grows until the size is reached.
+    """
+    rng = random.Random(seed)
+    document = make_config(rng, seed)
+    if target_bytes <= SIZES["small"]:
+        return document
+    services = document["services"] = []
+    sample = yaml.dump(make_tree(random.Random(seed), 2, 3), Dumper=Dumper)
+    for index in range(max(1, target_bytes // len(sample))):
+        services.append({"id": index, "name": f"service-{index}", "settings": make_tree(rng, 2, 3)})
+    return document
+
+
+def make_yaml(target_bytes: int, seed: int = 0) -> str:
+    return yaml.dump(make_document(target_bytes, seed), Dumper=Dumper, sort_keys=False)
+
+
+def make_corpus(name: str, seed: int = 0) -> str:
+    """YAML text for one of the named SIZES."""
+    return make_yaml(SIZES[name], seed)
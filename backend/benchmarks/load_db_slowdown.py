@@ -0,0 +1,105 @@
+"""
+Load test: latency of the validation routes while the database is artificially slowed.
+
+Drives the app in-process over ASGI. The database query helpers are replaced with
+versions that sleep for --db-delay seconds, and background clients keep hitting
+/health and /configs/{ID} while /validate and /compare-schemas are measured.
+Since database calls run on their own executor, the validation p99 should stay
+close to the baseline run.
+
+Run with:
+    python -m backend.benchmarks.load_db_slowdown [--requests N] [--db-delay S]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from backend import database
+from backend.main import app
+
+VALID_YAML = b"name: John Doe\nage: 25\nemail: john@example.com\nhobbies: [reading, chess]\n"
+COMPARE_BODY = {
+    "schema1_content": "name: MyApp\nversion: 2.1.0\nsettings:\n  debug: true\n",
+    "schema2_content": "name: MyApp\nversion: 2.2.0\nsettings:\n  debug: false\n",
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def install_slow_database(delay):
+    """Make every database round-trip take `delay` seconds without needing a server."""
+    def slow(result):
+        def query(*args, **kwargs):
+            time.sleep(delay)
+            return result
+        return query
+
+    database._ping = slow(True)
+    database._select_config = slow({"id": 1, "name": "John Doe"})
+
+
+async def measure(client, requests, concurrency):
+    latencies = {"/validate": [], "/compare-schemas": []}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            if i % 2:
+                route = "/compare-schemas"
+                response = await client.post(route, json=COMPARE_BODY)
+            else:
+                route = "/validate"
+                response = await client.post(route, files={"file": ("load.yaml", VALID_YAML)})
+            response.raise_for_status()
+            latencies[route].append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies
+
+
+async def database_traffic(client, stop):
+    while not stop.is_set():
+        await asyncio.gather(client.get("/health"), client.get("/configs/1"), return_exceptions=True)
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        install_slow_database(0)
+        await measure(client, 20, args.concurrency)  # Warm-up
+        baseline = await measure(client, args.requests, args.concurrency)
+
+        install_slow_database(args.db_delay)
+        stop = asyncio.Event()
+        background = [asyncio.create_task(database_traffic(client, stop)) for _ in range(args.db_clients)]
+        slowed = await measure(client, args.requests, args.concurrency)
+        stop.set()
+        await asyncio.gather(*background)
+
+    print(f"{'route':<18}{'phase':<10}{'p50 ms':>10}{'p99 ms':>10}")
+    for route in baseline:
+        for phase, latencies in (("baseline", baseline), ("slow db", slowed)):
+            samples = latencies[route]
+            print(f"{route:<18}{phase:<10}{statistics.median(samples):>10.2f}{percentile(samples, 99):>10.2f}")
+    database.close_executor()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="Validation requests per phase")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent validation clients")
+    parser.add_argument("--db-delay", type=float, default=0.5, help="Seconds added to every database call")
+    parser.add_argument("--db-clients", type=int, default=8, help="Concurrent clients hitting database routes")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
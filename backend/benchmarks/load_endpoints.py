@@ -0,0 +1,284 @@
+"""
+Load test: throughput and latency of the main endpoints, with a regression gate.
+
+Each scenario sends --requests requests from --concurrency clients and reports
+requests per second, p50/p95/p99 latency and the peak RSS of the process while the
+scenario ran (the resident size sampled from /proc/self/statm, so Linux only). The
+scenarios cover /validate, /compare-schemas, /compare-schema-files and /configs,
+over generated YAML of each --sizes corpus plus a deeply nested document.
+
+By default the app runs in-process over ASGI with an in-memory stand-in for the
+configs table (the data access helpers are swapped, so requests still go through
+the database executor) and the result cache disabled, so every request does the
+real work. With --url the same scenarios run against a live server, e.g. the
+docker-compose stack; start it with RESULT_CACHE_MAX_BYTES=0 for comparable
+numbers. Peak RSS is only known in-process. Memory the allocator kept from earlier
+scenarios still counts, so compare a scenario's RSS against its own baseline.
+
+--save-baseline writes the results as JSON; --baseline compares against such a
+file and exits with status 1 when any scenario's p95 or peak RSS grew, or its
+throughput dropped, by more than --tolerance. Baselines are machine-specific:
+record them on the machine that runs the comparison.
+
+Run with:
+    python -m backend.benchmarks.load_endpoints [--sizes small medium] [--requests N]
+        [--url http://localhost:8000] [--save-baseline FILE | --baseline FILE [--tolerance 0.2]]
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import httpx
+import yaml
+
+from backend import database
+from backend.benchmarks.corpus import SIZES, Dumper, make_config, make_tree, make_yaml
+from backend.benchmarks.load_db_slowdown import percentile
+
+# Depth and breadth of the nested document used by the *-deep scenarios
+DEEP_TREE = (8, 2)
+
+# Relative changes treated as regressions: (metric, True when larger is worse)
+GATED_METRICS = (("p95_ms", True), ("peak_rss_mb", True), ("rps", False))
+
+# Seconds between RSS samples while a scenario runs
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def current_rss_bytes():
+    """Resident size of this process now, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RSSSampler:
+    """
+    Highest current RSS seen between start() and stop(). ru_maxrss can't be used per
+    scenario: it is the high-water mark of the whole process, so every scenario after
+    the heaviest one would report the same peak.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._sample()
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """The peak in MB, or None when RSS can't be read."""
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        return None if self.peak is None else round(self.peak / (1024 * 1024), 1)
+
+
+def install_memory_database():
+    """Serve the configs routes from a dict instead of Postgres."""
+    rows, lock, ids = {}, threading.Lock(), itertools.count(1)
+    columns = ("name", "age", "email", "is_active", "hobbies", "street", "city", "zip_code")
+
+    def insert(values):
+        with lock:
+            row = {"id": next(ids), **dict(zip(columns, values))}
+            rows[row["id"]] = row
+            return row
+
+    def select(config_id):
+        return rows.get(config_id)
+
+    def list_page(limit, sort, descending, after, filters):
+        with lock:
+            page = sorted(rows.values(), key=lambda row: row["id"], reverse=descending)
+        if after is not None:
+            page = [row for row in page if (row["id"] < after[1] if descending else row["id"] > after[1])]
+        return page[:limit], len(page) > limit
+
+    database._ping = lambda: True
+    database._insert_config = insert
+    database._select_config = select
+    database._list_configs = list_page
+
+
+def corpora(sizes):
+    """(label, YAML text) pairs: one per named size, plus the deep tree."""
+    documents = [(size, make_yaml(SIZES[size])) for size in sizes]
+    deep = {**make_config(random.Random(0), 0), "tree": make_tree(random.Random(0), *DEEP_TREE)}
+    documents.append(("deep", yaml.dump(deep, Dumper=Dumper, sort_keys=False)))
+    return documents
+
+
+def edited(text: str) -> str:
+    # A second document that differs from the first in a few places
+    return text.replace("age: ", "age: 1", 1).replace("Main St", "High St", 3)
+
+
+# Body of every configs-create request
+CONFIG = {"name": "John Doe", "age": 25, "email": "john@example.com", "is_active": True,
+          "hobbies": "chess, golf", "street": "1 Main St", "city": "Paris", "zip_code": "75001"}
+
+
+def scenarios(sizes, config_ids):
+    """name -> function(client, i) sending request number i; configs-get reads config_ids."""
+    found = {}
+    for label, text in corpora(sizes):
+        other = edited(text)
+        body = {"schema1_content": text, "schema2_content": other}
+        found[f"validate-{label}"] = lambda client, i, text=text: client.post(
+            "/validate", files={"file": ("load.yaml", text)})
+        found[f"compare-schemas-{label}"] = lambda client, i, body=body: client.post(
+            "/compare-schemas", json=body)
+        found[f"compare-schema-files-{label}"] = lambda client, i, text=text, other=other: client.post(
+            "/compare-schema-files", files={"file1": ("a.yaml", text), "file2": ("b.yaml", other)})
+
+    found["configs-create"] = lambda client, i: client.post("/configs/", json=CONFIG)
+    found["configs-get"] = lambda client, i: client.get(f"/configs/{config_ids[i % len(config_ids)]}")
+    found["configs-list"] = lambda client, i: client.get("/configs?limit=20")
+    return found
+
+
+def summarize(latencies, elapsed, rss):
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "peak_rss_mb": rss,
+    }
+
+
+async def measure(client, send, requests, concurrency, in_process):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send(client, i)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    sampler = RSSSampler() if in_process else None
+    if sampler:
+        gc.collect()  # Garbage left by the previous scenario shouldn't count towards this one
+        sampler.start()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        rss = sampler.stop() if sampler else None
+    return summarize(latencies, elapsed, rss)
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Descriptions of every gated metric that moved the wrong way by more than `tolerance`."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, larger_is_worse in GATED_METRICS:
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change if larger_is_worse else -change) > tolerance:
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+async def run(args):
+    config_ids = []
+    selected = scenarios(args.sizes, config_ids)
+    if args.only:
+        selected = {name: send for name, send in selected.items() if any(part in name for part in args.only)}
+
+    in_process = args.url is None
+    if in_process:
+        from backend.cache import result_cache
+        from backend.main import app
+
+        install_memory_database()
+        result_cache.max_bytes = 0
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    else:
+        client = httpx.AsyncClient(base_url=args.url, timeout=None)
+
+    results = {}
+    async with client:
+        if "configs-get" in selected:
+            for _ in range(50):
+                response = await client.post("/configs/", json=CONFIG)
+                response.raise_for_status()
+                config_ids.append(response.json()["id"])
+        for name, send in selected.items():
+            await measure(client, send, args.warmup, args.concurrency, in_process)
+            results[name] = await measure(client, send, args.requests, args.concurrency, in_process)
+            result = results[name]
+            rss = f"{result['peak_rss_mb']:>10.1f}" if result["peak_rss_mb"] is not None else f"{'-':>10}"
+            print(f"{name:<32}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}"
+                  f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{rss}", flush=True)
+    if in_process:
+        database.close_executor()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=sorted(SIZES))
+    parser.add_argument("--only", nargs="+", help="Run only scenarios whose name contains one of these")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--url", help="Base URL of a running server instead of the in-process app")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write the results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="Fail on regressions against FILE")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative change (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<32}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>10}")
+    results = asyncio.run(run(args))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
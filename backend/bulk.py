@@ -0,0 +1,72 @@
+import codecs
+import csv
+import json
+import os
+from typing import IO, Any, Dict, Iterator, Optional, Tuple
+
+# Bulk ingestion settings
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "100000"))  # Records accepted per /configs/bulk request
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))  # Rows per multi-row INSERT
+
+BULK_FORMATS = ("jsonl", "csv")
+
+
+class BulkFormatError(Exception):
+    """Raised when an upload can't be read as JSON lines or CSV."""
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or (content_type or "").startswith("text/csv"):
+        return "csv"
+    return "jsonl"
+
+
+def _blank_to_none(record: Dict[str, Any]) -> Dict[str, Any]:
+    # CSV has no null, so empty cells mean "not provided"
+    return {key: (None if value == "" else value) for key, value in record.items() if key}
+
+
+def iter_records(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Yield (record number, record, parse error) for every record in the upload.
+
+    Records are numbered from 1: lines for JSON lines, data rows for CSV. The stream
+    is decoded incrementally, so the whole upload is never held as one string.
+    """
+    if fmt not in BULK_FORMATS:
+        raise BulkFormatError(f"Unsupported format {fmt!r}, expected one of {BULK_FORMATS}")
+    try:
+        yield from _iter_records(codecs.getreader("utf-8")(stream), fmt)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise BulkFormatError(f"Unreadable upload: {e}") from e
+
+
+def _iter_records(text: IO[str], fmt: str):
+    count = 0
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        if not reader.fieldnames:
+            return
+        for number, row in enumerate(reader, start=1):
+            count += 1
+            if count > BULK_MAX_ROWS:
+                raise BulkFormatError(f"Upload contains more than {BULK_MAX_ROWS} records")
+            yield number, _blank_to_none(row), None
+        return
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        count += 1
+        if count > BULK_MAX_ROWS:
+            raise BulkFormatError(f"Upload contains more than {BULK_MAX_ROWS} records")
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Each line must be a JSON object"
+            continue
+        yield number, record, None
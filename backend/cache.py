@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from fastapi import UploadFile
+
+from backend.validators import default_schema_key
+
+# Result cache settings
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))  # 0 disables the cache
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))  # Seconds an entry stays valid
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR")  # Optional directory shared by all workers on a host
+RESULT_CACHE_DIR_MAX_BYTES = int(os.getenv("RESULT_CACHE_DIR_MAX_BYTES", str(256 * 1024 * 1024)))  # Disk budget of RESULT_CACHE_DIR
+RESULT_CACHE_PRUNE_INTERVAL = float(os.getenv("RESULT_CACHE_PRUNE_INTERVAL", "60"))  # Seconds between sweeps of RESULT_CACHE_DIR
+
+# Read size used when hashing uploads
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+async def hash_upload(file: UploadFile) -> str:
+    """Hash an upload chunk by chunk, leaving it rewound for the parser."""
+    digest = hashlib.sha256()
+    await file.seek(0)
+    while chunk := await file.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+
+def validation_key(document_hash: str, schema_key: Optional[str] = None, variant: str = "first") -> str:
+    # The schema hash is part of the key, so editing SCHEMA invalidates every old entry.
+    # `variant` separates result shapes, e.g. the validation mode and error cap.
+    return f"validate:{schema_key or default_schema_key()}:{variant}:{document_hash}"
+
+
+def comparison_key(first_hash: str, second_hash: str, variant: str = "") -> str:
+    # Ordered: comparing A to B doesn't give the same diff as B to A.
+    # `variant` separates diff engines and options.
+    return f"compare:{variant}:{first_hash}:{second_hash}"
+
+
+class FileCacheBackend:
+    """
+    Stores entries as JSON files in a directory, so every uvicorn worker on the host shares them.
+
+    Writes start a sweep in the background at most every `prune_interval` seconds. It
+    deletes expired entries, even ones nobody reads again, and then the oldest
+    entries until the directory fits in `max_bytes`.
+    """
+
+    def __init__(self, directory: str, ttl: float = RESULT_CACHE_TTL, max_bytes: int = RESULT_CACHE_DIR_MAX_BYTES,
+                 prune_interval: float = RESULT_CACHE_PRUNE_INTERVAL):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self._pruning = threading.Lock()
+        self.pruned = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except (FileNotFoundError, OSError):
+            return None
+
+    def set(self, key: str, payload: str):
+        # Write then rename, so readers in other workers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        self._maybe_prune()
+
+    def _maybe_prune(self):
+        now = time.monotonic()
+        if now < self._next_prune or not self._pruning.acquire(blocking=False):
+            return
+        self._next_prune = now + self.prune_interval
+
+        def sweep():
+            try:
+                self.prune()
+            finally:
+                self._pruning.release()
+
+        threading.Thread(target=sweep, name="result-cache-prune", daemon=True).start()
+
+    def prune(self) -> int:
+        """Delete expired entries and leftover temp files, then the oldest entries over max_bytes."""
+        removed = 0
+        cutoff = time.time() - self.ttl
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime < cutoff and name.endswith((".json", ".tmp")):
+                    os.remove(path)
+                    removed += 1
+                elif name.endswith(".json"):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                pass  # Removed by another worker meanwhile
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+            total -= size
+        self.pruned += removed
+        return removed
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of JSON-serialisable results, bounded by the serialised size of its entries.
+
+    Values are stored as JSON text, so callers always get a fresh copy and the memory
+    accounting is exact. An optional shared backend is consulted on local misses.
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES, ttl: float = RESULT_CACHE_TTL,
+                 backend: Optional[FileCacheBackend] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = OrderedDict()  # key -> (payload, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(payload)
+                self._remove(key)
+        payload = self.backend.get(key) if self.backend else None
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, payload)
+        return json.loads(payload)
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        payload = json.dumps(value, default=str)
+        with self._lock:
+            self._store(key, payload)
+        if self.backend:
+            self.backend.set(key, payload)
+
+    def _store(self, key: str, payload: str):
+        size = len(payload)
+        if size > self.max_bytes:
+            return  # Would evict everything else for a single entry
+        self._remove(key)
+        self._entries[key] = (payload, time.monotonic() + self.ttl)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.backend:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "shared_backend": self.backend.directory if self.backend else None,
+            }
+
+
+# Process-wide cache for /validate and comparison results
+result_cache = ResultCache(backend=FileCacheBackend(RESULT_CACHE_DIR) if RESULT_CACHE_DIR else None)
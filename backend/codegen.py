@@ -0,0 +1,303 @@
+import math
+import os
+import stat
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+# Bump when the generated code changes, so stale cache files are ignored
+CODEGEN_VERSION = 1
+
+# Where generated validator modules are cached, keyed by schema hash. Cached modules are
+# executed, so the default is per user, and any directory (or file) another user could
+# have written to is ignored
+_USER = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "user")
+CODEGEN_CACHE_DIR = os.getenv("CODEGEN_CACHE_DIR",
+                              os.path.join(tempfile.gettempdir(), f"schema-validator-codegen-{_USER}"))
+
+# Keywords the generator understands
+SUPPORTED_KEYWORDS = {
+    "type", "enum", "const", "allOf", "anyOf", "oneOf", "not",
+    "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum",
+    "minLength", "maxLength", "pattern",
+    "items", "minItems", "maxItems",
+    "properties", "required", "additionalProperties", "minProperties", "maxProperties",
+}
+# Keywords with no effect on validity. format is only an annotation: the reference
+# validators are built without a format checker.
+ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples",
+               "format", "deprecated", "readOnly", "writeOnly", "$defs", "definitions"}
+# Drafts whose semantics for the keywords above are the same (draft 4 differs on exclusiveMinimum)
+SUPPORTED_DRAFTS = ("draft-06", "draft-07", "2019-09", "2020-12")
+
+TYPE_CHECKS = {
+    "string": "isinstance({0}, str)",
+    "integer": "(isinstance({0}, int) and not isinstance({0}, bool) or isinstance({0}, float) and {0}.is_integer())",
+    "number": "(isinstance({0}, (int, float)) and not isinstance({0}, bool))",
+    "boolean": "isinstance({0}, bool)",
+    "null": "{0} is None",
+    "object": "isinstance({0}, dict)",
+    "array": "isinstance({0}, list)",
+}
+
+# Shared helpers available to generated code
+PRELUDE = '''import re
+
+
+def _accept(data):
+    return True
+
+
+def _reject(data):
+    return False
+
+
+def _equal(one, two):
+    # JSON equality: booleans never equal numbers, containers compare element-wise
+    if isinstance(one, bool) or isinstance(two, bool):
+        return isinstance(one, bool) and isinstance(two, bool) and one == two
+    if isinstance(one, dict) and isinstance(two, dict):
+        return one.keys() == two.keys() and all(_equal(one[key], two[key]) for key in one)
+    if isinstance(one, list) and isinstance(two, list):
+        return len(one) == len(two) and all(_equal(a, b) for a, b in zip(one, two))
+    if isinstance(one, (dict, list)) or isinstance(two, (dict, list)):
+        return False
+    return one == two
+'''
+
+
+class UnsupportedSchema(Exception):
+    """Raised for schemas using keywords the generator doesn't handle; use jsonschema for those."""
+
+
+class CodeGenerator:
+    """
+    Turns a JSON Schema into Python source for a `validate(data) -> bool` function.
+
+    Each subschema becomes one small function of straight-line isinstance checks and
+    comparisons. The generated code only decides validity; error details still come
+    from jsonschema, which keeps messages identical to the reference.
+    """
+
+    def __init__(self, schema):
+        self._functions: List[str] = []
+        self._patterns: List[str] = []  # Compiled once at module level
+        self._count = 0
+        dialect = schema.get("$schema") if isinstance(schema, dict) else None
+        if dialect and not any(draft in dialect for draft in SUPPORTED_DRAFTS):
+            raise UnsupportedSchema(f"Unsupported $schema {dialect!r}")
+        self.entry = self._function(schema)
+
+    def source(self) -> str:
+        patterns = [f"_p{index} = re.compile({pattern!r})" for index, pattern in enumerate(self._patterns)]
+        return "\n".join([PRELUDE, *patterns, *self._functions, f"\nvalidate = {self.entry}\n"])
+
+    def _function(self, schema) -> str:
+        if schema is True or schema == {}:
+            return "_accept"
+        if schema is False:
+            return "_reject"
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema(f"Schema must be an object or boolean, got {schema!r}")
+        unknown = set(schema) - SUPPORTED_KEYWORDS - ANNOTATIONS
+        if unknown:
+            raise UnsupportedSchema(f"Unsupported keywords: {', '.join(sorted(unknown))}")
+
+        name = f"_v{self._count}"
+        self._count += 1
+        body = self._checks(schema)
+        self._functions.append("\n".join([f"\ndef {name}(data):", *body, "    return True"]))
+        return name
+
+    def _checks(self, schema: Dict[str, Any]) -> List[str]:
+        lines: List[str] = []
+
+        def check(condition: str, indent: int = 1):
+            # Emit "if <condition>: return False"
+            lines.append("    " * indent + f"if {condition}:")
+            lines.append("    " * indent + "    return False")
+
+        def close_block(start: int):
+            # Drop a guard (and loop) header when every check under it turned out to be a no-op
+            if all(not line.strip().startswith("return") for line in lines[start:]):
+                del lines[start:]
+
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            if any(kind not in TYPE_CHECKS for kind in types):
+                raise UnsupportedSchema(f"Unknown type in {types!r}")
+            check(f"not ({' or '.join(TYPE_CHECKS[kind].format('data') for kind in types)})")
+        if "enum" in schema:
+            check(f"not any(_equal(data, option) for option in {schema['enum']!r})")
+        if "const" in schema:
+            check(f"not _equal(data, {schema['const']!r})")
+        for sub in schema.get("allOf", []):
+            check(f"not {self._function(sub)}(data)")
+        if "anyOf" in schema:
+            check(f"not ({' or '.join(f'{self._function(sub)}(data)' for sub in schema['anyOf'])})")
+        if "oneOf" in schema:
+            names = ", ".join(self._function(sub) for sub in schema["oneOf"])
+            check(f"sum(1 for branch in ({names},) if branch(data)) != 1")
+        if "not" in schema:
+            check(f"{self._function(schema['not'])}(data)")
+
+        numeric = [(keyword, operator) for keyword, operator in
+                   (("minimum", "<"), ("maximum", ">"), ("exclusiveMinimum", "<="), ("exclusiveMaximum", ">="))
+                   if keyword in schema]
+        if numeric:
+            start = len(lines)
+            lines.append(f"    if {TYPE_CHECKS['number'].format('data')}:")
+            for keyword, operator in numeric:
+                if isinstance(schema[keyword], bool):
+                    raise UnsupportedSchema(f"Boolean {keyword} is draft 4 syntax")
+                if not math.isfinite(schema[keyword]):
+                    raise UnsupportedSchema(f"Non-finite {keyword} can't be written as a literal")
+                check(f"data {operator} {schema[keyword]!r}", indent=2)
+
+        if any(keyword in schema for keyword in ("minLength", "maxLength", "pattern")):
+            start = len(lines)
+            lines.append("    if isinstance(data, str):")
+            if "minLength" in schema:
+                check(f"len(data) < {schema['minLength']!r}", indent=2)
+            if "maxLength" in schema:
+                check(f"len(data) > {schema['maxLength']!r}", indent=2)
+            if "pattern" in schema:
+                self._patterns.append(schema["pattern"])
+                check(f"_p{len(self._patterns) - 1}.search(data) is None", indent=2)
+
+        if any(keyword in schema for keyword in ("items", "minItems", "maxItems")):
+            start = len(lines)
+            lines.append("    if isinstance(data, list):")
+            if "minItems" in schema:
+                check(f"len(data) < {schema['minItems']!r}", indent=2)
+            if "maxItems" in schema:
+                check(f"len(data) > {schema['maxItems']!r}", indent=2)
+            if "items" in schema:
+                if isinstance(schema["items"], list):
+                    raise UnsupportedSchema("Tuple-form items is not supported")
+                item = self._function(schema["items"])
+                if item != "_accept":
+                    lines.append("        for item in data:")
+                    check(f"not {item}(item)", indent=3)
+            close_block(start)
+
+        object_keywords = ("properties", "required", "additionalProperties", "minProperties", "maxProperties")
+        if any(keyword in schema for keyword in object_keywords):
+            start = len(lines)
+            lines.append("    if isinstance(data, dict):")
+            if "minProperties" in schema:
+                check(f"len(data) < {schema['minProperties']!r}", indent=2)
+            if "maxProperties" in schema:
+                check(f"len(data) > {schema['maxProperties']!r}", indent=2)
+            for key in schema.get("required", []):
+                check(f"{key!r} not in data", indent=2)
+            properties = schema.get("properties", {})
+            for key, sub in properties.items():
+                function = self._function(sub)
+                if function != "_accept":
+                    check(f"{key!r} in data and not {function}(data[{key!r}])", indent=2)
+            if "additionalProperties" in schema:
+                extra = self._function(schema["additionalProperties"])
+                known = repr(frozenset(properties)) if properties else "()"
+                if extra == "_reject":
+                    check(f"any(key not in {known} for key in data)", indent=2)
+                elif extra != "_accept":
+                    check(f"any(key not in {known} and not {extra}(value) for key, value in data.items())", indent=2)
+            close_block(start)
+        return lines
+
+
+def generate_source(schema) -> str:
+    """Python source of a module whose `validate(data)` returns whether data matches the schema."""
+    return CodeGenerator(schema).source()
+
+
+def _load(source: str, filename: str) -> Callable[[Any], bool]:
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace["validate"]
+
+
+def _trusted(info: os.stat_result) -> bool:
+    """Owned by this user and not writable by anyone else (always true where there are no uids)."""
+    if not hasattr(os, "getuid"):
+        return True
+    return info.st_uid == os.getuid() and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _private_cache_dir(cache_dir: str) -> bool:
+    """Create the cache directory as 0700 if needed; whether it is safe to load modules from."""
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        info = os.lstat(cache_dir)
+    except OSError as e:
+        print(f"Warning: could not create codegen cache directory {cache_dir}: {e}")
+        return False
+    if not stat.S_ISDIR(info.st_mode) or not _trusted(info):
+        print(f"Warning: not using codegen cache directory {cache_dir}: "
+              "it must be a directory owned by this user and writable by no one else")
+        return False
+    return True
+
+
+def _read_cached(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if not _trusted(os.fstat(f.fileno())):
+                return None
+            return f.read()
+    except OSError:
+        return None
+
+
+def compile_schema(schema, key: str, cache_dir: Optional[str] = CODEGEN_CACHE_DIR) -> Callable[[Any], bool]:
+    """
+    Generated validity check for a schema, read from (or written to) the on-disk cache.
+    The cache is skipped unless the directory and file belong to this user alone.
+    Raises UnsupportedSchema when the schema can't be compiled.
+    """
+    path = None
+    if cache_dir and _private_cache_dir(cache_dir):
+        path = os.path.join(cache_dir, f"{key}-v{CODEGEN_VERSION}.py")
+        source = _read_cached(path)
+        if source is not None:
+            try:
+                return _load(source, path)
+            except SyntaxError:
+                pass
+
+    source = generate_source(schema)
+    validate = _load(source, path or f"<schema {key}>")
+    if path:
+        # Write then rename, so other workers never import a partial file
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(source)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: could not cache generated validator in {cache_dir}: {e}")
+    return validate
+
+
+class GeneratedValidator:
+    """
+    A jsonschema validator whose validity checks run generated code.
+
+    is_valid() and iter_errors() on valid data never touch jsonschema; invalid data
+    is handed to the reference validator so every error is reported exactly as before.
+    """
+
+    def __init__(self, check: Callable[[Any], bool], reference):
+        self._check = check
+        self.reference = reference
+
+    def is_valid(self, instance) -> bool:
+        return self._check(instance)
+
+    def iter_errors(self, instance):
+        if self._check(instance):
+            return iter(())
+        return self.reference.iter_errors(instance)
+
+    def __getattr__(self, name):
+        return getattr(self.reference, name)
@@ -1,8 +1,20 @@
 import psycopg2
 from psycopg2 import extras
+from psycopg2 import extensions
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import datetime
+from typing import Optional, Sequence
+import asyncio
+import base64
+import json
+import threading
+import time
 import os
+import re
+from backend.metrics import DB_CONNECT_SECONDS, DB_QUERY_SECONDS
 
 # PostgreSQL Database Configuration (uses environment variables)
 DB_NAME = os.getenv("POSTGRES_DB", "postgres") 
@@ -23,62 +35,923 @@ if DATABASE_URL and not DB_HOST.startswith("/cloudsql/"):
     DB_HOST = parsed.hostname or "localhost"
     DB_PORT = parsed.port or "5432"
 
+# Connection pool settings
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))  # Seconds for a new connection handshake
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))  # Connections opened at startup
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))  # Upper bound on open connections
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # Seconds to wait for a free connection
+DB_POOL_CHECK_AFTER = float(os.getenv("DB_POOL_CHECK_AFTER", "30"))  # Ping connections idle longer than this
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(DB_POOL_MAX_SIZE)))  # Threads running blocking DB calls
+DB_MAX_PENDING = int(os.getenv("DB_MAX_PENDING", "100"))  # Queued + running DB calls before new ones are refused
+
 # Establishing the Connection
 def get_connection():
+    started = time.perf_counter()
     try:
-        print(f"Attempting to connect to database: {DB_HOST}:{DB_PORT}/{DB_NAME}")
         conn = psycopg2.connect(
             dbname=DB_NAME,
             user=DB_USER,
             password=DB_PASSWORD,
             host=DB_HOST,
             port=DB_PORT,
-            connect_timeout=5  # 5 second timeout
+            connect_timeout=DB_CONNECT_TIMEOUT
         )
         conn.autocommit = True
-        print("Database connection successful")
+        DB_CONNECT_SECONDS.observe(time.perf_counter() - started, "ok")
         return conn
     except Exception as e:
-        print(f"Database connection failed: {e}")
+        DB_CONNECT_SECONDS.observe(time.perf_counter() - started, "error")
+        print(f"Database connection to {DB_HOST}:{DB_PORT}/{DB_NAME} failed: {e}")
         return None
 
-# FastAPI Lifespan to handle startup/shutdown events
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Try to establish connection with timeout and non-blocking approach
-    print("Starting FastAPI application...")
-    try:
-        conn = get_connection()
-        if conn:
-            create_table_sql = """
-            CREATE TABLE IF NOT EXISTS configs (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                age INT NOT NULL,
-                email VARCHAR(100) NOT NULL,
-                is_active BOOLEAN,
-                hobbies TEXT[],
-                street VARCHAR(100),
-                city VARCHAR(100),
-                zip_code VARCHAR(20),
-                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
-            );
-            """
+
+class DatabaseUnavailable(Exception):
+    """Raised when no connection to the database can be established."""
+
+
+class DatabaseBusy(Exception):
+    """Raised when the database layer is saturated and refuses new work."""
+
+
+class PoolTimeout(DatabaseBusy):
+    """Raised when no connection frees up within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of autocommit psycopg2 connections.
+
+    Connections idle for longer than `check_after` seconds are pinged before
+    being handed out, and broken ones are replaced transparently.
+    """
+
+    def __init__(self, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 timeout=DB_POOL_TIMEOUT, check_after=DB_POOL_CHECK_AFTER, connect=get_connection):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self._connect = connect
+        self._idle = []  # (connection, returned_at) pairs, most recently used last
+        self._in_use = set()
+        self._opening = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # Metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def open(self):
+        """Pre-open min_size connections; failures are tolerated and retried lazily."""
+        for _ in range(self.min_size - self.size):
+            conn = self._connect()
+            if not conn:
+                break
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    @property
+    def size(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - idle_since < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Borrow a connection, waiting up to `timeout` seconds for one to free up."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        while True:
+            conn = None
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                self._waiting += 1
+                try:
+                    while not self._idle and self.size >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise PoolTimeout(f"No database connection available within {timeout}s")
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    self._in_use.add(conn)
+                else:
+                    self._opening += 1
+
+            if conn is not None:
+                # Health check outside the lock so a slow ping doesn't block other borrowers
+                if self._healthy(conn, idle_since):
+                    return self._checked_out(conn, started)
+                self._discard(conn)
+                continue
+
             try:
-                with conn.cursor() as cur:
-                    cur.execute(create_table_sql)
-                print("Startup: Table created or already exists.")
-            except Exception as e:
-                print(f"Error creating table: {e}")
+                conn = self._connect()
             finally:
+                with self._cond:
+                    self._opening -= 1
+                    if conn:
+                        self._in_use.add(conn)
+                    self._cond.notify()
+            if not conn:
+                return None
+            return self._checked_out(conn, started)
+
+    def _checked_out(self, conn, started):
+        waited = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            self._in_use.discard(conn)
+            self._discarded += 1
+            self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a borrowed connection; broken or discarded ones are closed."""
+        if conn is None:
+            return
+        if not discard and not conn.closed:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if not conn.autocommit:
+                    conn.autocommit = True
+            except psycopg2.Error:
+                discard = True
+        if discard or conn.closed or self._closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._in_use.discard(conn)
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Borrow a connection for the duration of a with-block (None if the database is unreachable)."""
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def close(self):
+        """Close idle connections now; in-use ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            try:
                 conn.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self.size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "wait_time_total_ms": round(self._wait_total * 1000, 3),
+                "wait_time_avg_ms": round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+# Process-wide pool, created by the lifespan hook (or lazily on first use)
+pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global pool
+    if pool is None:
+        with _pool_lock:
+            if pool is None:
+                pool = ConnectionPool()
+    return pool
+
+def close_pool():
+    global pool
+    with _pool_lock:
+        if pool is not None:
+            pool.close()
+            pool = None
+
+# Borrow a pooled connection; yields None when the database is unreachable
+@contextmanager
+def pooled_connection(timeout: Optional[float] = None):
+    with get_pool().connection(timeout) as conn:
+        yield conn
+
+
+def _timed_call(func, *args, **kwargs):
+    # Timed on the worker thread, so time spent queued for a thread isn't counted
+    with DB_QUERY_SECONDS.time(getattr(func, "__name__", "call").lstrip("_")):
+        return func(*args, **kwargs)
+
+
+class DatabaseExecutor:
+    """
+    Runs blocking psycopg2 calls on a dedicated thread pool so they never block the event loop.
+
+    At most `max_pending` calls may be queued or running; beyond that new calls fail fast
+    with DatabaseBusy instead of piling up behind a slow database.
+    """
+
+    def __init__(self, workers=DB_EXECUTOR_WORKERS, max_pending=DB_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._pending = 0  # Only touched from the event loop thread
+
+    async def run(self, func, *args, **kwargs):
+        if self._pending >= self.max_pending:
+            raise DatabaseBusy(f"Too many pending database calls ({self._pending})")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(_timed_call, func, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    def spawn(self, func, *args):
+        """Fire-and-forget cleanup work; runs inline once the executor is shut down."""
+        try:
+            self._executor.submit(func, *args)
+        except RuntimeError:
+            func(*args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {"workers": self.workers, "pending": self._pending, "max_pending": self.max_pending}
+
+
+# Process-wide executor for database work, managed like the pool
+executor: Optional[DatabaseExecutor] = None
+
+def get_executor() -> DatabaseExecutor:
+    global executor
+    if executor is None:
+        executor = DatabaseExecutor()
+    return executor
+
+def close_executor():
+    global executor
+    if executor is not None:
+        executor.shutdown()
+        executor = None
+
+async def run_db(func, *args, **kwargs):
+    """Await a blocking database function on the database executor."""
+    return await get_executor().run(func, *args, **kwargs)
+
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS configs (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    age INT NOT NULL,
+    email VARCHAR(100) NOT NULL,
+    is_active BOOLEAN,
+    hobbies TEXT[],
+    street VARCHAR(100),
+    city VARCHAR(100),
+    zip_code VARCHAR(20),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+"""
+
+# Versioned JSON Schemas for the schema registry. Versions are immutable; the single-row
+# generation counter is bumped by every change so workers can cheaply tell their cache is stale.
+# Version numbers come from a per-name counter that deletes never wind back, so a number
+# is never handed out twice (existing registries are backfilled from their highest version).
+CREATE_SCHEMA_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS schemas (
+    name VARCHAR(100) NOT NULL,
+    version INT NOT NULL,
+    body JSONB NOT NULL,
+    schema_hash CHAR(64) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (name, version)
+);
+CREATE TABLE IF NOT EXISTS schema_registry_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    generation BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO schema_registry_state (id, generation) VALUES (TRUE, 0) ON CONFLICT (id) DO NOTHING;
+CREATE TABLE IF NOT EXISTS schema_version_counters (
+    name VARCHAR(100) PRIMARY KEY,
+    last_version INT NOT NULL
+);
+INSERT INTO schema_version_counters (name, last_version)
+SELECT name, MAX(version) FROM schemas GROUP BY name
+ON CONFLICT (name) DO NOTHING;
+"""
+
+# Validated documents stored as parsed, with the hash of their source and the schema they
+# passed. The unique index over the source hash and the schema (its hash, name and version,
+# since identical bodies can be registered under several names) deduplicates writes; it
+# replaces the earlier (content_hash, schema_hash) one.
+CREATE_DOCUMENT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS documents (
+    id BIGSERIAL PRIMARY KEY,
+    content_hash CHAR(64) NOT NULL,
+    schema_name VARCHAR(100),
+    schema_version INT,
+    schema_hash CHAR(64) NOT NULL,
+    body JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+DROP INDEX IF EXISTS documents_content_schema_idx;
+CREATE UNIQUE INDEX IF NOT EXISTS documents_content_schema_version_idx
+    ON documents (content_hash, schema_hash, (COALESCE(schema_name, '')), (COALESCE(schema_version, 0)));
+"""
+
+# Supporting indexes for GET /configs. Built CONCURRENTLY (pool connections are autocommit)
+# so a bootstrap against a large existing table doesn't block writes.
+CREATE_INDEX_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS configs_updated_at_id_idx ON configs (updated_at, id);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS configs_city_id_idx ON configs (city, id);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS configs_email_idx ON configs (email);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS configs_is_active_id_idx ON configs (is_active, id);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS configs_hobbies_gin_idx ON configs USING GIN (hobbies);",
+    # GET /documents: every field filter is a containment (@>) test served by the GIN index
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS documents_body_gin_idx ON documents USING GIN (body jsonb_path_ops);",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS documents_schema_id_idx ON documents (schema_name, schema_version, id);",
+)
+# Indexes earlier versions created that nothing queries any more
+RETIRED_INDEXES = ("documents_email_idx",)
+
+# A CONCURRENTLY build that fails leaves an INVALID index behind, which IF NOT EXISTS
+# would then skip forever; those are dropped and rebuilt. Index DDL runs under this
+# advisory lock, so workers bootstrapping together don't mistake each other's
+# in-progress builds (also not yet valid) for failed ones. The lock is polled rather
+# than waited on: a CONCURRENTLY build waits for every older transaction to end, and a
+# worker blocked in pg_advisory_lock() would be one, deadlocking with the holder.
+INDEX_DDL_LOCK = 7301845112
+INDEX_LOCK_POLL_INTERVAL = 0.5  # Seconds between attempts to take the index DDL lock
+INVALID_INDEXES_SQL = """
+SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+WHERE NOT i.indisvalid AND c.relname = ANY(%s);
+"""
+INDEX_NAME = re.compile(r"IF NOT EXISTS (\w+) ON")
+
+CONFIG_COLUMNS = "id, name, age, email, is_active, hobbies, street, city, zip_code"
+
+# Keyset pagination: sort key -> column compared against the cursor (ties broken by id)
+LIST_SORT_COLUMNS = {"id": "id", "updated_at": "updated_at"}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor can't be decoded."""
+
+
+def encode_cursor(row, sort: str) -> str:
+    """Opaque cursor pointing just past `row` in the given sort order."""
+    key = [row[sort].isoformat() if sort == "updated_at" else row[sort], row["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        value, config_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if sort == "updated_at":
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, int):
+            raise ValueError("id cursor must hold an integer")
+        if not isinstance(config_id, int):
+            raise ValueError("cursor id must be an integer")
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor for sort {sort!r}") from e
+    return value, config_id
+
+def build_list_query(limit: int, sort: str = "id", descending: bool = False, after=None,
+                     city: Optional[str] = None, is_active: Optional[bool] = None,
+                     email: Optional[str] = None, hobbies: Sequence[str] = ()):
+    """
+    SQL and parameters for one page of configs.
+
+    Pages are addressed by the (sort column, id) of the last row seen rather than an
+    OFFSET, so every page is an index range scan no matter how deep it is. One row
+    more than `limit` is fetched to tell whether another page follows.
+    """
+    column = LIST_SORT_COLUMNS[sort]
+    conditions, params = [], []
+    if city is not None:
+        conditions.append("city = %s")
+        params.append(city)
+    if is_active is not None:
+        conditions.append("is_active = %s")
+        params.append(is_active)
+    if email is not None:
+        conditions.append("email = %s")
+        params.append(email)
+    if hobbies:
+        # Containment (@>) is what the GIN index on hobbies serves
+        conditions.append("hobbies @> %s::text[]")
+        params.append(list(hobbies))
+    if after is not None:
+        value, config_id = after
+        op = "<" if descending else ">"
+        if column == "id":
+            conditions.append(f"id {op} %s")
+            params.append(config_id)
+        else:
+            conditions.append(f"({column}, id) {op} (%s, %s)")
+            params += [value, config_id]
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    direction = "DESC" if descending else "ASC"
+    order = f"id {direction}" if column == "id" else f"{column} {direction}, id {direction}"
+    sql = f"""
+        SELECT {CONFIG_COLUMNS}, updated_at
+        FROM configs
+        {where}
+        ORDER BY {order}
+        LIMIT %s;
+    """
+    return sql, (*params, limit + 1)
+
+# Runs a single statement on a pooled connection and returns one row (or None)
+def _fetch_one(sql, params=(), real_dict=True):
+    with pooled_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable("Database connection failed")
+        cursor_factory = extras.RealDictCursor if real_dict else None
+        with conn.cursor(cursor_factory=cursor_factory) as cur:
+            cur.execute(sql, params)
+            return cur.fetchone() if cur.description else None
+
+# Runs a single statement on a pooled connection and returns every row
+def _fetch_all(sql, params=()):
+    with pooled_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable("Database connection failed")
+        with conn.cursor(cursor_factory=extras.RealDictCursor) as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+def _create_tables():
+    _fetch_one(CREATE_TABLE_SQL, real_dict=False)
+    _fetch_one(CREATE_SCHEMA_TABLES_SQL, real_dict=False)
+    _fetch_one(CREATE_DOCUMENT_TABLE_SQL, real_dict=False)
+    _create_indexes()
+
+def _create_indexes():
+    names = [INDEX_NAME.search(statement).group(1) for statement in CREATE_INDEX_SQL]
+    with pooled_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable("Database connection failed")
+        with conn.cursor() as cur:
+            while True:
+                # Autocommit, so nothing stays open on this connection between attempts
+                cur.execute("SELECT pg_try_advisory_lock(%s);", (INDEX_DDL_LOCK,))
+                if cur.fetchone()[0]:
+                    break
+                time.sleep(INDEX_LOCK_POLL_INTERVAL)
+            try:
+                cur.execute(INVALID_INDEXES_SQL, (names,))
+                for (name,) in cur.fetchall():
+                    print(f"Startup: rebuilding invalid index {name}")
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+                for name in RETIRED_INDEXES:
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+                for statement in CREATE_INDEX_SQL:
+                    cur.execute(statement)
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(%s);", (INDEX_DDL_LOCK,))
+
+def _ping():
+    return _fetch_one("SELECT 1;", real_dict=False) is not None
+
+def _insert_config(values):
+    return _fetch_one(f"""
+        INSERT INTO configs (name, age, email, is_active, hobbies, street, city, zip_code)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING {CONFIG_COLUMNS};
+    """, values)
+
+def _select_config(config_id):
+    return _fetch_one(f"""
+        SELECT {CONFIG_COLUMNS}
+        FROM configs
+        WHERE id = %s;
+    """, (config_id,))
+
+def _update_config(config_id, values):
+    return _fetch_one(f"""
+        UPDATE configs
+        SET
+            name = %s,
+            age = %s,
+            email = %s,
+            is_active = %s,
+            hobbies = %s,
+            street = %s,
+            city = %s,
+            zip_code = %s,
+            updated_at = NOW()
+        WHERE id = %s
+        RETURNING {CONFIG_COLUMNS};
+    """, (*values, config_id))
+
+def _list_configs(limit, sort, descending, after, filters):
+    rows = _fetch_all(*build_list_query(limit, sort, descending, after, **filters))
+    return rows[:limit], len(rows) > limit
+
+def _delete_config(config_id):
+    return _fetch_one("DELETE FROM configs WHERE id = %s RETURNING id;", (config_id,), real_dict=False)
+
+
+def _insert_rows(cur, rows, page_size):
+    # execute_values folds the rows into multi-row INSERT statements of page_size rows each
+    returned = extras.execute_values(cur, """
+        INSERT INTO configs (name, age, email, is_active, hobbies, street, city, zip_code)
+        VALUES %s
+        RETURNING id;
+    """, rows, page_size=page_size, fetch=True)
+    return [row[0] for row in returned]
+
+def _bulk_insert_configs(records, chunk_size, partial):
+    """
+    Insert (record number, values) pairs in chunks, all inside one transaction.
+
+    Without `partial` any failure rolls back everything. With `partial` each chunk runs
+    under a savepoint; a failing chunk is retried row by row so only the bad rows are
+    skipped. Returns (inserted ids, [(record number, error)]).
+    """
+    inserted, failed = [], []
+    with pooled_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable("Database connection failed")
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                for start in range(0, len(records), chunk_size):
+                    chunk = records[start:start + chunk_size]
+                    values = [row for _, row in chunk]
+                    if not partial:
+                        inserted += _insert_rows(cur, values, chunk_size)
+                        continue
+                    cur.execute("SAVEPOINT bulk_chunk;")
+                    try:
+                        inserted += _insert_rows(cur, values, chunk_size)
+                        cur.execute("RELEASE SAVEPOINT bulk_chunk;")
+                        continue
+                    except (psycopg2.DataError, psycopg2.IntegrityError):
+                        cur.execute("ROLLBACK TO SAVEPOINT bulk_chunk;")
+                    for number, row in chunk:
+                        cur.execute("SAVEPOINT bulk_row;")
+                        try:
+                            inserted += _insert_rows(cur, [row], 1)
+                            cur.execute("RELEASE SAVEPOINT bulk_row;")
+                        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+                            cur.execute("ROLLBACK TO SAVEPOINT bulk_row;")
+                            failed.append((number, str(e).strip()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return inserted, failed
+
+
+SCHEMA_COLUMNS = "name, version, body, schema_hash, created_at"
+
+def _schema_generation():
+    return _fetch_one("SELECT generation FROM schema_registry_state;", real_dict=False)[0]
+
+def _select_schema(name, version=None):
+    if version is None:
+        return _fetch_one(f"""
+            SELECT {SCHEMA_COLUMNS} FROM schemas
+            WHERE name = %s ORDER BY version DESC LIMIT 1;
+        """, (name,))
+    return _fetch_one(f"SELECT {SCHEMA_COLUMNS} FROM schemas WHERE name = %s AND version = %s;", (name, version))
+
+def _list_schemas():
+    return _fetch_all("""
+        SELECT DISTINCT ON (name) name, version AS latest_version, schema_hash, created_at
+        FROM schemas ORDER BY name, version DESC;
+    """)
+
+def _list_schema_versions(name):
+    return _fetch_all("""
+        SELECT name, version, schema_hash, created_at
+        FROM schemas WHERE name = %s ORDER BY version;
+    """, (name,))
+
+def _in_registry_transaction(work):
+    # Locking the generation row serialises registry writes, so version numbers never collide
+    with pooled_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable("Database connection failed")
+        conn.autocommit = False
+        try:
+            with conn.cursor(cursor_factory=extras.RealDictCursor) as cur:
+                cur.execute("SELECT generation FROM schema_registry_state FOR UPDATE;")
+                result = work(cur)
+                if result:
+                    cur.execute("UPDATE schema_registry_state SET generation = generation + 1;")
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+
+def _insert_schema(name, body, body_hash):
+    def work(cur):
+        cur.execute(f"""
+            WITH counter AS (
+                INSERT INTO schema_version_counters (name, last_version) VALUES (%s, 1)
+                ON CONFLICT (name) DO UPDATE SET last_version = schema_version_counters.last_version + 1
+                RETURNING last_version
+            )
+            INSERT INTO schemas (name, version, body, schema_hash)
+            SELECT %s, last_version, %s, %s FROM counter
+            RETURNING {SCHEMA_COLUMNS};
+        """, (name, name, extras.Json(body), body_hash))
+        return cur.fetchone()
+    return _in_registry_transaction(work)
+
+def _delete_schema(name, version=None):
+    def work(cur):
+        if version is None:
+            cur.execute("DELETE FROM schemas WHERE name = %s RETURNING version;", (name,))
         else:
-            print("Warning: Could not establish database connection during startup - continuing anyway")
+            cur.execute("DELETE FROM schemas WHERE name = %s AND version = %s RETURNING version;", (name, version))
+        return [row["version"] for row in cur.fetchall()]
+    return _in_registry_transaction(work)
+
+
+DOCUMENT_COLUMNS = "id, content_hash, schema_name, schema_version, schema_hash, body, created_at"
+
+def build_document_query(limit: int, after: Optional[int] = None, schema_name: Optional[str] = None,
+                         schema_version: Optional[int] = None, contains: Sequence[Sequence[dict]] = (),
+                         fields: Sequence[Sequence[str]] = ()):
+    """
+    SQL and parameters for one page of stored documents, in id order.
+
+    `contains` holds one list of JSON fragments per filter, of which the body must contain
+    at least one; `fields`, when given, are the paths projected into a flat {"a.b": value}
+    object instead of returning whole bodies.
+    """
+    conditions, params = [], []
+    if fields:
+        projection = ", ".join("%s, body #> %s" for _ in fields)
+        columns = f"id, content_hash, schema_name, schema_version, jsonb_build_object({projection}) AS fields"
+        for path in fields:
+            params += [".".join(path), list(path)]
+    else:
+        columns = DOCUMENT_COLUMNS
+    if schema_name is None:
+        conditions.append("schema_name IS NULL")
+    else:
+        conditions.append("schema_name = %s")
+        params.append(schema_name)
+    if schema_version is not None:
+        conditions.append("schema_version = %s")
+        params.append(schema_version)
+    for fragments in contains:
+        conditions.append("(" + " OR ".join("body @> %s" for _ in fragments) + ")")
+        params += [extras.Json(fragment) for fragment in fragments]
+    if after is not None:
+        conditions.append("id > %s")
+        params.append(after)
+    sql = f"""
+        SELECT {columns}
+        FROM documents
+        WHERE {' AND '.join(conditions)}
+        ORDER BY id
+        LIMIT %s;
+    """
+    return sql, (*params, limit + 1)
+
+def _find_document(content_hash, schema_name, schema_version, schema_hash):
+    return _fetch_one(f"""
+        SELECT {DOCUMENT_COLUMNS} FROM documents
+        WHERE content_hash = %s AND schema_hash = %s
+          AND COALESCE(schema_name, '') = COALESCE(%s, '') AND COALESCE(schema_version, 0) = COALESCE(%s, 0);
+    """, (content_hash, schema_hash, schema_name, schema_version))
+
+# YAML dates and timestamps have no JSON type; they are stored as ISO strings
+def _dump_document(body):
+    return json.dumps(body, default=str)
+
+def _store_document(content_hash, schema_name, schema_version, schema_hash, body):
+    # A concurrent writer of the same document wins the insert; the loser reads its row
+    row = _fetch_one(f"""
+        INSERT INTO documents (content_hash, schema_name, schema_version, schema_hash, body)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (content_hash, schema_hash, (COALESCE(schema_name, '')), (COALESCE(schema_version, 0)))
+        DO NOTHING
+        RETURNING {DOCUMENT_COLUMNS};
+    """, (content_hash, schema_name, schema_version, schema_hash, extras.Json(body, dumps=_dump_document)))
+    if row is not None:
+        return row, True
+    return _find_document(content_hash, schema_name, schema_version, schema_hash), False
+
+def _select_document(document_id):
+    return _fetch_one(f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id = %s;", (document_id,))
+
+def _list_documents(limit, after, schema_name, schema_version, contains, fields):
+    rows = _fetch_all(*build_document_query(limit, after, schema_name, schema_version, contains, fields))
+    return rows[:limit], len(rows) > limit
+
+
+EXPORT_COLUMNS = ("id", "name", "age", "email", "is_active", "hobbies", "street", "city", "zip_code",
+                  "created_at", "updated_at")
+
+def _open_export(itersize):
+    conn = get_pool().getconn()
+    if not conn:
+        raise DatabaseUnavailable("Database connection failed")
+    try:
+        # Named cursors only live inside a transaction; putconn rolls it back and restores autocommit
+        conn.autocommit = False
+        cur = conn.cursor(name="configs_export")
+        cur.itersize = itersize
+        cur.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM configs ORDER BY id;")
+    except Exception as e:
+        get_pool().putconn(conn, discard=isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)))
+        raise
+    return conn, cur
+
+
+class ConfigExport:
+    """
+    Streams the whole configs table through a server-side (named) cursor.
+
+    Rows arrive in batches of `itersize`, each fetched on the database executor, so
+    memory stays bounded by one batch however large the table is. The connection is
+    held for the duration of the export and handed back when iteration ends.
+    """
+
+    columns = EXPORT_COLUMNS
+
+    def __init__(self, itersize: int):
+        self.itersize = itersize
+        self._conn = None
+        self._cursor = None
+
+    async def open(self):
+        self._conn, self._cursor = await run_db(_open_export, self.itersize)
+        return self
+
+    async def batches(self):
+        try:
+            while True:
+                rows = await run_db(self._cursor.fetchmany, self.itersize)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            self.close()
+
+    def close(self):
+        # Not awaited: this also runs when a client disconnects mid-stream and the task is cancelled
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            get_executor().spawn(get_pool().putconn, conn)
+
+
+# Async data access API for the configs table.
+# `values` is the (name, age, email, is_active, hobbies, street, city, zip_code) tuple.
+async def create_tables():
+    await run_db(_create_tables)
+
+async def ping() -> bool:
+    return await run_db(_ping)
+
+async def insert_config(values):
+    return await run_db(_insert_config, values)
+
+async def get_config(config_id: int):
+    return await run_db(_select_config, config_id)
+
+async def update_config(config_id: int, values):
+    return await run_db(_update_config, config_id, values)
+
+async def list_configs(limit: int, sort: str = "id", descending: bool = False, after=None, **filters):
+    """One page of configs plus whether more follow; `after` is a decoded cursor."""
+    return await run_db(_list_configs, limit, sort, descending, after, filters)
+
+async def delete_config(config_id: int) -> bool:
+    return await run_db(_delete_config, config_id) is not None
+
+async def schema_generation() -> int:
+    return await run_db(_schema_generation)
+
+async def get_schema(name: str, version: Optional[int] = None):
+    """The given version of a stored schema, or its latest one."""
+    return await run_db(_select_schema, name, version)
+
+async def list_schemas():
+    return await run_db(_list_schemas)
+
+async def list_schema_versions(name: str):
+    return await run_db(_list_schema_versions, name)
+
+async def insert_schema(name: str, body, body_hash: str):
+    """Store `body` as the next version of `name`."""
+    return await run_db(_insert_schema, name, body, body_hash)
+
+async def delete_schema(name: str, version: Optional[int] = None):
+    """Delete one version (or all of them); returns the deleted version numbers."""
+    return await run_db(_delete_schema, name, version)
+
+async def find_document(content_hash: str, schema_name: Optional[str], schema_version: Optional[int],
+                        schema_hash: str):
+    """The stored document with this source hash that passed this schema, if any."""
+    return await run_db(_find_document, content_hash, schema_name, schema_version, schema_hash)
+
+async def store_document(content_hash: str, schema_name: Optional[str], schema_version: Optional[int],
+                         schema_hash: str, body):
+    """Insert a validated document unless it is already stored; returns (row, created)."""
+    return await run_db(_store_document, content_hash, schema_name, schema_version, schema_hash, body)
+
+async def get_document(document_id: int):
+    return await run_db(_select_document, document_id)
+
+async def list_documents(limit: int, after: Optional[int] = None, schema_name: Optional[str] = None,
+                         schema_version: Optional[int] = None, contains: Sequence[Sequence[dict]] = (),
+                         fields: Sequence[Sequence[str]] = ()):
+    return await run_db(_list_documents, limit, after, schema_name, schema_version, contains, fields)
+
+async def export_configs(itersize: int) -> ConfigExport:
+    return await ConfigExport(itersize).open()
+
+async def bulk_insert_configs(records, chunk_size: int, partial: bool = False):
+    return await run_db(_bulk_insert_configs, records, chunk_size, partial)
+
+# Creates the tables (unless they are managed out of band) and fills the pool.
+# Runs on the database executor so startup never blocks the event loop.
+async def bootstrap(ddl: bool = True):
+    try:
+        if ddl:
+            await create_tables()
+            print("Startup: Table created or already exists.")
+        await run_db(get_pool().open)  # Fill the pool up to its minimum size
+    except DatabaseUnavailable:
+        print("Warning: Could not establish database connection during startup - continuing anyway")
     except Exception as e:
         print(f"Database initialization failed: {e} - continuing without database")
-    
+
+def shutdown():
+    close_executor()
+    close_pool()
+
+# FastAPI Lifespan to handle startup/shutdown events
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Starting FastAPI application...")
+    await bootstrap()
     print("FastAPI application started successfully!")
     yield  # Yield control to application
     
-    print("Shutdown: FastAPI application closing")
\ No newline at end of file
+    print("Shutdown: FastAPI application closing")
+    shutdown()
@@ -0,0 +1,228 @@
+import hashlib
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Sequence
+
+# Fields tried, in order, to pair up list items that are mappings (e.g. services by name)
+DEFAULT_LIST_KEYS = ("id", "name", "key")
+
+# Hash layers a chain of forks may stack before it is flattened into one
+MAX_FORK_LAYERS = 8
+
+
+def _pointer_token(part) -> str:
+    return str(part).replace("~", "~0").replace("/", "~1")
+
+
+class TreeHasher:
+    """
+    Hashes every subtree of a parsed YAML document once.
+
+    In unordered mode a list hashes as the multiset of its items, so reordered
+    lists are recognised as identical without comparing item by item. Hashes are
+    also looked up in `bases`, hashers of trees that outlive this one (e.g. the
+    parsed documents behind handles), without copying them.
+    """
+
+    def __init__(self, ordered: bool, bases: Sequence["TreeHasher"] = ()):
+        self.ordered = ordered
+        self._hashes: Dict[int, bytes] = {}
+        self._keep = []  # Holds nodes so their ids stay unique while cached
+        self._bases = [base._hashes for base in bases]
+        self._parent: Optional["TreeHasher"] = None  # Keeps the nodes behind inherited layers alive
+
+    def __call__(self, node) -> bytes:
+        node_id = id(node)
+        cached = self._lookup(node_id)
+        if cached is not None:
+            return cached
+        digest = hashlib.blake2b(digest_size=16)
+        if isinstance(node, dict):
+            digest.update(b"d")
+            for key in sorted(node, key=repr):
+                digest.update(repr(key).encode("utf-8"))
+                digest.update(self(node[key]))
+        elif isinstance(node, list):
+            digest.update(b"l")
+            children = [self(item) for item in node]
+            for child in (children if self.ordered else sorted(children)):
+                digest.update(child)
+        else:
+            # The type name keeps 1, 1.0, True and "1" apart
+            digest.update(type(node).__name__.encode("utf-8"))
+            digest.update(repr(node).encode("utf-8"))
+        result = digest.digest()
+        self._hashes[node_id] = result
+        self._keep.append(node)
+        return result
+
+    def _lookup(self, node_id: int) -> Optional[bytes]:
+        cached = self._hashes.get(node_id)
+        if cached is not None:
+            return cached
+        for hashes in self._bases:
+            cached = hashes.get(node_id)
+            if cached is not None:
+                return cached
+        return None
+
+    def fork(self, tree) -> "TreeHasher":
+        """
+        A hasher that starts with every hash of `tree`, the document this hasher was used
+        on. Only valid for trees that share unmodified nodes with it (e.g. a patched copy
+        built by path copying).
+
+        This hasher's cache becomes a read-only layer of the fork, so forking costs nothing
+        per node. Once a chain of forks stacks MAX_FORK_LAYERS layers, the fork starts from
+        a single layer holding only the hashes of `tree`, which keeps lookups short and
+        lets hashes of nodes edited away long ago be freed.
+        """
+        forked = TreeHasher(self.ordered)
+        if len(self._bases) + 1 < MAX_FORK_LAYERS:
+            forked._bases = [self._hashes, *self._bases]
+            forked._parent = self
+            return forked
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            node_id = id(node)
+            if node_id in forked._hashes:
+                continue
+            cached = self._lookup(node_id)
+            forked._hashes[node_id] = cached if cached is not None else self(node)
+            forked._keep.append(node)
+            if isinstance(node, dict):
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+        return forked
+
+
+class StructuralDiff:
+    """
+    Diffs two parsed YAML trees into JSON-Patch-style operations.
+
+    Identical subtrees are skipped by hash before being walked. Lists of mappings
+    that share a unique identifying field (see DEFAULT_LIST_KEYS) are matched by
+    that field; other lists are matched by item hash. Operation paths point into
+    the first document for "remove" and into the second for "add", "replace" and
+    "move", so the result describes the change rather than being a strictly
+    sequential RFC 6902 patch.
+    """
+
+    def __init__(self, ordered: bool = False, list_keys: Sequence[str] = DEFAULT_LIST_KEYS,
+                 hasher: Optional[TreeHasher] = None):
+        self.ordered = ordered
+        self.list_keys = tuple(list_keys)
+        self.hash = hasher or TreeHasher(ordered)
+        self.ops: List[Dict[str, Any]] = []
+
+    def run(self, old, new) -> List[Dict[str, Any]]:
+        self._diff(old, new, "")
+        return self.ops
+
+    def _diff(self, old, new, path: str):
+        if self.hash(old) == self.hash(new):
+            return
+        if isinstance(old, dict) and isinstance(new, dict):
+            self._diff_dicts(old, new, path)
+        elif isinstance(old, list) and isinstance(new, list):
+            self._diff_lists(old, new, path)
+        else:
+            self.ops.append({"op": "replace", "path": path, "value": new, "old": old})
+
+    def _diff_dicts(self, old: dict, new: dict, path: str):
+        for key in old:
+            if key not in new:
+                self.ops.append({"op": "remove", "path": f"{path}/{_pointer_token(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_pointer_token(key)}"
+            if key not in old:
+                self.ops.append({"op": "add", "path": child, "value": value})
+            else:
+                self._diff(old[key], value, child)
+
+    def _list_key(self, old: list, new: list) -> Optional[str]:
+        """The first identifying field that is present and unique in every item of both lists."""
+        items = old + new
+        if not items or not all(isinstance(item, dict) for item in items):
+            return None
+        for field in self.list_keys:
+            for side in (old, new):
+                values = [item.get(field) for item in side]
+                if None in values or len(set(map(repr, values))) != len(values):
+                    break
+            else:
+                return field
+        return None
+
+    def _diff_lists(self, old: list, new: list, path: str):
+        field = self._list_key(old, new)
+        if field is not None:
+            self._diff_keyed(old, new, path, field)
+        elif self.ordered:
+            self._diff_sequences(old, new, path)
+        else:
+            self._diff_multisets(old, new, path)
+
+    def _diff_keyed(self, old: list, new: list, path: str, field: str):
+        old_index = {repr(item[field]): index for index, item in enumerate(old)}
+        new_keys = {repr(item[field]) for item in new}
+        for index, item in enumerate(old):
+            if repr(item[field]) not in new_keys:
+                self.ops.append({"op": "remove", "path": f"{path}/{index}"})
+        for index, item in enumerate(new):
+            match = old_index.get(repr(item[field]))
+            if match is None:
+                self.ops.append({"op": "add", "path": f"{path}/{index}", "value": item})
+                continue
+            if self.ordered and match != index:
+                self.ops.append({"op": "move", "from": f"{path}/{match}", "path": f"{path}/{index}"})
+            self._diff(old[match], item, f"{path}/{index}")
+
+    def _diff_sequences(self, old: list, new: list, path: str):
+        matcher = SequenceMatcher(None, [self.hash(item) for item in old],
+                                  [self.hash(item) for item in new], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+            for offset in range(paired):
+                self._diff(old[i1 + offset], new[j1 + offset], f"{path}/{j1 + offset}")
+            for index in range(i1 + paired, i2):
+                self.ops.append({"op": "remove", "path": f"{path}/{index}"})
+            for index in range(j1 + paired, j2):
+                self.ops.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+
+    def _diff_multisets(self, old: list, new: list, path: str):
+        # Items with an identical twin on the other side (anywhere in the list) are unchanged
+        available = defaultdict(list)
+        for index, item in enumerate(old):
+            available[self.hash(item)].append(index)
+        added = []
+        for index, item in enumerate(new):
+            candidates = available.get(self.hash(item))
+            if candidates:
+                candidates.pop()
+            else:
+                added.append(index)
+        removed = sorted(index for indexes in available.values() for index in indexes)
+
+        # Leftover containers are paired up in order and diffed, so a small edit inside one
+        # list item is reported as that edit rather than as a remove plus an add
+        paired = 0
+        for old_index, new_index in zip(removed, added):
+            if not isinstance(old[old_index], (dict, list)) or type(old[old_index]) is not type(new[new_index]):
+                break
+            self._diff(old[old_index], new[new_index], f"{path}/{new_index}")
+            paired += 1
+        for index in removed[paired:]:
+            self.ops.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in added[paired:]:
+            self.ops.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+
+
+def diff_trees(old, new, ordered: bool = False, list_keys: Sequence[str] = DEFAULT_LIST_KEYS,
+               hasher: Optional[TreeHasher] = None) -> List[Dict[str, Any]]:
+    """JSON-Patch-style differences between two parsed YAML documents (empty when identical)."""
+    return StructuralDiff(ordered, list_keys, hasher).run(old, new)
@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Tuple
+
+# Separates the segments of a field path in filters and projections, e.g. address.city
+PATH_SEPARATOR = "."
+
+# JSON types a filter value can be converted to
+FILTERABLE_TYPES = ("string", "integer", "number", "boolean", "array")
+
+
+class InvalidFilter(ValueError):
+    """Raised for a filter or projection that doesn't name a field of the schema."""
+
+
+def _types(schema: Dict[str, Any]) -> Tuple[str, ...]:
+    """The JSON types a value may have besides null, from `type` or the branches of `anyOf`."""
+    kind = schema.get("type")
+    if kind is None and "anyOf" in schema:
+        # e.g. zip_code: anyOf string/integer
+        kinds = [branch.get("type") for branch in schema["anyOf"] if isinstance(branch, dict)]
+    else:
+        kinds = kind if isinstance(kind, list) else [kind]
+    return tuple(dict.fromkeys(k for k in kinds if isinstance(k, str) and k != "null"))
+
+
+def schema_fields(schema: Dict[str, Any]) -> Dict[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Every path the schema declares through nested `properties`, mapped to the JSON types
+    a filter value is tried as. Objects are descended into; arrays are filterable by
+    element ("contains").
+    """
+    fields: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def walk(node, prefix: Tuple[str, ...]):
+        for name, sub in (node.get("properties") or {}).items():
+            if not isinstance(sub, dict):
+                continue
+            path = (*prefix, name)
+            kinds = _types(sub)
+            if kinds == ("object",):
+                walk(sub, path)
+                continue
+            kinds = tuple(kind for kind in kinds if kind in FILTERABLE_TYPES)
+            if kinds:
+                fields[path] = kinds
+
+    if isinstance(schema, dict):
+        walk(schema, ())
+    return fields
+
+
+def parse_path(name: str, fields: Dict[Tuple[str, ...], Tuple[str, ...]]) -> Tuple[str, ...]:
+    path = tuple(name.split(PATH_SEPARATOR))
+    if path not in fields:
+        known = ", ".join(sorted(PATH_SEPARATOR.join(field) for field in fields))
+        raise InvalidFilter(f"Unknown field {name!r}; expected one of: {known}")
+    return path
+
+
+def _coerce(raw: str, kind: str, name: str):
+    try:
+        if kind == "integer":
+            return int(raw)
+        if kind == "number":
+            return float(raw) if "." in raw or "e" in raw.lower() else int(raw)
+    except ValueError:
+        raise InvalidFilter(f"{name} expects a {kind}, got {raw!r}")
+    if kind == "boolean":
+        if raw.lower() not in ("true", "false"):
+            raise InvalidFilter(f"{name} expects true or false, got {raw!r}")
+        return raw.lower() == "true"
+    return raw
+
+
+def containment(expression: str, fields: Dict[Tuple[str, ...], Tuple[str, ...]]) -> List[Dict[str, Any]]:
+    """
+    Turns a "path=value" filter into the JSON fragments a matching body contains one of,
+    with the value typed per the schema: "address.city=Paris" -> [{"address": {"city": "Paris"}}].
+    For array fields the value is one element: "hobbies=chess" -> [{"hobbies": ["chess"]}].
+    A field that allows several types gets a fragment for each type the value converts
+    to: "zip_code=75001" -> [{"zip_code": "75001"}, {"zip_code": 75001}].
+    """
+    name, separator, raw = expression.partition("=")
+    if not separator:
+        raise InvalidFilter(f"Filter {expression!r} must look like field=value")
+    path = parse_path(name, fields)
+    fragments, error = [], None
+    for kind in fields[path]:
+        try:
+            value: Any = [raw] if kind == "array" else _coerce(raw, kind, name)
+        except InvalidFilter as e:
+            error = error or e
+            continue
+        for key in reversed(path):
+            value = {key: value}
+        if value not in fragments:
+            fragments.append(value)
+    if not fragments:
+        raise error
+    return fragments
+
+
+def projection(names: List[str], fields: Dict[Tuple[str, ...], Tuple[str, ...]]) -> List[Tuple[str, ...]]:
+    return [parse_path(name, fields) for name in names]
@@ -0,0 +1,159 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import Request
+
+# CPU-bound work execution settings
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "inline")  # inline | thread | process
+EXECUTION_WORKERS = int(os.getenv("EXECUTION_WORKERS", str(os.cpu_count() or 1)))
+EXECUTION_INLINE_THRESHOLD = int(os.getenv("EXECUTION_INLINE_THRESHOLD", "65536"))  # Payloads under this many bytes run inline
+EXECUTION_TIMEOUT = float(os.getenv("EXECUTION_TIMEOUT", "30"))  # Seconds before a task is abandoned
+EXECUTION_START_METHOD = os.getenv("EXECUTION_START_METHOD", "spawn")  # multiprocessing start method for workers
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+# How often a running task checks whether its client is still connected
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class ExecutionError(Exception):
+    """Base class for tasks that did not run to completion."""
+    status_code = 500
+
+
+class ExecutionTimeout(ExecutionError):
+    """Raised when a task runs past its time limit."""
+    status_code = 504
+
+
+class ClientDisconnected(ExecutionError):
+    """Raised when the client went away before its task finished."""
+    status_code = 499
+
+
+class CPUExecutor:
+    """
+    Runs CPU-heavy functions off the event loop, in a thread or process pool.
+
+    Small payloads (below `inline_threshold` bytes) run inline because shipping them to a
+    worker costs more than the work itself. A process task that times out or loses its
+    client can't be interrupted, so the whole process pool is recycled; tasks of other
+    requests that die with it are retried once on the fresh pool.
+    """
+
+    def __init__(self, mode=EXECUTION_MODE, workers=EXECUTION_WORKERS,
+                 inline_threshold=EXECUTION_INLINE_THRESHOLD, timeout=EXECUTION_TIMEOUT,
+                 start_method=EXECUTION_START_METHOD):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode {mode!r}, expected one of {EXECUTION_MODES}")
+        self.mode = mode
+        self.workers = workers
+        self.inline_threshold = inline_threshold
+        self.timeout = timeout
+        self.start_method = start_method
+        self._pool = None
+        self._lock = threading.Lock()
+        self._recycled = 0
+        self._timeouts = 0
+        self._cancelled = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    context = multiprocessing.get_context(self.start_method)
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cpu")
+            return self._pool
+
+    def _recycle(self, pool):
+        """Throw away a process pool whose workers may be stuck on an abandoned task."""
+        with self._lock:
+            if self._pool is not pool:
+                return  # Another task already replaced it
+            self._pool = None
+            self._recycled += 1
+        # Processes can't be cancelled from outside, so stop them before shutting down
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def runs_inline(self, size: int) -> bool:
+        return self.mode == "inline" or size < self.inline_threshold
+
+    def needs_pickling(self, size: int) -> bool:
+        """Whether arguments for a payload of this size are sent to another process."""
+        return self.mode == "process" and not self.runs_inline(size)
+
+    async def run(self, func, *args, size: int = 0, request: Optional[Request] = None,
+                  timeout: Optional[float] = None):
+        """Run func(*args), inline or on the pool depending on mode and payload size."""
+        if self.runs_inline(size):
+            return func(*args)
+        try:
+            return await self._submit(func, args, request, timeout)
+        except BrokenProcessPool:
+            # Lost to a recycle triggered by some other request's task; try once more
+            return await self._submit(func, args, request, timeout)
+
+    async def _submit(self, func, args, request, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        pool = self._get_pool()
+        task = asyncio.wrap_future(pool.submit(func, *args))
+        watcher = asyncio.ensure_future(_wait_for_disconnect(request)) if request is not None else None
+        waiting = {task} if watcher is None else {task, watcher}
+        try:
+            done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+        if task in done:
+            return task.result()
+
+        task.cancel()
+        if watcher is not None and watcher in done:
+            self._cancelled += 1
+            error = ClientDisconnected("Client disconnected before processing finished")
+        else:
+            self._timeouts += 1
+            error = ExecutionTimeout(f"Processing took longer than {timeout}s")
+        if self.mode == "process":
+            self._recycle(pool)
+        raise error
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "inline_threshold": self.inline_threshold,
+            "timeouts": self._timeouts,
+            "cancelled": self._cancelled,
+            "pool_recycles": self._recycled,
+        }
+
+
+async def _wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+# Process-wide executor for parsing, validation and comparison work
+cpu_executor = CPUExecutor()
+
+
+async def run_cpu(func, *args, size: int = 0, request: Optional[Request] = None):
+    """Run a CPU-bound function according to the configured execution mode."""
+    return await cpu_executor.run(func, *args, size=size, request=request)
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Sequence
+
+from backend.yaml_loader import dump_all_yaml
+
+# Export settings
+EXPORT_ITERSIZE = int(os.getenv("EXPORT_ITERSIZE", "2000"))  # Rows fetched per round trip to the server-side cursor
+
+EXPORT_FORMATS = ("ndjson", "csv", "yaml")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "yaml": "application/x-yaml",
+}
+
+
+def _scalar(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _as_document(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a row like the YAML files /validate accepts (address nested, missing values left out)."""
+    document = {"id": record["id"], "name": record["name"], "age": record["age"], "email": record["email"]}
+    if record["is_active"] is not None:
+        document["is_active"] = record["is_active"]
+    if record["hobbies"]:
+        document["hobbies"] = list(record["hobbies"])
+    address = {key: record[key] for key in ("street", "city", "zip_code") if record[key] is not None}
+    if address:
+        document["address"] = address
+    document["created_at"] = _scalar(record["created_at"])
+    document["updated_at"] = _scalar(record["updated_at"])
+    return document
+
+
+def header(columns: Sequence[str], fmt: str) -> bytes:
+    """Bytes sent before the first batch (the CSV header row)."""
+    if fmt != "csv":
+        return b""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_batch(rows: Iterable[Sequence[Any]], columns: Sequence[str], fmt: str) -> bytes:
+    """
+    Serialise one batch of rows (tuples in `columns` order).
+
+    NDJSON keeps hobbies as an array; CSV joins them with commas, the form /configs/bulk
+    reads back. YAML output is a --- separated stream, one document per config.
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        hobbies = columns.index("hobbies")
+        for row in rows:
+            row = [_scalar(value) for value in row]
+            row[hobbies] = ",".join(row[hobbies] or [])
+            writer.writerow(row)
+        return buffer.getvalue().encode("utf-8")
+
+    records = [dict(zip(columns, row)) for row in rows]
+    if fmt == "yaml":
+        return dump_all_yaml(_as_document(record) for record in records).encode("utf-8")
+    return "".join(
+        json.dumps({key: _scalar(value) for key, value in record.items()}) + "\n" for record in records
+    ).encode("utf-8")
@@ -0,0 +1,195 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from backend.diff import TreeHasher
+
+# Document handle settings
+HANDLE_TTL = float(os.getenv("HANDLE_TTL", "300"))  # Seconds a handle stays usable after its last use
+HANDLE_MAX_DOCUMENTS = int(os.getenv("HANDLE_MAX_DOCUMENTS", "256"))  # Parsed documents kept per worker
+HANDLE_MAX_BYTES = int(os.getenv("HANDLE_MAX_BYTES", str(256 * 1024 * 1024)))  # Estimated memory budget per worker
+
+# Handle IDs as they appear in URLs and request bodies
+HANDLE_PATTERN = r"^[0-9a-f]{32}$"
+
+
+def estimate_size(tree: Any) -> int:
+    """
+    Approximate memory of a parsed tree: sys.getsizeof of every container, key and
+    scalar, counting objects shared through YAML aliases once. Parsed YAML takes many
+    times the size of its source, so budgets are charged with this rather than the source.
+    """
+    seen = set()
+    total = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        total += sys.getsizeof(node)
+        if isinstance(node, dict):
+            stack.extend(node.keys())
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return total
+
+
+def _hasher_size(hasher: TreeHasher) -> int:
+    # The cache dict, one id key and one digest per entry, and the keep-alive list
+    entries = len(hasher._hashes)
+    digest = next(iter(hasher._hashes.values()), b"")
+    return (sys.getsizeof(hasher._hashes) + sys.getsizeof(hasher._keep)
+            + entries * (sys.getsizeof(2 ** 40) + sys.getsizeof(digest)))
+
+
+class ParsedDocument:
+    """
+    A YAML document parsed once, plus whatever has been derived from it so far.
+
+    Validation results and subtree hashes are computed the first time they're asked
+    for and kept with the document, so follow-up requests on the same handle reuse them.
+    The tree is shared between requests and must not be modified.
+
+    `size` is the source length; `memory` the estimated footprint of the tree plus any
+    hashes built since, which is what the store budgets.
+    """
+
+    def __init__(self, content_hash: str, tree: Any, size: int, memory: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.content_hash = content_hash
+        self.tree = tree
+        self.size = size
+        self.memory = estimate_size(tree) if memory is None else memory
+        self._results: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self._charge: Callable[["ParsedDocument", int], None] = lambda document, nbytes: None
+
+    def result(self, key: Hashable, compute: Callable[[], Any], measure: Optional[Callable[[Any], int]] = None):
+        """
+        The memoised value of compute() for this key, e.g. a validation mode and schema.
+        With `measure`, the stored value's size is charged to the document's memory.
+        """
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+        value = compute()
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+            self._results[key] = value
+        if measure is not None:
+            self._charge(self, measure(value))
+        return value
+
+    def hashes(self, ordered: bool) -> TreeHasher:
+        """
+        Hashes of every subtree, computed in one pass the first time a diff needs them.
+        Read-only afterwards: diffs pass it as a base of their own TreeHasher.
+        """
+        def compute():
+            hasher = TreeHasher(ordered)
+            hasher(self.tree)
+            return hasher
+        return self.result(("hashes", ordered), compute, measure=_hasher_size)
+
+    def summary(self, ttl: float) -> Dict[str, Any]:
+        return {"handle": self.id, "content_hash": self.content_hash, "size": self.size, "expires_in": ttl}
+
+
+class DocumentHandles:
+    """
+    Parsed documents addressable by handle for a short TTL, bounded by count and by
+    their estimated memory, hashes built for diffs included (least recently used go
+    first). Uploading content that is already held returns the existing document
+    instead of parsing it again.
+
+    Handles live in the worker that created them; a request routed to another worker
+    gets a miss and should upload the content again.
+    """
+
+    def __init__(self, ttl: float = HANDLE_TTL, max_documents: int = HANDLE_MAX_DOCUMENTS,
+                 max_bytes: int = HANDLE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._documents: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (document, expires_at)
+        self._by_hash: Dict[str, str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _touch(self, document: ParsedDocument):
+        self._documents[document.id] = (document, time.monotonic() + self.ttl)
+        self._documents.move_to_end(document.id)
+
+    def _remove(self, handle: str):
+        document, _ = self._documents.pop(handle)
+        self._by_hash.pop(document.content_hash, None)
+        self._bytes -= document.memory
+
+    def _evict(self):
+        while len(self._documents) > 1 and (len(self._documents) > self.max_documents or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._documents)))
+
+    def _charge(self, document: ParsedDocument, nbytes: int):
+        """Account for memory a held document gained after it was added."""
+        with self._lock:
+            document.memory += nbytes
+            if self._documents.get(document.id, (None,))[0] is document:
+                self._bytes += nbytes
+                self._evict()
+
+    def _live(self, handle: str) -> Optional[ParsedDocument]:
+        entry = self._documents.get(handle)
+        if entry is None:
+            return None
+        document, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(handle)
+            return None
+        self._touch(document)
+        return document
+
+    def get(self, handle: str) -> Optional[ParsedDocument]:
+        with self._lock:
+            document = self._live(handle)
+            if document is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return document
+
+    def find(self, content_hash: str) -> Optional[ParsedDocument]:
+        """The held document with this content, if any."""
+        with self._lock:
+            handle = self._by_hash.get(content_hash)
+            return self._live(handle) if handle else None
+
+    def add(self, content_hash: str, tree: Any, size: int, memory: Optional[int] = None) -> ParsedDocument:
+        """Hold a parsed tree; `memory` is its estimate_size() when the caller already has it."""
+        document = ParsedDocument(content_hash, tree, size, memory)
+        document._charge = self._charge
+        with self._lock:
+            existing = self._by_hash.get(content_hash)
+            if existing and self._live(existing):
+                return self._documents[existing][0]
+            self._touch(document)
+            self._by_hash[content_hash] = document.id
+            self._bytes += document.memory
+            self._evict()
+            return document
+
+    def stats(self):
+        with self._lock:
+            return {"documents": len(self._documents), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+# Process-wide handle store used by the API
+handles = DocumentHandles()
@@ -0,0 +1,386 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from backend.diff import TreeHasher, _pointer_token
+from backend.validators import MAX_VALIDATION_ERRORS, collect_errors, registry as validator_registry, schema_hash
+
+# Incremental validation settings
+INCREMENTAL_MAX_DOCUMENTS = int(os.getenv("INCREMENTAL_MAX_DOCUMENTS", "64"))  # Parsed documents kept as patch bases
+INCREMENTAL_CACHE_SIZE = int(os.getenv("INCREMENTAL_CACHE_SIZE", "100000"))  # Memoised subtree results
+
+# Errors kept per subtree; one more than the response cap so truncation can be reported
+SUBTREE_ERROR_CAP = MAX_VALIDATION_ERRORS + 1
+
+
+class PatchError(ValueError):
+    """Raised when a JSON Patch can't be applied to the base document."""
+
+
+class ValidationCancelled(Exception):
+    """Raised inside a validation whose cancel event was set; partial results are discarded."""
+
+
+class _LRU:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SchemaPlan:
+    """
+    How to validate one node against one (sub)schema, split into independent parts.
+
+    An object schema with `properties` is checked "shallowly" (every property schema
+    replaced by `true`, so keywords such as required or additionalProperties behave
+    exactly as before) and each property value is checked on its own against its
+    subschema. Array `items` schemas split the same way. Anything else is validated
+    whole. Schemas using $ref are never split, since a subschema can't resolve
+    references on its own. Subschemas inherit the root's $schema, so every part is
+    checked under the same draft.
+    """
+
+    def __init__(self, schema, splittable: bool = True, dialect: Optional[str] = None):
+        self.schema = schema
+        self.key = schema_hash(schema) if isinstance(schema, dict) else json.dumps(schema)
+        self.validator = self._compile(schema, dialect) if isinstance(schema, dict) else None
+        self.properties: Dict[str, "SchemaPlan"] = {}
+        self.items: Optional[SchemaPlan] = None
+        self.shallow = None
+        if not splittable or not isinstance(schema, dict):
+            return
+        dialect = schema.get("$schema", dialect)
+        if isinstance(schema.get("properties"), dict):
+            self.properties = {key: SchemaPlan(sub, dialect=dialect) for key, sub in schema["properties"].items()}
+            self.shallow = self._compile({**schema, "properties": {key: True for key in schema["properties"]}}, dialect)
+        elif isinstance(schema.get("items"), dict) and "prefixItems" not in schema:
+            self.items = SchemaPlan(schema["items"], dialect=dialect)
+            self.shallow = self._compile({**schema, "items": True}, dialect)
+
+    @staticmethod
+    def _compile(schema: Dict[str, Any], dialect: Optional[str]):
+        if dialect and "$schema" not in schema:
+            schema = {"$schema": dialect, **schema}
+        return validator_registry.get(schema)
+
+
+def _uses_refs(schema) -> bool:
+    text = json.dumps(schema)
+    return '"$ref"' in text or '"$dynamicRef"' in text
+
+
+_plans = _LRU(64)
+
+
+def plan_for(schema: Dict[str, Any]) -> SchemaPlan:
+    key = schema_hash(schema)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = SchemaPlan(schema, splittable=not _uses_refs(schema))
+        _plans.set(key, plan)
+    return plan
+
+
+def _prefixed(errors, token: str, schema_prefix: str):
+    return [{**error, "path": f"/{token}{error['path']}", "schema_path": f"{schema_prefix}{error['schema_path']}"}
+            for error in errors]
+
+
+class IncrementalValidator:
+    """
+    Validates a parsed document, reusing memoised results for subtrees already seen.
+
+    Results are memoised per (subschema, subtree hash), so after an edit only the
+    subtrees on the path to the change are validated again. `validated` and `reused`
+    count the container subtrees checked and served from the memo. Setting `cancel`
+    stops the walk at the next container; subtrees finished so far stay memoised.
+    """
+
+    def __init__(self, memo: _LRU, hasher: TreeHasher, cancel: Optional[threading.Event] = None):
+        self.memo = memo
+        self.hash = hasher
+        self.cancel = cancel
+        self.validated = 0
+        self.reused = 0
+
+    def errors(self, plan: SchemaPlan, node) -> List[Dict[str, Any]]:
+        if plan.validator is None:
+            # Boolean schema: true accepts everything, false nothing
+            if plan.schema is False:
+                return [{"path": "", "keyword": "false", "value": None,
+                         "message": "False schema does not allow the value", "schema_path": ""}]
+            return []
+        if not isinstance(node, (dict, list)):
+            return collect_errors(plan.validator, node, SUBTREE_ERROR_CAP)
+
+        memo_key = (plan.key, self.hash(node))
+        cached = self.memo.get(memo_key)
+        if cached is not None:
+            self.reused += 1
+            return cached
+
+        if self.cancel is not None and self.cancel.is_set():
+            raise ValidationCancelled()
+        self.validated += 1
+        if plan.shallow is not None and plan.properties and isinstance(node, dict):
+            errors = collect_errors(plan.shallow, node, SUBTREE_ERROR_CAP)
+            for key, child in plan.properties.items():
+                if key in node and len(errors) < SUBTREE_ERROR_CAP:
+                    token = _pointer_token(key)
+                    errors += _prefixed(self.errors(child, node[key]), token, f"/properties/{token}")
+        elif plan.shallow is not None and plan.items is not None and isinstance(node, list):
+            errors = collect_errors(plan.shallow, node, SUBTREE_ERROR_CAP)
+            for index, item in enumerate(node):
+                if len(errors) >= SUBTREE_ERROR_CAP:
+                    break
+                errors += _prefixed(self.errors(plan.items, item), str(index), "/items")
+        else:
+            errors = collect_errors(plan.validator, node, SUBTREE_ERROR_CAP)
+        errors = errors[:SUBTREE_ERROR_CAP]
+        self.memo.set(memo_key, errors)
+        return errors
+
+
+def _tokens(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer {pointer!r}")
+    return [part.replace("~1", "/").replace("~0", "~") for part in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise PatchError(f"Invalid array index {token!r}")
+    index = int(token)
+    if index > len(container) - (0 if allow_end else 1):
+        raise PatchError(f"Array index {index} out of range")
+    return index
+
+
+def _json_equal(left, right) -> bool:
+    """Equality by JSON type, so true isn't 1 and false isn't 0 as they are in Python."""
+    if isinstance(left, bool) or isinstance(right, bool):
+        return type(left) is type(right) and left == right
+    if isinstance(left, dict):
+        return (isinstance(right, dict) and left.keys() == right.keys()
+                and all(_json_equal(value, right[key]) for key, value in left.items()))
+    if isinstance(left, list):
+        return (isinstance(right, list) and len(left) == len(right)
+                and all(map(_json_equal, left, right)))
+    return not isinstance(right, (dict, list)) and left == right
+
+
+class _PathCopier:
+    """Applies JSON Patch operations by copying only the containers on each edited path."""
+
+    def __init__(self, root):
+        self.root = root
+        self._owned = set()  # ids of containers created by this patch, safe to mutate
+        self._keep = []
+
+    def _own(self, node):
+        if id(node) in self._owned:
+            return node
+        copy = node.copy()
+        self._owned.add(id(copy))
+        self._keep.append(copy)
+        return copy
+
+    def _detached(self, node):
+        """
+        `node` with every container this patch owns copied, so a "copy" op never leaves two
+        paths sharing a container that later ops would edit in place. Owned containers only
+        sit on edited paths, so anything not owned has no owned descendants and stays shared.
+        """
+        if id(node) not in self._owned:
+            return node
+        if isinstance(node, dict):
+            return {key: self._detached(child) for key, child in node.items()}
+        return [self._detached(child) for child in node]
+
+    def _get(self, tokens):
+        node = self.root
+        for token in tokens:
+            if isinstance(node, dict):
+                if token not in node:
+                    raise PatchError(f"Path /{'/'.join(tokens)} does not exist")
+                node = node[token]
+            elif isinstance(node, list):
+                node = node[_index(node, token)]
+            else:
+                raise PatchError(f"Path /{'/'.join(tokens)} does not exist")
+        return node
+
+    def _writable_parent(self, tokens):
+        """The (copied) container holding the last token of `tokens`."""
+        if not isinstance(self.root, (dict, list)):
+            raise PatchError("Cannot edit inside a scalar document")
+        self.root = node = self._own(self.root)
+        for token in tokens[:-1]:
+            if isinstance(node, dict):
+                if token not in node:
+                    raise PatchError(f"Path /{'/'.join(tokens)} does not exist")
+                key = token
+            elif isinstance(node, list):
+                key = _index(node, token)
+            else:
+                raise PatchError(f"Path /{'/'.join(tokens)} does not exist")
+            child = node[key]
+            if not isinstance(child, (dict, list)):
+                raise PatchError(f"Path /{'/'.join(tokens)} does not exist")
+            node[key] = node = self._own(child)
+        return node
+
+    def add(self, tokens, value):
+        if not tokens:
+            self.root = value
+            return
+        parent = self._writable_parent(tokens)
+        if isinstance(parent, list):
+            parent.insert(_index(parent, tokens[-1], allow_end=True), value)
+        else:
+            parent[tokens[-1]] = value
+
+    def remove(self, tokens):
+        if not tokens:
+            raise PatchError("Cannot remove the document root")
+        parent = self._writable_parent(tokens)
+        if isinstance(parent, list):
+            return parent.pop(_index(parent, tokens[-1]))
+        if tokens[-1] not in parent:
+            raise PatchError(f"Path /{'/'.join(tokens)} does not exist")
+        return parent.pop(tokens[-1])
+
+    def replace(self, tokens, value):
+        if not tokens:
+            self.root = value
+            return
+        self._get(tokens)  # Must exist
+        parent = self._writable_parent(tokens)
+        key = _index(parent, tokens[-1]) if isinstance(parent, list) else tokens[-1]
+        parent[key] = value
+
+
+def apply_patch(document, operations: List[Dict[str, Any]]):
+    """
+    Apply RFC 6902 operations without modifying `document`.
+
+    Containers off the edited paths are shared with the original, which is what lets
+    a forked TreeHasher reuse their hashes.
+    """
+    tree = _PathCopier(document)
+    for number, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise PatchError(f"Operation {number} is not an object")
+        op, path = operation.get("op"), operation.get("path")
+        if not isinstance(path, str):
+            raise PatchError(f"Operation {number} has no path")
+        tokens = _tokens(path)
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"Operation {number} ({op}) has no value")
+        if op == "add":
+            tree.add(tokens, operation["value"])
+        elif op == "remove":
+            tree.remove(tokens)
+        elif op == "replace":
+            tree.replace(tokens, operation["value"])
+        elif op in ("move", "copy"):
+            source = operation.get("from")
+            if not isinstance(source, str):
+                raise PatchError(f"Operation {number} ({op}) has no from")
+            source_tokens = _tokens(source)
+            if op == "move":
+                if tokens[:len(source_tokens)] == source_tokens and tokens != source_tokens:
+                    raise PatchError(f"Operation {number} moves a value into itself")
+                tree.add(tokens, tree.remove(source_tokens))
+            else:
+                tree.add(tokens, tree._detached(tree._get(source_tokens)))
+        elif op == "test":
+            if not _json_equal(tree._get(tokens), operation["value"]):
+                raise PatchError(f"Operation {number} test failed at {path}")
+        else:
+            raise PatchError(f"Operation {number} has unknown op {op!r}")
+    return tree.root
+
+
+class IncrementalSession:
+    """
+    Parsed documents kept as patch bases, plus the shared subtree result memo.
+
+    Documents are identified by their ordered tree hash, so the same hash comes back
+    whether a document was uploaded whole or reached by patching.
+    """
+
+    def __init__(self, max_documents: int = INCREMENTAL_MAX_DOCUMENTS, cache_size: int = INCREMENTAL_CACHE_SIZE):
+        self.documents = _LRU(max_documents)  # document hash -> (tree, hasher)
+        self.memo = _LRU(cache_size)
+
+    def validate(self, schema: Dict[str, Any], document=None, base_hash: Optional[str] = None,
+                 patch: Optional[List[Dict[str, Any]]] = None, max_errors: int = MAX_VALIDATION_ERRORS,
+                 cancel: Optional[threading.Event] = None):
+        """
+        Validate a full document, or `patch` applied to the stored `base_hash` document.
+        A document already derived from the base by apply_patch() can be passed along with
+        `base_hash` instead of the patch, to reuse the base's hashes.
+        Raises KeyError for an unknown base, PatchError for a bad patch and
+        ValidationCancelled once `cancel` is set.
+        """
+        if base_hash is not None and (patch is not None or document is not None):
+            base = self.documents.get(base_hash)
+            if base is None:
+                raise KeyError(base_hash)
+            tree, base_hasher = base
+            if patch is not None:
+                document = apply_patch(tree, patch)
+            hasher = base_hasher.fork(tree)
+        else:
+            hasher = TreeHasher(ordered=True)
+
+        checker = IncrementalValidator(self.memo, hasher, cancel)
+        errors = checker.errors(plan_for(schema), document)
+        document_hash = hasher(document).hex()
+        self.documents.set(document_hash, (document, hasher))
+
+        result: Dict[str, Any] = {"is_valid": not errors, "document_hash": document_hash}
+        if errors:
+            result["error"] = f"Schema Validation Error: {errors[0]['message']}"
+        else:
+            result["message"] = "YAML is valid."
+        result.update(
+            errors=errors[:max_errors],
+            truncated=len(errors) > max_errors,
+            subtrees_validated=checker.validated,
+            subtrees_reused=checker.reused,
+        )
+        return result
+
+
+# Process-wide session used by /validate/incremental
+session = IncrementalSession()
@@ -0,0 +1,308 @@
+import asyncio
+import itertools
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Optional, Sequence
+
+# Background job settings
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Jobs running at once per process
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))  # Jobs waiting per process before submissions are refused
+JOB_MAX_PER_CLIENT = int(os.getenv("JOB_MAX_PER_CLIENT", "4"))  # Queued plus running jobs per client
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))  # Seconds a finished job's status and result are kept
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "600"))  # Seconds a job may run before it is reported as failed
+JOB_PRIORITY_TOKEN = os.getenv("JOB_PRIORITY_TOKEN")  # Needed to submit priority=high; unset refuses it
+JOB_DIR = os.getenv("JOB_DIR", os.path.join(tempfile.gettempdir(), "schema-validator-jobs"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))  # Seconds between status checks of /jobs/{id}/events
+
+# Priorities accepted on submission; lower numbers run first
+JOB_PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+
+class JobRejected(Exception):
+    """Raised when a job can't be accepted right now."""
+    status_code = 503
+
+
+class ClientLimitReached(JobRejected):
+    """Raised when a client already has its maximum of unfinished jobs."""
+    status_code = 429
+
+
+def discard(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _alive(pid: Optional[int]) -> bool:
+    if not isinstance(pid, int) or pid <= 0:
+        return False  # os.kill() would signal a whole process group
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # Exists, owned by another user
+    return True
+
+
+class JobStore:
+    """
+    Job records as JSON files in a directory, so every uvicorn worker on the host can
+    report a job's status whichever worker runs it. Uploads waiting for a job are spooled
+    to the same directory, so a full queue holds its inputs on disk rather than in memory.
+
+    A finished job's record expires `ttl` seconds after its last update. Queued and
+    running jobs are kept however long they wait, as are their uploads, unless the
+    worker process that owns them has gone; each file records its owner for that.
+    """
+
+    def __init__(self, directory: str = JOB_DIR, ttl: float = JOB_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _load(self, path: str) -> Optional[Dict[str, Any]]:
+        """The record at `path`, deleting it first if it has expired."""
+        modified = os.path.getmtime(path)
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        if time.time() - modified > self.ttl and (record.get("status") in FINISHED or not _alive(record.get("owner"))):
+            os.remove(path)
+            return None
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            record = self._load(self._path(job_id))
+        except (OSError, ValueError):
+            return None
+        if record is not None:
+            record.pop("owner", None)
+        return record
+
+    def save(self, job: Dict[str, Any]):
+        # Write then rename, so pollers never read a partial record
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({**job, "owner": os.getpid()}, f, default=str)
+            os.replace(tmp_path, self._path(job["id"]))
+        except OSError:
+            discard(tmp_path)
+            raise
+
+    def spool(self, source: BinaryIO) -> str:
+        """Copy an upload into the directory; returns the payload path for the job to read."""
+        # Named after the owning process; its job deletes the file once finished
+        fd, path = tempfile.mkstemp(dir=self.directory, prefix=f"{os.getpid()}-", suffix=".payload")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(source, f)
+        except OSError:
+            discard(path)
+            raise
+        return path
+
+    def prune(self) -> int:
+        """Delete expired records, and payloads left behind by a process that died; returns how many were removed."""
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith(".json"):
+                    removed += self._load(path) is None
+                elif name.endswith(".payload") and os.path.getmtime(path) < cutoff:
+                    owner = name.split("-", 1)[0]
+                    if not (owner.isdigit() and _alive(int(owner))):
+                        os.remove(path)
+                        removed += 1
+            except (OSError, ValueError):
+                pass
+        return removed
+
+
+class JobQueue:
+    """
+    Runs long comparisons and batch validations in the background.
+
+    Submissions go into a bounded priority queue served by `workers` threads, so jobs
+    never use more than that many cores however many are queued; interactive requests
+    keep the rest. Each client may have at most `max_per_client` unfinished jobs, which
+    stops one bulk caller from filling the queue. Status and results go to the JobStore.
+
+    A job still running after `timeout` seconds is reported as failed and its result is
+    dropped. Threads can't be interrupted, so the job itself runs on until it returns;
+    until then it still holds one of the `workers` runner slots and its client's slot,
+    so abandoned jobs can't add up to more running work than the bound allows.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, workers: int = JOB_WORKERS,
+                 max_queued: int = JOB_QUEUE_SIZE, max_per_client: int = JOB_MAX_PER_CLIENT,
+                 timeout: float = JOB_TIMEOUT):
+        self._store = store
+        self.workers = workers
+        self.max_per_client = max_per_client
+        self.timeout = timeout
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue(max_queued)
+        self._order = itertools.count()  # FIFO within a priority
+        self._active: Dict[str, int] = {}  # client -> unfinished jobs
+        self._lock = threading.Lock()
+        self._runners = threading.Semaphore(workers)  # Job bodies running, timed out or not
+        self._threads = []
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+
+    @property
+    def store(self) -> JobStore:
+        # Created on first use, so importing the app doesn't touch the filesystem
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"job-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, kind: str, func: Callable, *args, client: str = "anonymous",
+               priority: str = "normal", payloads: Sequence[str] = ()) -> Dict[str, Any]:
+        """
+        Queue func(*args) and return the job record; raises JobRejected when it can't be queued.
+        `payloads` are spooled files among the args, deleted once the job no longer needs them.
+        """
+        with self._lock:
+            if self._active.get(client, 0) >= self.max_per_client:
+                for path in payloads:
+                    discard(path)
+                raise ClientLimitReached(f"Client already has {self.max_per_client} unfinished jobs")
+            self._active[client] = self._active.get(client, 0) + 1
+
+        job = {"id": uuid.uuid4().hex, "kind": kind, "status": QUEUED, "priority": priority,
+               "created_at": time.time(), "started_at": None, "finished_at": None,
+               "result": None, "error": None}
+        try:
+            self.store.save(job)
+            self._queue.put_nowait((JOB_PRIORITIES[priority], next(self._order), job, client, func, args, payloads))
+        except (queue.Full, OSError) as e:
+            self._release(client)
+            for path in payloads:
+                discard(path)
+            raise JobRejected("Job queue is full, try again later" if isinstance(e, queue.Full)
+                              else f"Could not store job: {e}")
+        self._start()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def _release(self, client: str):
+        with self._lock:
+            remaining = self._active.get(client, 0) - 1
+            if remaining > 0:
+                self._active[client] = remaining
+            else:
+                self._active.pop(client, None)
+
+    def _work(self):
+        while True:
+            self._runners.acquire()  # Given back by the job body's thread when it returns
+            _, _, job, client, func, args, payloads = self._queue.get()
+
+            def finish(client=client, payloads=payloads):
+                for path in payloads:
+                    discard(path)
+                self._release(client)
+                self._runners.release()
+
+            try:
+                self._run(job, func, args, finish)
+            except OSError as e:
+                print(f"Warning: could not store the status of job {job['id']}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: Dict[str, Any], func: Callable, args, finish: Callable[[], None]):
+        """Run the job with its time limit; `finish` is called once its body has returned, however late."""
+        job.update(status=RUNNING, started_at=time.time())
+        try:
+            self.store.save(job)
+        except OSError:
+            finish()
+            raise
+        outcome: Dict[str, Any] = {}
+
+        def run():
+            try:
+                outcome["result"] = func(*args)
+            except Exception as e:
+                outcome["error"] = str(e)
+            finally:
+                finish()
+
+        runner = threading.Thread(target=run, name=f"{threading.current_thread().name}-run", daemon=True)
+        runner.start()
+        runner.join(self.timeout)
+        if runner.is_alive():
+            job.update(status=FAILED, error=f"Job timed out after {self.timeout:g}s")
+            self._timed_out += 1
+            self._failed += 1
+        elif "error" in outcome:
+            job.update(status=FAILED, error=outcome["error"])
+            self._failed += 1
+        else:
+            job.update(status=DONE, result=outcome["result"])
+            self._completed += 1
+        job["finished_at"] = time.time()
+        self.store.save(job)
+        self.store.prune()
+
+    async def watch(self, job_id: str, interval: float = JOB_POLL_INTERVAL) -> AsyncIterator[Dict[str, Any]]:
+        """Yields the job record each time its status changes, until it finishes or expires."""
+        status = None
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return
+            if job["status"] != status:
+                status = job["status"]
+                yield job
+            if status in FINISHED:
+                return
+            await asyncio.sleep(interval)
+
+    def join(self):
+        """Block until every queued job has finished."""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queue.qsize(),
+                "clients": len(self._active),
+                "completed": self._completed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+            }
+
+
+# Process-wide queue used by the /jobs endpoints
+jobs = JobQueue()
@@ -0,0 +1,39 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Stands in for a module until one of its attributes is read, then imports it.
+
+    Keeps heavy dependencies off the import path of the app, so a cold worker can
+    answer its first requests before they are loaded. Exception classes work too:
+    `except jsonschema.SchemaError` only touches the module once an exception is raised.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{' (loaded)' if self.loaded else ''}>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Module proxy imported on first attribute access."""
+    return LazyModule(name)
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from backend.diff import diff_trees
+from backend.incremental import IncrementalSession, PatchError, ValidationCancelled, apply_patch
+from backend.incremental import session as incremental_session
+from backend.lazy import lazy_import
+from backend.metrics import STAGE_SECONDS
+from backend.uploads import MAX_UPLOAD_BYTES
+from backend.validators import MAX_VALIDATION_ERRORS
+from backend.yaml_loader import YAMLError, describe_yaml_error, load_yaml
+
+jsonschema = lazy_import("jsonschema")
+
+# Live validation settings
+LIVE_DEBOUNCE_MS = int(os.getenv("LIVE_DEBOUNCE_MS", "150"))  # Quiet time before a burst of edits is validated
+LIVE_MAX_PENDING = int(os.getenv("LIVE_MAX_PENDING", "1000"))  # Queued edits per connection; further edits are rejected
+
+
+class LiveProtocolError(ValueError):
+    """Raised for websocket messages that aren't a valid snapshot or patch."""
+
+
+def parse_message(raw: str) -> Dict[str, Any]:
+    """
+    Checks an incoming message: {"type": "snapshot", "content": "<yaml>"} or
+    {"type": "patch", "patch": [<JSON Patch operations>]}, each with an optional "seq".
+    """
+    try:
+        message = json.loads(raw)
+    except ValueError as e:
+        raise LiveProtocolError(f"Message is not JSON: {e}")
+    if not isinstance(message, dict):
+        raise LiveProtocolError("Message must be a JSON object")
+    seq = message.get("seq")
+    if seq is not None and (not isinstance(seq, int) or isinstance(seq, bool)):
+        raise LiveProtocolError("seq must be an integer")
+    kind = message.get("type")
+    if kind == "snapshot":
+        if not isinstance(message.get("content"), str):
+            raise LiveProtocolError("snapshot requires a content string")
+        if len(message["content"]) > MAX_UPLOAD_BYTES:
+            raise LiveProtocolError(f"content exceeds {MAX_UPLOAD_BYTES} bytes")
+    elif kind == "patch":
+        if not isinstance(message.get("patch"), list):
+            raise LiveProtocolError("patch requires a list of operations")
+    else:
+        raise LiveProtocolError("type must be 'snapshot' or 'patch'")
+    return message
+
+
+def coalesce(edits: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Folds queued edits into (the newest snapshot or None, the patch edits after it, in order).
+    Edits before the newest snapshot are superseded by it.
+    """
+    snapshot = None
+    patches: List[Dict[str, Any]] = []
+    for edit in edits:
+        if edit["type"] == "snapshot":
+            snapshot, patches = edit, []
+        else:
+            patches.append(edit)
+    return snapshot, patches
+
+
+def apply_each(document, patches: List[Dict[str, Any]]) -> Tuple[Any, int, Optional[PatchError]]:
+    """
+    Applies patch edits one at a time: (document after the ones that applied, how many
+    applied, the error that stopped the rest or None).
+    """
+    for applied, edit in enumerate(patches):
+        try:
+            document = apply_patch(document, edit["patch"])
+        except PatchError as e:
+            return document, applied, e
+    return document, len(patches), None
+
+
+class LiveSession:
+    """
+    Server side of one /ws/validate connection.
+
+    Edits are queued and validated once the client has been quiet for `debounce`
+    seconds, so a burst of keystrokes costs one validation. A new edit cancels the
+    validation in flight; its edits stay queued and are folded into the next run,
+    since the patches that follow are relative to them. Documents and subtree results
+    are kept in the incremental session, so each run only re-checks what changed.
+
+    A patch that doesn't apply doesn't cost the edits queued before it: those are
+    validated, and the client is told which seqs were discarded from the bad one on.
+    """
+
+    def __init__(self, send: Callable[[Dict[str, Any]], Awaitable[None]], schema: Dict[str, Any],
+                 debounce: float = LIVE_DEBOUNCE_MS / 1000, max_errors: int = MAX_VALIDATION_ERRORS,
+                 documents: IncrementalSession = incremental_session):
+        self.send = send
+        self.schema = schema
+        self.debounce = debounce
+        self.max_errors = max_errors
+        self.documents = documents
+        self.base_hash: Optional[str] = None  # Last document validated; patches apply to it
+        self.pending: List[Dict[str, Any]] = []
+        self.runs = 0  # Validations started, including cancelled ones
+        self._task: Optional[asyncio.Task] = None
+        self._cancel: Optional[threading.Event] = None
+
+    def submit(self, edit: Dict[str, Any]):
+        """Queue an edit and restart the debounce timer."""
+        if len(self.pending) >= LIVE_MAX_PENDING:
+            raise LiveProtocolError(f"More than {LIVE_MAX_PENDING} edits queued")
+        self.pending.append(edit)
+        self._stop()
+        self._task = asyncio.ensure_future(self._run())
+
+    def _stop(self):
+        if self._cancel is not None:
+            self._cancel.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def close(self):
+        self._stop()
+        if self._task is not None:
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        await asyncio.sleep(self.debounce)
+        edits = list(self.pending)
+        cancel = self._cancel = threading.Event()
+        self.runs += 1
+        try:
+            messages, base_hash = await run_in_threadpool(self._validate, edits, self.base_hash, cancel)
+        except ValidationCancelled:
+            return
+        # Reached only if no newer edit arrived while the worker thread ran
+        del self.pending[:len(edits)]
+        self.base_hash = base_hash
+        for message in messages:
+            await self.send(message)
+
+    def _validate(self, edits: List[Dict[str, Any]], base_hash: Optional[str],
+                  cancel: threading.Event) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Runs in a worker thread; returns the messages to send and the new base document hash."""
+        seq = edits[-1].get("seq")
+        snapshot, patches = coalesce(edits)
+        rejected = None
+        try:
+            with STAGE_SECONDS.time("live", "validate"):
+                if snapshot is not None:
+                    try:
+                        document = load_yaml(snapshot["content"])
+                    except YAMLError as e:
+                        return [{"type": "result", "seq": seq, "is_valid": False, **describe_yaml_error(e)}], None
+                elif base_hash is None:
+                    return [{"type": "error", "seq": seq, "detail": "No document yet; send a snapshot"}], None
+                else:
+                    base = self.documents.documents.get(base_hash)
+                    if base is None:
+                        raise KeyError(base_hash)
+                    document = base[0]
+
+                document, applied, error = apply_each(document, patches)
+                if error is not None:
+                    discarded = patches[applied:]
+                    first, last = discarded[0].get("seq"), discarded[-1].get("seq")
+                    rejected = {"type": "error", "seq": first, "discarded": [first, last],
+                                "detail": f"Invalid patch: {error}; edits {first} to {last} were discarded, "
+                                          "send a snapshot or patches against the last result"}
+                    if applied == 0 and snapshot is None:
+                        return [rejected], base_hash  # Nothing applied; the base still stands
+                    seq = patches[applied - 1].get("seq") if applied else snapshot.get("seq")
+
+                if snapshot is not None:
+                    result = self.documents.validate(self.schema, document, max_errors=self.max_errors, cancel=cancel)
+                else:
+                    result = self.documents.validate(self.schema, document, base_hash=base_hash,
+                                                     max_errors=self.max_errors, cancel=cancel)
+        except KeyError:
+            return [{"type": "error", "seq": seq, "detail": "Base document expired; send a snapshot"}], None
+        except jsonschema.SchemaError as e:
+            return [{"type": "error", "seq": seq, "detail": f"Invalid Schema: {e.message}"}], base_hash
+
+        # Changes since the previously validated document, when it is still stored
+        previous = self.documents.documents.get(base_hash) if base_hash else None
+        current = self.documents.documents.get(result["document_hash"])
+        if previous is not None and current is not None:
+            with STAGE_SECONDS.time("live", "diff"):
+                result["diff"] = diff_trees(previous[0], current[0], ordered=True)
+        else:
+            result["diff"] = None
+        messages = [{"type": "result", "seq": seq, **result}]
+        if rejected is not None:
+            messages.append(rejected)
+        return messages, result["document_hash"]
@@ -1,28 +1,70 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Body
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Body, Path, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Dict, Optional, List, Any
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from pydantic import ValidationError as ModelValidationError
+from typing import Dict, Optional, List, Any, Union, IO, Literal, Sequence
 from backend.Schema import SCHEMA  # Import the SCHEMA from Schema.py
-import uvicorn
-import yaml
 import os
-from jsonschema import validate, ValidationError, SchemaError
 import json
-from deepdiff import DeepDiff
-import psycopg2
-import psycopg2.extras
-from backend.database import lifespan, get_connection  # Import the FastAPI instance and DB connection
+import hmac
+from contextlib import asynccontextmanager
+from functools import partial
+from backend import database  # Async data access layer for the configs table
+from backend.database import DatabaseBusy, DatabaseUnavailable
+from backend.lazy import lazy_import
+from backend.startup import STARTUP_DDL, startup
+from backend.validators import MAX_VALIDATION_ERRORS, collect_errors, default_schema_key, get_validator, schema_hash, warm_validators
+from backend.validators import registry as validator_registry
+from backend.schema_registry import SCHEMA_NAME_PATTERN, SchemaNotFound, resolver as schema_resolver
+from backend.yaml_loader import LOADER_BACKEND, LIMIT_NAMES, YAMLError, YAMLLimitExceeded, describe_yaml_error, load_yaml
+from backend.yaml_loader import rejections as yaml_rejections
+from backend.diff import TreeHasher, diff_trees
+from backend.handles import HANDLE_PATTERN, ParsedDocument, estimate_size, handles
+from backend.documents import InvalidFilter, containment, projection, schema_fields
+from backend.incremental import PatchError, session as incremental_session
+from backend.live import LIVE_DEBOUNCE_MS, LiveProtocolError, LiveSession, parse_message
+from backend.batch import BatchDocument, BatchError, extract_documents, run_limited
+from backend.execution import ExecutionError, cpu_executor, run_cpu
+from backend.uploads import MAX_UPLOAD_BYTES, MaxBodySizeMiddleware, upload_size, upload_source
+from backend.jobs import JOB_PRIORITIES, JOB_PRIORITY_TOKEN, JobRejected, discard, jobs
+from backend.bulk import BULK_CHUNK_SIZE, BulkFormatError, detect_format, iter_records
+from backend.export import EXPORT_ITERSIZE, MEDIA_TYPES, encode_batch, header
+from backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, STAGE_SECONDS, MetricsMiddleware, observe_since_request_start, registry
+from backend.profiling import ProfilingMiddleware
+from backend.cache import comparison_key, content_hash, hash_upload, result_cache, validation_key
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-app = FastAPI(lifespan=lifespan)
+# Heavy dependencies load on first use, keeping them out of cold starts
+jsonschema = lazy_import("jsonschema")
 
-# Health check endpoint
-@app.get("/")
-def root():
-    return {"message": "Schema Validator API is running!", "status": "healthy"}
+# Startup steps after the database bootstrap: compiling the validators up front
+async def warm_local_validators():
+    await run_in_threadpool(warm_validators)
+    print("Startup: Schema validators compiled.")
 
-@app.get("/health")
-def health_check():
-    return {"status": "ok", "service": "schema-validator"}
+async def warm_registry():
+    warmed = await schema_resolver.warm()
+    print(f"Startup: {warmed} registry schemas compiled.")
+
+# Application lifespan; with STARTUP_MODE=background the steps run after the app is serving
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Starting FastAPI application...")
+    await startup.run([
+        ("database", partial(database.bootstrap, STARTUP_DDL)),
+        ("validators", warm_local_validators),
+        ("schema_registry", warm_registry),
+    ])
+    print("FastAPI application started successfully!")
+    yield
+    print("Shutdown: FastAPI application closing")
+    await startup.stop()
+    cpu_executor.shutdown()
+    database.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,9 +75,18 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "X-Job-Priority-Token"],
 )
 
+# Reject oversized uploads before they are buffered
+app.add_middleware(MaxBodySizeMiddleware, max_bytes=MAX_UPLOAD_BYTES)
+
+# Opt-in request profiling (enabled by PROFILE_DIR)
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so rejected requests are timed too
+app.add_middleware(MetricsMiddleware)
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -51,14 +102,49 @@ async def health_check():
     Health check endpoint for monitoring.
     """
     try:
-        conn = get_connection()
-        if conn:
-            conn.close()
-            return {"status": "healthy", "database": "connected"}
-        else:
-            return {"status": "unhealthy", "database": "disconnected"}
+        await database.ping()
+        return {"status": "healthy", "database": "connected", "pool": database.get_pool().stats(),
+                "yaml_loader": LOADER_BACKEND, "result_cache": result_cache.stats(), "startup": startup.stats()}
+    except DatabaseUnavailable:
+        return {"status": "unhealthy", "database": "disconnected", "pool": database.get_pool().stats(),
+                "yaml_loader": LOADER_BACKEND, "result_cache": result_cache.stats(), "startup": startup.stats()}
     except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
+        return {"status": "unhealthy", "error": str(e), "yaml_loader": LOADER_BACKEND}
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Stage and request histograms plus live pool, executor and cache stats in the Prometheus text format.
+    """
+    return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+# Live stats exported as gauges and counters, read on every scrape
+def _stat_samples(read, keys, label="stat"):
+    def samples():
+        stats = read()
+        return [({label: key}, stats[key]) for key in keys]
+    return samples
+
+registry.collector("schema_validator_db_pool", "gauge", "Connection pool state and lifetime counters",
+                   _stat_samples(lambda: database.get_pool().stats(),
+                                 ("size", "in_use", "idle", "waiting", "checkouts", "timeouts", "discarded",
+                                  "wait_time_total_ms", "wait_time_max_ms")))
+registry.collector("schema_validator_db_executor_pending", "gauge", "Database calls queued or running",
+                   lambda: [({}, database.get_executor().stats()["pending"])])
+registry.collector("schema_validator_cpu_executor", "gauge", "Parse/validate/compare executor counters",
+                   _stat_samples(cpu_executor.stats, ("timeouts", "cancelled", "pool_recycles")))
+registry.collector("schema_validator_validator_cache", "gauge", "Compiled validator LRU size and evictions",
+                   _stat_samples(validator_registry.stats, ("size", "max_size", "evictions")))
+registry.collector("schema_validator_jobs", "gauge", "Background job queue depth and outcomes",
+                   _stat_samples(jobs.stats, ("queued", "clients", "completed", "failed")))
+registry.collector("schema_validator_handles", "gauge", "Parsed documents held for handles and lookups",
+                   _stat_samples(handles.stats, ("documents", "bytes", "hits", "misses")))
+registry.collector("schema_validator_yaml_rejections_total", "counter", "YAML documents rejected by each parsing limit",
+                   _stat_samples(lambda: yaml_rejections, LIMIT_NAMES, label="limit"))
+registry.collector("schema_validator_result_cache", "gauge", "Result cache size and hit/miss counters",
+                   _stat_samples(result_cache.stats, ("entries", "bytes", "max_bytes", "hits", "misses", "evictions")))
 
 # Pydantic model for configuration data
 class ConfigInput(BaseModel):
@@ -89,49 +175,103 @@ class ConfigInput(BaseModel):
 
 # Pydantic models for schema comparison
 class SchemaComparisonInput(BaseModel):
-    schema1_content: str = Field(..., description="First YAML schema content")
-    schema2_content: str = Field(..., description="Second YAML schema content")
+    schema1_content: Optional[str] = Field(None, description="First YAML schema content")
+    schema2_content: Optional[str] = Field(None, description="Second YAML schema content")
+    schema1_handle: Optional[str] = Field(None, pattern=HANDLE_PATTERN, description="Handle from POST /handles instead of schema1_content")
+    schema2_handle: Optional[str] = Field(None, pattern=HANDLE_PATTERN, description="Handle from POST /handles instead of schema2_content")
     schema1_name: Optional[str] = Field(None, description="Name for first schema")
     schema2_name: Optional[str] = Field(None, description="Name for second schema")
 
+    @model_validator(mode="after")
+    def check_sources(self):
+        # Each schema comes from exactly one of its content or a handle
+        for side in ("schema1", "schema2"):
+            if (getattr(self, f"{side}_content") is None) == (getattr(self, f"{side}_handle") is None):
+                raise ValueError(f"Provide exactly one of {side}_content and {side}_handle")
+        return self
+
+class IncrementalValidationInput(BaseModel):
+    content: Optional[str] = Field(None, description="Full YAML document")
+    base_hash: Optional[str] = Field(None, description="document_hash of a previous response, required with patch")
+    patch: Optional[List[Dict[str, Any]]] = Field(None, description="RFC 6902 JSON Patch against the base document")
+
 class SchemaComparisonResult(BaseModel):
     are_identical: bool
     schema1_name: Optional[str]
     schema2_name: Optional[str]
     differences: Optional[Dict[str, Any]] = None
+    patch: Optional[List[Dict[str, Any]]] = None
     schema1_valid: bool
     schema2_valid: bool
     schema1_errors: Optional[List[str]] = None
     schema2_errors: Optional[List[str]] = None
 
-# Function to validate YAML content, will return the type of error
-def VALIDATE_YAML(yaml_content: str):
+# Validation modes accepted by /validate and /validate/batch
+ValidationMode = Literal["first", "all", "boolean"]
+
+# Function to validate YAML content (text, bytes or a file object), will return the type of error
+def VALIDATE_YAML(yaml_content: Union[str, bytes, IO], validator=None, mode: str = "first",
+                  max_errors: int = MAX_VALIDATION_ERRORS):
     try:
-        yaml_data = yaml.safe_load(yaml_content)
-        validate(instance=yaml_data, schema=SCHEMA)
+        with STAGE_SECONDS.time("validate", "parse"):
+            yaml_data = load_yaml(yaml_content)
+    except YAMLError as e:
+        return {"is_valid": False, **describe_yaml_error(e)}
+    except Exception as e:
+        return {"is_valid": False, "error": f"Unexpected Error: {str(e)}"}
+    with STAGE_SECONDS.time("validate", "schema"):
+        return validate_parsed_document(yaml_data, validator, mode, max_errors)
+
+# Validates already-parsed data against SCHEMA (or the given compiled validator).
+# mode "first" reports the best-matching error, "all" every violation up to max_errors,
+# and "boolean" stops at the first violation without describing it.
+def validate_parsed_document(yaml_data: Any, validator=None, mode: str = "first",
+                             max_errors: int = MAX_VALIDATION_ERRORS):
+    validator = validator or get_validator()
+    try:
+        if mode == "boolean":
+            if validator.is_valid(yaml_data):
+                return {"is_valid": True, "message": "YAML is valid."}
+            return {"is_valid": False, "error": "Schema Validation Error"}
+        if mode == "all":
+            # One extra error tells us whether the list was cut short
+            errors = collect_errors(validator, yaml_data, max_errors + 1)
+            if not errors:
+                return {"is_valid": True, "message": "YAML is valid.", "errors": []}
+            return {
+                "is_valid": False,
+                "error": f"Schema Validation Error: {errors[0]['message']}",
+                "errors": errors[:max_errors],
+                "truncated": len(errors) > max_errors,
+            }
+        # Same error selection as jsonschema.validate(), minus the per-call schema check
+        error = jsonschema.exceptions.best_match(validator.iter_errors(yaml_data))
+        if error is not None:
+            raise error
         return {"is_valid": True, "message": "YAML is valid."}
-    except yaml.YAMLError as e:
-        return {"is_valid": False, "error": f"YAML Parsing Error: {e}"}
-    except ValidationError as e:
+    except jsonschema.ValidationError as e:
         return {"is_valid": False, "error": f"Schema Validation Error: {e.message}"}
-    except SchemaError as e:
+    except jsonschema.SchemaError as e:
         return {"is_valid": False, "error": f"Invalid Schema: {e.message}"}
     except Exception as e:
         return {"is_valid": False, "error": f"Unexpected Error: {str(e)}"}
 
 # Function to parse and validate a single YAML schema
-def parse_and_validate_yaml_schema(yaml_content: str):
+def parse_and_validate_yaml_schema(yaml_content: Union[str, bytes, IO]):
     """Parse YAML content and return validation status with errors if any."""
     errors = []
     parsed_data = None
     is_valid = True
     
     try:
-        parsed_data = yaml.safe_load(yaml_content)
+        parsed_data = load_yaml(yaml_content)
         if parsed_data is None:
             errors.append("YAML content is empty or null")
             is_valid = False
-    except yaml.YAMLError as e:
+    except YAMLLimitExceeded as e:
+        errors.append(f"YAML limit exceeded: {str(e)}")
+        is_valid = False
+    except YAMLError as e:
         errors.append(f"YAML parsing error: {str(e)}")
         is_valid = False
     except Exception as e:
@@ -144,16 +284,34 @@ def parse_and_validate_yaml_schema(yaml_content: str):
         "errors": errors
     }
 
+# Diff engines accepted by the comparison endpoints
+DiffEngine = Literal["structural", "deepdiff"]
+
 # Function to compare two YAML schemas
-def compare_yaml_schemas(schema1_content: str, schema2_content: str, 
+def compare_yaml_schemas(schema1_content: Union[str, bytes, IO], schema2_content: Union[str, bytes, IO], 
                         schema1_name: Optional[str] = None, 
-                        schema2_name: Optional[str] = None) -> SchemaComparisonResult:
-    """Compare two YAML schemas and return detailed comparison results."""
+                        schema2_name: Optional[str] = None,
+                        engine: str = "structural",
+                        ordered: bool = False) -> SchemaComparisonResult:
+    """
+    Compare two YAML schemas and return detailed comparison results.
+    The structural engine fills `patch` with JSON-Patch-style operations; the
+    deepdiff engine fills `differences` with the DeepDiff report.
+    """
     
     # Parse and validate both schemas
-    schema1_result = parse_and_validate_yaml_schema(schema1_content)
-    schema2_result = parse_and_validate_yaml_schema(schema2_content)
-    
+    with STAGE_SECONDS.time("compare", "parse"):
+        schema1_result = parse_and_validate_yaml_schema(schema1_content)
+        schema2_result = parse_and_validate_yaml_schema(schema2_content)
+    return compare_parsed_schemas(schema1_result, schema2_result, schema1_name, schema2_name, engine, ordered)
+
+# Compares two results of parse_and_validate_yaml_schema; `hasher` may carry subtree hashes already known
+def compare_parsed_schemas(schema1_result: Dict[str, Any], schema2_result: Dict[str, Any],
+                           schema1_name: Optional[str] = None,
+                           schema2_name: Optional[str] = None,
+                           engine: str = "structural",
+                           ordered: bool = False,
+                           hasher: Optional[TreeHasher] = None) -> SchemaComparisonResult:
     # Initialize result
     result = SchemaComparisonResult(
         are_identical=False,
@@ -168,18 +326,33 @@ def compare_yaml_schemas(schema1_content: str, schema2_content: str,
     # If both schemas are valid, compare them
     if schema1_result["is_valid"] and schema2_result["is_valid"]:
         try:
-            # Use DeepDiff to find differences
-            diff = DeepDiff(
-                schema1_result["parsed_data"], 
-                schema2_result["parsed_data"],
-                ignore_order=True
-            )
-            
-            if not diff:
-                result.are_identical = True
+            if engine == "structural":
+                with STAGE_SECONDS.time("compare", "diff_structural"):
+                    patch = diff_trees(
+                        schema1_result["parsed_data"],
+                        schema2_result["parsed_data"],
+                        ordered=ordered,
+                        hasher=hasher
+                    )
+                if not patch:
+                    result.are_identical = True
+                else:
+                    result.patch = patch
             else:
-                # Convert DeepDiff result to a serializable dictionary
-                result.differences = dict(diff)
+                # Use DeepDiff to find differences
+                from deepdiff import DeepDiff  # Only loaded for the deepdiff engine
+                with STAGE_SECONDS.time("compare", "diff_deepdiff"):
+                    diff = DeepDiff(
+                        schema1_result["parsed_data"], 
+                        schema2_result["parsed_data"],
+                        ignore_order=not ordered
+                    )
+                
+                if not diff:
+                    result.are_identical = True
+                else:
+                    # Convert DeepDiff result to a serializable dictionary
+                    result.differences = dict(diff)
                 
         except Exception as e:
             result.schema1_errors = result.schema1_errors or []
@@ -188,36 +361,297 @@ def compare_yaml_schemas(schema1_content: str, schema2_content: str,
     return result
 
 
+# A parsed document in the shape of parse_and_validate_yaml_schema's result
+def parsed_schema_result(document: ParsedDocument) -> Dict[str, Any]:
+    if document.tree is None:
+        return {"is_valid": False, "parsed_data": None, "errors": ["YAML content is empty or null"]}
+    return {"is_valid": True, "parsed_data": document.tree, "errors": []}
+
+# Compares schemas given as text or as parsed documents, reusing the documents' subtree hashes
+def compare_schema_sources(schema1: Union[str, ParsedDocument], schema2: Union[str, ParsedDocument],
+                           schema1_name: Optional[str] = None, schema2_name: Optional[str] = None,
+                           engine: str = "structural", ordered: bool = False) -> SchemaComparisonResult:
+    with STAGE_SECONDS.time("compare", "parse"):
+        results = [parsed_schema_result(source) if isinstance(source, ParsedDocument)
+                   else parse_and_validate_yaml_schema(source) for source in (schema1, schema2)]
+    hasher = None
+    if engine == "structural":
+        hasher = TreeHasher(ordered, [source.hashes(ordered) for source in (schema1, schema2)
+                                      if isinstance(source, ParsedDocument)])
+    return compare_parsed_schemas(*results, schema1_name, schema2_name, engine, ordered, hasher)
+
+
+# Looks up the registry schema named in a request (None means the built-in SCHEMA)
+async def resolve_registry_schema(name: Optional[str], version: Optional[int]):
+    if name is None:
+        if version is not None:
+            raise HTTPException(status_code=400, detail="version requires a schema name")
+        return None
+    try:
+        return await schema_resolver.resolve(name, version)
+    except SchemaNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise database_http_error(e)
+
+# Names the registry schema in a result; kept out of the cached entry since equal schemas share it
+def with_schema_info(result: Dict[str, Any], resolved) -> Dict[str, Any]:
+    if resolved is None:
+        return result
+    return {**result, "schema": {"name": resolved.name, "version": resolved.version}}
+
+# The parsed document behind a handle; a miss means it expired or lives in another worker
+def get_handle(handle: str) -> ParsedDocument:
+    document = handles.get(handle)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired handle {handle}; upload the document again")
+    return document
+
+# Validates the document behind a handle, once per schema, mode and max_errors
+def validate_handle(document: ParsedDocument, resolved=None, mode: str = "first",
+                    max_errors: int = MAX_VALIDATION_ERRORS):
+    def compute():
+        validator = get_validator(resolved.schema, resolved.hash) if resolved else None
+        with STAGE_SECONDS.time("validate", "schema"):
+            return validate_parsed_document(document.tree, validator, mode, max_errors)
+    key = ("validate", resolved.hash if resolved else default_schema_key(), mode, max_errors)
+    return document.result(key, compute)
+
+# Validates against a registry schema; takes the schema itself so it also works in a worker process
+def validate_against_schema(yaml_content: Union[str, bytes, IO], schema: Dict[str, Any], key: str,
+                            mode: str = "first", max_errors: int = MAX_VALIDATION_ERRORS):
+    return VALIDATE_YAML(yaml_content, get_validator(schema, key), mode, max_errors)
+
+
 # Compares the given YAML file to the SCHEMA, validating the file
 @app.post("/validate", summary="Validate a YAML file against the defined schema")
-async def VALIDATE_YAML_ENDPOINT(file: UploadFile = File(..., description="YAML file to be validated")):
+async def VALIDATE_YAML_ENDPOINT(
+    request: Request,
+    file: UploadFile = File(..., description="YAML file to be validated"),
+    mode: ValidationMode = Query("first", description="first: best error, all: every error, boolean: valid or not"),
+    max_errors: int = Query(MAX_VALIDATION_ERRORS, ge=1, le=MAX_VALIDATION_ERRORS, description="Cap on errors reported in 'all' mode"),
+    schema: Optional[str] = Query(None, pattern=SCHEMA_NAME_PATTERN, description="Registry schema to validate against; the built-in SCHEMA when omitted"),
+    version: Optional[int] = Query(None, ge=1, description="Registry schema version; the latest when omitted")
+):
     """
-    Compares the uploaded YAML file against a predefined schema.
+    Compares the uploaded YAML file against a predefined schema, or a schema from the registry.
     """
+    observe_since_request_start(request, "validate")
+    resolved = await resolve_registry_schema(schema, version)
     try:
-        content = await file.read()
-        yaml_content = content.decode("utf-8")
-        validation_result = VALIDATE_YAML(yaml_content)
-        return validation_result
+        # Identical documents validated against the same schema are served from the cache
+        with STAGE_SECONDS.time("validate", "hash"):
+            cache_key = validation_key(await hash_upload(file), resolved.hash if resolved else None,
+                                       variant=f"{mode}:{max_errors}")
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return with_schema_info(cached, resolved)
+
+        # The parser reads the spooled upload in chunks instead of a decoded copy
+        size = upload_size(file)
+        yaml_content = await upload_source(file, picklable=cpu_executor.needs_pickling(size))
+        if resolved:
+            validation_result = await run_cpu(validate_against_schema, yaml_content, resolved.schema, resolved.hash,
+                                              mode, max_errors, size=size, request=request)
+        else:
+            validation_result = await run_cpu(VALIDATE_YAML, yaml_content, None, mode, max_errors,
+                                              size=size, request=request)
+        result_cache.set(cache_key, validation_result)
+        return with_schema_info(validation_result, resolved)
+    except ExecutionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
 
+# Parses (or patches) a document and validates it incrementally
+def validate_incremental(body: IncrementalValidationInput, schema: Dict[str, Any], max_errors: int):
+    if body.patch is not None:
+        return incremental_session.validate(schema, base_hash=body.base_hash, patch=body.patch, max_errors=max_errors)
+    try:
+        document = load_yaml(body.content)
+    except YAMLError as e:
+        return {"is_valid": False, **describe_yaml_error(e)}
+    return incremental_session.validate(schema, document, max_errors=max_errors)
+
+
+# Re-validates an edited document, checking only the subtrees that changed
+@app.post("/validate/incremental", summary="Validate an edited YAML document incrementally")
+async def VALIDATE_INCREMENTAL_ENDPOINT(
+    body: IncrementalValidationInput,
+    max_errors: int = Query(MAX_VALIDATION_ERRORS, ge=1, le=MAX_VALIDATION_ERRORS, description="Cap on errors reported"),
+    schema: Optional[str] = Query(None, pattern=SCHEMA_NAME_PATTERN, description="Registry schema to validate against; the built-in SCHEMA when omitted"),
+    version: Optional[int] = Query(None, ge=1, description="Registry schema version; the latest when omitted")
+):
+    """
+    Send either the full content or a JSON Patch against the document_hash of an earlier
+    response. Subtree results are memoised by content hash, so unchanged parts of the
+    document are not validated again. Reports every error, like mode=all.
+    """
+    if (body.content is None) == (body.patch is None):
+        raise HTTPException(status_code=400, detail="Send exactly one of content or patch")
+    if body.patch is not None and not body.base_hash:
+        raise HTTPException(status_code=400, detail="patch requires base_hash")
+    resolved = await resolve_registry_schema(schema, version)
+
+    # Runs in this process: the base documents and memo live here, not in a worker pool
+    try:
+        result = await run_in_threadpool(validate_incremental, body, resolved.schema if resolved else SCHEMA, max_errors)
+    except KeyError:
+        raise HTTPException(status_code=409, detail="Unknown base_hash; send the full content instead")
+    except PatchError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid patch: {str(e)}")
+    except jsonschema.SchemaError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Schema: {e.message}")
+    return with_schema_info(result, resolved)
+
+
+# Keeps a session open for editors: edits in, validation results and diffs pushed back
+@app.websocket("/ws/validate")
+async def VALIDATE_WEBSOCKET(
+    websocket: WebSocket,
+    max_errors: int = Query(MAX_VALIDATION_ERRORS, ge=1, le=MAX_VALIDATION_ERRORS, description="Cap on errors reported"),
+    debounce_ms: int = Query(LIVE_DEBOUNCE_MS, ge=0, le=5000, description="Quiet time before queued edits are validated"),
+    schema: Optional[str] = Query(None, pattern=SCHEMA_NAME_PATTERN, description="Registry schema to validate against; the built-in SCHEMA when omitted"),
+    version: Optional[int] = Query(None, ge=1, description="Registry schema version; the latest when omitted")
+):
+    """
+    Send {"type": "snapshot", "content": ...} or {"type": "patch", "patch": [...]} messages,
+    each with an optional seq. Bursts of edits are coalesced and validated together;
+    each result carries the seq of the newest edit it covers and a structural diff
+    against the previous result. A newer edit cancels the validation in flight.
+    """
+    await websocket.accept()
+    try:
+        resolved = await resolve_registry_schema(schema, version)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+    await websocket.send_json(with_schema_info({"type": "ready"}, resolved))
+
+    live = LiveSession(websocket.send_json, resolved.schema if resolved else SCHEMA,
+                       debounce=debounce_ms / 1000, max_errors=max_errors)
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                live.submit(parse_message(raw))
+            except LiveProtocolError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await live.close()
+
+
+# Validates every document of a batch with one shared compiled validator
+def validate_batch(documents: List[BatchDocument], mode: str = "first", max_errors: int = MAX_VALIDATION_ERRORS):
+    validator = get_validator()
+    results = {}
+    for document in documents:
+        if document.parsed:
+            results[document.key] = validate_parsed_document(document.content, validator, mode, max_errors)
+        else:
+            results[document.key] = VALIDATE_YAML(document.content, validator, mode, max_errors)
+    valid = sum(1 for result in results.values() if result["is_valid"])
+    return {"total": len(results), "valid": valid, "invalid": len(results) - valid, "results": results}
+
+
+# Splits an uploaded batch and validates it; unreadable uploads are reported as a BatchError
+def extract_and_validate_batch(content: bytes, filename: Optional[str], mode: str = "first",
+                               max_errors: int = MAX_VALIDATION_ERRORS):
+    try:
+        documents = extract_documents(content, filename)
+    except BatchError:
+        raise
+    except Exception as e:
+        raise BatchError(f"Error processing file: {str(e)}")
+    return validate_batch(documents, mode, max_errors)
+
+
+# Validates many YAML documents in one request
+@app.post("/validate/batch", summary="Validate a batch of YAML documents against the defined schema")
+async def VALIDATE_BATCH_ENDPOINT(
+    file: UploadFile = File(..., description="Multi-document YAML, tar/zip archive or JSON array"),
+    mode: ValidationMode = Query("first", description="first: best error, all: every error, boolean: valid or not"),
+    max_errors: int = Query(MAX_VALIDATION_ERRORS, ge=1, le=MAX_VALIDATION_ERRORS, description="Cap on errors per document in 'all' mode")
+):
+    """
+    Accepts a multi-document YAML stream (--- separated), a tar or zip archive of YAML files,
+    or a JSON array of documents. Returns one result per document, keyed by filename or index.
+    """
+    content = await file.read()
+    # Splitting and validation run on a worker thread; the batch limiter bounds how many run at once
+    try:
+        return await run_in_threadpool(run_limited, extract_and_validate_batch, content, file.filename,
+                                       mode, max_errors)
+    except BatchError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+# Runs compare_yaml_schemas through the result cache; names aren't part of the cached diff
+async def cached_comparison(cache_key: str, schema1_content, schema2_content,
+                            schema1_name: Optional[str], schema2_name: Optional[str],
+                            engine: str, ordered: bool,
+                            size: int, request: Request) -> SchemaComparisonResult:
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        cached.update(schema1_name=schema1_name or "Schema 1", schema2_name=schema2_name or "Schema 2")
+        return SchemaComparisonResult(**cached)
+
+    if isinstance(schema1_content, ParsedDocument) or isinstance(schema2_content, ParsedDocument):
+        # Parsed documents live in this process, so comparisons that use them stay on its threads
+        result = await run_in_threadpool(compare_schema_sources, schema1_content, schema2_content,
+                                         schema1_name, schema2_name, engine, ordered)
+    else:
+        result = await run_cpu(
+            compare_yaml_schemas,
+            schema1_content,
+            schema2_content,
+            schema1_name,
+            schema2_name,
+            engine,
+            ordered,
+            size=size,
+            request=request
+        )
+    result_cache.set(cache_key, jsonable_encoder(result))
+    return result
+
+
 # Compare two YAML schemas (JSON input)
 @app.post("/compare-schemas", summary="Compare two YAML schemas", response_model=SchemaComparisonResult)
-async def compare_schemas_json(comparison_input: SchemaComparisonInput):
+async def compare_schemas_json(
+    request: Request,
+    comparison_input: SchemaComparisonInput,
+    engine: DiffEngine = Query("structural", description="structural: JSON-Patch-style operations, deepdiff: DeepDiff report"),
+    ordered: bool = Query(False, description="Treat list order as significant")
+):
     """
     Compare two YAML schemas provided as JSON input.
+    Either schema may be given by a handle from POST /handles instead of its content.
     Returns detailed comparison results including differences.
     """
+    sources = [get_handle(handle) if handle else content for content, handle in (
+        (comparison_input.schema1_content, comparison_input.schema1_handle),
+        (comparison_input.schema2_content, comparison_input.schema2_handle))]
     try:
-        result = compare_yaml_schemas(
-            comparison_input.schema1_content,
-            comparison_input.schema2_content,
+        result = await cached_comparison(
+            comparison_key(*(source.content_hash if isinstance(source, ParsedDocument) else content_hash(source)
+                             for source in sources),
+                           variant=f"{engine}:{ordered}"),
+            sources[0],
+            sources[1],
             comparison_input.schema1_name,
-            comparison_input.schema2_name
+            comparison_input.schema2_name,
+            engine,
+            ordered,
+            size=sum(source.size if isinstance(source, ParsedDocument) else len(source) for source in sources),
+            request=request
         )
         return result
+    except ExecutionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error comparing schemas: {str(e)}")
 
@@ -225,188 +659,637 @@ async def compare_schemas_json(comparison_input: SchemaComparisonInput):
 # Compare two YAML schema files
 @app.post("/compare-schema-files", summary="Compare two YAML schema files", response_model=SchemaComparisonResult)
 async def compare_schema_files(
+    request: Request,
     file1: UploadFile = File(..., description="First YAML schema file"),
-    file2: UploadFile = File(..., description="Second YAML schema file")
+    file2: UploadFile = File(..., description="Second YAML schema file"),
+    engine: DiffEngine = Query("structural", description="structural: JSON-Patch-style operations, deepdiff: DeepDiff report"),
+    ordered: bool = Query(False, description="Treat list order as significant")
 ):
     """
     Compare two uploaded YAML schema files.
     Returns detailed comparison results including differences.
     """
+    observe_since_request_start(request, "compare")
     try:
-        # Read file contents
-        content1 = await file1.read()
-        content2 = await file2.read()
-        
-        schema1_content = content1.decode("utf-8")
-        schema2_content = content2.decode("utf-8")
+        with STAGE_SECONDS.time("compare", "hash"):
+            cache_key = comparison_key(await hash_upload(file1), await hash_upload(file2), variant=f"{engine}:{ordered}")
+
+        # Let the parser stream both uploads instead of decoding them into memory
+        size = upload_size(file1) + upload_size(file2)
+        picklable = cpu_executor.needs_pickling(size)
+        schema1_content = await upload_source(file1, picklable)
+        schema2_content = await upload_source(file2, picklable)
         
         # Use filenames as schema names
         schema1_name = file1.filename or "Schema 1"
         schema2_name = file2.filename or "Schema 2"
         
-        result = compare_yaml_schemas(
+        result = await cached_comparison(
+            cache_key,
             schema1_content,
             schema2_content,
             schema1_name,
-            schema2_name
+            schema2_name,
+            engine,
+            ordered,
+            size=size,
+            request=request
         )
         return result
+    except ExecutionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing files: {str(e)}")
 
 
-# Used to add a new configuration in the database
-@app.post("/configs/")
-def ADD_CONFIG(config: ConfigInput):
+# Parses an upload for a handle; in a worker process the tree is sent back to this one
+# Returns (tree, estimated memory), so the tree is measured off the event loop
+def parse_for_handle(yaml_content: Union[str, bytes, IO]):
+    with STAGE_SECONDS.time("handle", "parse"):
+        tree = load_yaml(yaml_content)
+    return tree, estimate_size(tree)
+
+
+# Parse-once documents: later requests refer to the parsed tree by handle
+@app.post("/handles", status_code=201, summary="Parse a YAML document once for later requests")
+async def CREATE_HANDLE(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(..., description="YAML file to parse")
+):
     """
-    Add a new configuration to the PostgreSQL database.
+    Returns a handle that /compare-schemas, /configs/, /documents and /handles/{handle}/validation
+    accept in place of the document, until it goes unused for HANDLE_TTL seconds. Handles are
+    held by the worker process that parsed the document. Content that is already held gets its
+    existing handle back (200) without being parsed again.
     """
-    conn = get_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
+    document_hash = await hash_upload(file)
+    document = handles.find(document_hash)
+    if document:
+        response.status_code = 200
+        return document.summary(handles.ttl)
+
+    size = upload_size(file)
+    yaml_content = await upload_source(file, picklable=cpu_executor.needs_pickling(size))
+    try:
+        tree, memory = await run_cpu(parse_for_handle, yaml_content, size=size, request=request)
+    except ExecutionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except YAMLLimitExceeded as e:
+        raise HTTPException(status_code=413, detail=describe_yaml_error(e))
+    except YAMLError as e:
+        raise HTTPException(status_code=400, detail=f"YAML Parsing Error: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+    return handles.add(document_hash, tree, size, memory).summary(handles.ttl)
+
+
+@app.get("/handles/{handle}", summary="Check that a document handle is still held")
+async def GET_HANDLE(handle: str = Path(..., pattern=HANDLE_PATTERN)):
+    return get_handle(handle).summary(handles.ttl)
+
+
+@app.get("/handles/{handle}/validation", summary="Validate a parsed document by handle")
+async def VALIDATE_HANDLE(
+    handle: str = Path(..., pattern=HANDLE_PATTERN),
+    mode: ValidationMode = Query("first", description="first: best error, all: every error, boolean: valid or not"),
+    max_errors: int = Query(MAX_VALIDATION_ERRORS, ge=1, le=MAX_VALIDATION_ERRORS, description="Cap on errors reported in 'all' mode"),
+    schema: Optional[str] = Query(None, pattern=SCHEMA_NAME_PATTERN, description="Registry schema to validate against; the built-in SCHEMA when omitted"),
+    version: Optional[int] = Query(None, ge=1, description="Registry schema version; the latest when omitted")
+):
+    """
+    Same result as /validate for the document's content. It is computed on the first
+    request for each schema, mode and max_errors and kept with the document.
+    """
+    document = get_handle(handle)
+    resolved = await resolve_registry_schema(schema, version)
+    return with_schema_info(await run_in_threadpool(validate_handle, document, resolved, mode, max_errors), resolved)
+
+
+# Background jobs: submission returns a job ID; results are fetched from /jobs/{job_id}
+JobPriority = Literal[tuple(JOB_PRIORITIES)]
+JOB_ID_PATTERN = r"^[0-9a-f]{32}$"
+
+# Jobs are limited per caller address; a header the caller picks could dodge the limit
+def job_client(request: Request) -> str:
+    return request.client.host if request.client else "anonymous"
+
+# priority=high jumps the queue, so it needs JOB_PRIORITY_TOKEN in the X-Job-Priority-Token header
+def check_job_priority(request: Request, priority: str):
+    if priority != "high":
+        return
+    token = request.headers.get("x-job-priority-token", "")
+    if not JOB_PRIORITY_TOKEN or not hmac.compare_digest(token.encode(), JOB_PRIORITY_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="priority=high needs a valid X-Job-Priority-Token header")
+
+# Uploads are spooled to the job directory, so queued jobs don't hold them in memory
+async def spool_uploads(*files: UploadFile) -> List[str]:
+    paths = []
+    try:
+        for file in files:
+            paths.append(await run_in_threadpool(jobs.store.spool, file.file))
+    except OSError as e:
+        for path in paths:
+            discard(path)
+        raise HTTPException(status_code=503, detail=f"Could not store job: {e}")
+    return paths
+
+def submit_job(request: Request, kind: str, func, *args, priority: str = "normal", payloads: Sequence[str] = ()):
+    try:
+        job = jobs.submit(kind, func, *args, client=job_client(request), priority=priority, payloads=payloads)
+    except JobRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return {"job_id": job["id"], "status": job["status"], "status_url": f"/jobs/{job['id']}"}
+
+# Job bodies: read the spooled uploads, since the request is gone by the time they run
+def compare_files_job(path1: str, path2: str, name1: str, name2: str, engine: str, ordered: bool):
+    with open(path1, "rb") as file1, open(path2, "rb") as file2:
+        return jsonable_encoder(compare_yaml_schemas(file1, file2, name1, name2, engine, ordered))
+
+def validate_batch_job(path: str, filename: Optional[str], mode: str, max_errors: int):
+    with open(path, "rb") as f:
+        content = f.read()
+    return extract_and_validate_batch(content, filename, mode, max_errors)
+
+
+@app.post("/jobs/compare-schema-files", status_code=202, summary="Compare two YAML schema files in the background")
+async def COMPARE_SCHEMA_FILES_JOB(
+    request: Request,
+    file1: UploadFile = File(..., description="First YAML schema file"),
+    file2: UploadFile = File(..., description="Second YAML schema file"),
+    engine: DiffEngine = Query("structural", description="structural: JSON-Patch-style operations, deepdiff: DeepDiff report"),
+    ordered: bool = Query(False, description="Treat list order as significant"),
+    priority: JobPriority = Query("normal", description="Queue priority")
+):
+    """
+    Same comparison as /compare-schema-files, for inputs that take longer than a request may.
+    """
+    check_job_priority(request, priority)
+    paths = await spool_uploads(file1, file2)
+    return submit_job(request, "compare-schema-files", compare_files_job, *paths,
+                      file1.filename or "Schema 1", file2.filename or "Schema 2", engine, ordered,
+                      priority=priority, payloads=paths)
+
+
+@app.post("/jobs/validate/batch", status_code=202, summary="Validate a batch of YAML documents in the background")
+async def VALIDATE_BATCH_JOB(
+    request: Request,
+    file: UploadFile = File(..., description="Multi-document YAML, tar/zip archive or JSON array"),
+    mode: ValidationMode = Query("first", description="first: best error, all: every error, boolean: valid or not"),
+    max_errors: int = Query(MAX_VALIDATION_ERRORS, ge=1, le=MAX_VALIDATION_ERRORS, description="Cap on errors per document in 'all' mode"),
+    priority: JobPriority = Query("normal", description="Queue priority")
+):
+    """
+    Same validation as /validate/batch, for batches that take longer than a request may.
+    """
+    check_job_priority(request, priority)
+    paths = await spool_uploads(file)
+    return submit_job(request, "validate-batch", validate_batch_job,
+                      *paths, file.filename, mode, max_errors, priority=priority, payloads=paths)
+
+
+@app.get("/jobs/{job_id}", summary="Get a background job's status and result")
+async def GET_JOB(job_id: str = Path(..., pattern=JOB_ID_PATTERN)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/jobs/{job_id}/events", summary="Stream a background job's status changes")
+async def JOB_EVENTS(job_id: str = Path(..., pattern=JOB_ID_PATTERN)):
+    """
+    Server-sent events: one `data:` line with the job record per status change, ending
+    once the job is done or failed.
+    """
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def events():
+        async for job in jobs.watch(job_id):
+            yield f"data: {json.dumps(job, default=str)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+# Stores a new version of a named schema
+@app.post("/schemas/{name}", status_code=201, summary="Store a new version of a named JSON Schema")
+async def CREATE_SCHEMA(
+    name: str = Path(..., pattern=SCHEMA_NAME_PATTERN),
+    schema: Dict[str, Any] = Body(..., description="JSON Schema document")
+):
+    """
+    Check the JSON Schema against its metaschema and store it as the next version of `name`.
+    """
+    try:
+        # Compiling also leaves the validator warm in this worker
+        get_validator(schema)
+    except jsonschema.SchemaError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Schema: {e.message}")
+    try:
+        record = await database.insert_schema(name, schema, schema_hash(schema))
+    except Exception as e:
+        raise database_http_error(e)
+    schema_resolver.invalidate()
+    return record
+
+
+# Lists every schema with its latest version
+@app.get("/schemas", summary="List registry schemas")
+async def LIST_SCHEMAS():
+    try:
+        return await database.list_schemas()
+    except Exception as e:
+        raise database_http_error(e)
+
+
+# Retrieves a schema, the latest version unless one is given
+@app.get("/schemas/{name}", summary="Get a registry schema")
+async def GET_SCHEMA(
+    name: str = Path(..., pattern=SCHEMA_NAME_PATTERN),
+    version: Optional[int] = Query(None, ge=1, description="Latest when omitted")
+):
+    try:
+        record = await database.get_schema(name, version)
+    except Exception as e:
+        raise database_http_error(e)
+    if not record:
+        raise HTTPException(status_code=404, detail="Schema not found")
+    return record
+
+
+# Lists the stored versions of a schema
+@app.get("/schemas/{name}/versions", summary="List the versions of a registry schema")
+async def LIST_SCHEMA_VERSIONS(name: str = Path(..., pattern=SCHEMA_NAME_PATTERN)):
+    try:
+        versions = await database.list_schema_versions(name)
+    except Exception as e:
+        raise database_http_error(e)
+    if not versions:
+        raise HTTPException(status_code=404, detail="Schema not found")
+    return versions
+
+
+# Deletes one version of a schema, or all of them
+@app.delete("/schemas/{name}", summary="Delete a registry schema or one of its versions")
+async def DELETE_SCHEMA(
+    name: str = Path(..., pattern=SCHEMA_NAME_PATTERN),
+    version: Optional[int] = Query(None, ge=1, description="Every version when omitted")
+):
+    try:
+        deleted = await database.delete_schema(name, version)
+    except Exception as e:
+        raise database_http_error(e)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Schema not found")
+    schema_resolver.invalidate()
+    return {"message": f"Deleted {name} version(s) {', '.join(map(str, deleted))}."}
+
+
+# Parses and validates an upload for storage; returns the result and the parsed tree
+def parse_for_storage(yaml_content: Union[str, bytes, IO], schema: Optional[Dict[str, Any]] = None,
+                      key: Optional[str] = None):
+    try:
+        with STAGE_SECONDS.time("store", "parse"):
+            document = load_yaml(yaml_content)
+    except YAMLError as e:
+        return {"is_valid": False, **describe_yaml_error(e)}, None
+    with STAGE_SECONDS.time("store", "schema"):
+        return validate_parsed_document(document, get_validator(schema, key), "all"), document
+
+
+# Stores a validated document as JSON, deduplicated by the hash of its source
+@app.post("/documents", status_code=201, summary="Validate a YAML document and store it as JSON")
+async def STORE_DOCUMENT(
+    request: Request,
+    response: Response,
+    file: Optional[UploadFile] = File(None, description="YAML file to validate and store"),
+    handle: Optional[str] = Query(None, pattern=HANDLE_PATTERN, description="Handle from POST /handles to store instead of a file"),
+    schema: Optional[str] = Query(None, pattern=SCHEMA_NAME_PATTERN, description="Registry schema to validate against; the built-in SCHEMA when omitted"),
+    version: Optional[int] = Query(None, ge=1, description="Registry schema version; the latest when omitted")
+):
+    """
+    Saves the parsed tree as JSONB, alongside the upload's hash and the schema it passed.
+    A document already stored for the same schema is returned (200) without being parsed
+    or validated again. Invalid documents are rejected with 422 and every violation.
+    With a handle, the document's parsed tree and validation result are reused.
+    """
+    if (file is None) == (handle is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of file and handle")
+    parsed = get_handle(handle) if handle else None
+    resolved = await resolve_registry_schema(schema, version)
+    schema_key = resolved.hash if resolved else default_schema_key()
+    document_hash = parsed.content_hash if parsed else await hash_upload(file)
+    try:
+        existing = await database.find_document(document_hash, resolved.name if resolved else None,
+                                                resolved.version if resolved else None, schema_key)
+    except Exception as e:
+        raise database_http_error(e)
+    if existing:
+        response.status_code = 200
+        return {"stored": False, **existing}
+
+    if parsed:
+        result = await run_in_threadpool(validate_handle, parsed, resolved, "all")
+        document = parsed.tree
+    else:
+        size = upload_size(file)
+        yaml_content = await upload_source(file, picklable=cpu_executor.needs_pickling(size))
+        try:
+            result, document = await run_cpu(parse_for_storage, yaml_content, resolved.schema if resolved else None,
+                                             resolved.hash if resolved else None, size=size, request=request)
+        except ExecutionError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+    if not result["is_valid"]:
+        raise HTTPException(status_code=422, detail=result)
+
+    try:
+        row, created = await database.store_document(document_hash, resolved.name if resolved else None,
+                                                     resolved.version if resolved else None, schema_key, document)
+    except Exception as e:
+        raise database_http_error(e)
+    if not created:
+        response.status_code = 200
+    return {"stored": created, **row}
+
+
+@app.get("/documents", summary="List stored documents, filtered and projected by schema fields")
+async def LIST_DOCUMENTS(
+    limit: int = Query(50, ge=1, le=500, description="Documents per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    schema: Optional[str] = Query(None, pattern=SCHEMA_NAME_PATTERN, description="Registry schema the documents passed; the built-in SCHEMA when omitted"),
+    version: Optional[int] = Query(None, ge=1, description="Only documents validated against this version"),
+    where: List[str] = Query([], description="field=value, e.g. address.city=Paris or hobbies=chess"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return instead of whole documents")
+):
+    """
+    Fields are the paths the schema declares (e.g. address.city); filter values are typed
+    accordingly and matched by containment, which the GIN index on the body serves.
+    """
+    resolved = await resolve_registry_schema(schema, version)
+    known = schema_fields(resolved.schema if resolved else SCHEMA)
+    try:
+        after = database.decode_cursor(cursor, "id")[1] if cursor else None
+        contains = [containment(expression, known) for expression in where]
+        paths = projection(fields.split(","), known) if fields else []
+    except (database.InvalidCursor, InvalidFilter) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        items, has_more = await database.list_documents(limit, after, resolved.name if resolved else None,
+                                                        version, contains, paths)
+    except Exception as e:
+        raise database_http_error(e)
+    return {
+        "items": items,
+        "next_cursor": database.encode_cursor(items[-1], "id") if has_more else None,
+    }
+
+
+@app.get("/documents/{document_id}", summary="Get a stored document")
+async def GET_DOCUMENT(document_id: int):
+    try:
+        record = await database.get_document(document_id)
+    except Exception as e:
+        raise database_http_error(e)
+    if not record:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return record
+
+
+# Translates data-layer failures into HTTP errors for the /configs routes
+def database_http_error(e: Exception) -> HTTPException:
+    if isinstance(e, DatabaseUnavailable):
+        return HTTPException(status_code=500, detail="Database connection failed")
+    if isinstance(e, DatabaseBusy):
+        return HTTPException(status_code=503, detail=f"Database busy: {str(e)}")
+    return HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+# Values tuple in the column order expected by the data layer
+def config_values(config: ConfigInput):
     # Stored as a list
     hobbies_list = config.hobbies.split(",") if config.hobbies else []
+    return (config.name, config.age, config.email, config.is_active,
+            hobbies_list, config.street, config.city, config.zip_code)
+
+
+# Readable messages for a ConfigInput validation failure
+def config_errors(e: ModelValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc']) or 'record'}: {error['msg']}" for error in e.errors()]
+
+
+# ConfigInput from a parsed document shaped like SCHEMA (address nested, hobbies a list)
+def config_from_document(document: Any) -> ConfigInput:
+    if not isinstance(document, dict):
+        raise ValueError("Document must be a mapping")
+    address = document.get("address")
+    address = address if isinstance(address, dict) else {}
+    hobbies = document.get("hobbies")
+    zip_code = address.get("zip_code")
+    return ConfigInput.model_validate({
+        **{key: document.get(key) for key in ("name", "age", "email", "is_active")},
+        "hobbies": ",".join(map(str, hobbies)) if isinstance(hobbies, list) else hobbies,
+        "street": address.get("street"),
+        "city": address.get("city"),
+        "zip_code": str(zip_code) if zip_code is not None else None,
+    })
+
+
+# Used to add a new configuration in the database
+@app.post("/configs/")
+async def ADD_CONFIG(
+    config: Optional[ConfigInput] = None,
+    handle: Optional[str] = Query(None, pattern=HANDLE_PATTERN, description="Handle from POST /handles to store instead of a JSON body")
+):
+    """
+    Add a new configuration to the PostgreSQL database, from the JSON body or from a
+    parsed YAML document by handle.
+    """
+    if (config is None) == (handle is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of a configuration body and a handle")
+    if handle:
+        try:
+            config = config_from_document(get_handle(handle).tree)
+        except ModelValidationError as e:
+            raise HTTPException(status_code=422, detail=config_errors(e))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    try:
+        return await database.insert_config(config_values(config))
+    except Exception as e:
+        raise database_http_error(e)
     
-    # SQL query to insert data into the configs table
-    insert_sql = """
-        INSERT INTO configs (name, age, email, is_active, hobbies, street, city, zip_code)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING id, name, age, email, is_active, hobbies, street, city, zip_code;
+
+# Checks uploaded bulk records with ConfigInput; returns ((record number, values) pairs, per-row errors)
+def validate_bulk_records(stream, fmt: str):
+    valid, errors = [], []
+    for number, record, parse_error in iter_records(stream, fmt):
+        if parse_error:
+            errors.append({"row": number, "errors": [parse_error]})
+            continue
+        try:
+            config = ConfigInput.model_validate(record)
+        except ModelValidationError as e:
+            errors.append({"row": number, "errors": config_errors(e)})
+            continue
+        valid.append((number, config_values(config)))
+    return valid, errors
+
+
+# Used to add many configurations in one request
+@app.post("/configs/bulk", summary="Bulk-insert configurations from JSON lines or CSV")
+async def BULK_ADD_CONFIGS(
+    file: UploadFile = File(..., description="JSON lines or CSV file of configuration records"),
+    fmt: Optional[Literal["jsonl", "csv"]] = Query(None, alias="format", description="Detected from the filename when omitted"),
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000, description="Rows per multi-row INSERT"),
+    partial: bool = Query(False, description="Insert the valid rows and report the others instead of rejecting the upload")
+):
+    """
+    Validate every record with the ConfigInput model and insert them with batched
+    multi-row INSERTs inside a single transaction.
     """
-    values = (config.name, config.age, config.email, config.is_active, 
-              hobbies_list, config.street, config.city, config.zip_code)
+    fmt = fmt or detect_format(file.filename, file.content_type)
+    await file.seek(0)
+    try:
+        valid, errors = await run_in_threadpool(validate_bulk_records, file.file, fmt)
+    except BulkFormatError as e:
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
-    # Execute query and fetch new record
+    # All-or-nothing unless partial mode was requested
+    if errors and not partial:
+        raise HTTPException(status_code=422, detail={"message": "Upload contains invalid records, nothing was inserted",
+                                                     "errors": errors})
+
+    received, inserted = len(valid) + len(errors), []
+    if valid:
+        try:
+            inserted, failed = await database.bulk_insert_configs(valid, chunk_size, partial)
+        except Exception as e:
+            raise database_http_error(e)
+        errors += [{"row": number, "errors": [message]} for number, message in failed]
+        errors.sort(key=lambda error: error["row"])
+
+    return {
+        "received": received,
+        "inserted": len(inserted),
+        "failed": len(errors),
+        "ids": inserted,
+        "errors": errors,
+    }
+
+
+# Lists configurations a page at a time
+@app.get("/configs", summary="List configurations with cursor pagination and filters")
+async def LIST_CONFIGS(
+    limit: int = Query(50, ge=1, le=500, description="Configurations per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    sort: Literal["id", "updated_at"] = Query("id"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    city: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    email: Optional[str] = Query(None),
+    hobby: List[str] = Query([], description="Only configs listing every given hobby")
+):
+    """
+    List configurations using keyset pagination, so deep pages cost the same as the first.
+    Pass the returned next_cursor (with the same sort, order and filters) to get the next page.
+    """
+    try:
+        after = database.decode_cursor(cursor, sort) if cursor else None
+    except database.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(insert_sql, values)
-            new_record = cur.fetchone()  
-        return new_record
+        items, has_more = await database.list_configs(
+            limit, sort, order == "desc", after, city=city, is_active=is_active, email=email, hobbies=hobby
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    finally:
-        conn.close()
-    
+        raise database_http_error(e)
+    return {
+        "items": items,
+        "next_cursor": database.encode_cursor(items[-1], sort) if has_more else None,
+    }
+
+
+# Streams every configuration; declared before /configs/{ID} so "export" isn't read as an ID
+@app.get("/configs/export", summary="Export all configurations as NDJSON, CSV or YAML")
+async def EXPORT_CONFIGS(
+    fmt: Literal["ndjson", "csv", "yaml"] = Query("ndjson", alias="format"),
+    itersize: int = Query(EXPORT_ITERSIZE, ge=1, le=100000, description="Rows fetched per round trip to the database")
+):
+    """
+    Stream the configs table through a server-side cursor with constant memory.
+    The YAML format is a multi-document stream accepted by /validate/batch.
+    """
+    try:
+        export = await database.export_configs(itersize)
+    except Exception as e:
+        raise database_http_error(e)
+
+    async def body():
+        try:
+            yield header(export.columns, fmt)
+            async for rows in export.batches():
+                yield await run_in_threadpool(encode_batch, rows, export.columns, fmt)
+        finally:
+            export.close()
+
+    extension = "jsonl" if fmt == "ndjson" else fmt
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[fmt],
+                             headers={"Content-Disposition": f'attachment; filename="configs.{extension}"'})
+
 
 # Retrieve Configuration based on the ID
 @app.get("/configs/{ID}")
-def GET_CONFIG(ID: int):
+async def GET_CONFIG(ID: int):
     """
     Retrieve a configuration by its ID from the PostgreSQL database.
     """
-    conn = get_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
-    # SQL query to fetch the configuration details for the given ID
-    select_sql = """
-        SELECT id, name, age, email, is_active, hobbies, street, city, zip_code
-        FROM configs
-        WHERE id = %s;
-    """
-    # Execute the SQL query and fetch the record
     try:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(select_sql, (ID,))
-            record = cur.fetchone()
-        
-        # If no record is found, raise a 404 error
-        if not record:
-            raise HTTPException(status_code=404, detail="Config not found")
-
-        return record
-    except HTTPException:
-        raise
+        record = await database.get_config(ID)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    finally:
-        conn.close()
+        raise database_http_error(e)
+
+    # If no record is found, raise a 404 error
+    if not record:
+        raise HTTPException(status_code=404, detail="Config not found")
+    return record
 
 
 # Updates the Configuration of an ID
 @app.put("/configs/{ID}")
-def UPDATE_CONFIG(ID: int, config: ConfigInput):
+async def UPDATE_CONFIG(ID: int, config: ConfigInput):
     """
     Update an existing configuration by ID in the PostgreSQL database.
     """
-    conn = get_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
-    # Convert hobbies string to a list if provided
-    hobbies_list = config.hobbies.split(",") if config.hobbies else []
-
-    # SQL query to update the configuration details for the given ID
-    update_sql = """
-        UPDATE configs
-        SET
-            name = %s,
-            age = %s,
-            email = %s,
-            is_active = %s,
-            hobbies = %s,
-            street = %s,
-            city = %s,
-            zip_code = %s,
-            updated_at = NOW()
-        WHERE id = %s
-        RETURNING id, name, age, email, is_active, hobbies, street, city, zip_code;
-    """
-    values = (config.name, config.age, config.email, config.is_active, 
-              hobbies_list, config.street, config.city, config.zip_code, ID)
-
-    # Execute the SQL query and fetch the updated record
-    try:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(update_sql, values)
-            updated_record = cur.fetchone()
-
-        # If no record is updated, raise a 404 error
-        if not updated_record:
-            raise HTTPException(status_code=404, detail="Config not found")
-
-        return updated_record
-    except HTTPException:
-        raise
+    try:
+        updated_record = await database.update_config(ID, config_values(config))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    finally:
-        conn.close()
+        raise database_http_error(e)
+
+    # If no record is updated, raise a 404 error
+    if not updated_record:
+        raise HTTPException(status_code=404, detail="Config not found")
+    return updated_record
    
 
 # Deletes the configuration based on its ID
 @app.delete("/configs/{ID}")
-def DELETE_CONFIG(ID: int):
+async def DELETE_CONFIG(ID: int):
     """
     Delete a configuration by its ID from the PostgreSQL database.
     """
-    conn = get_connection()
-    if not conn:
-        raise HTTPException(status_code=500, detail="Database connection failed")
-    
-    # SQL query to delete the configuration and return the deleted ID
-    delete_sql = "DELETE FROM configs WHERE id = %s RETURNING id;"
-
-    # Execute the SQL query and check if a record was deleted
     try:
-        with conn.cursor() as cur:
-            cur.execute(delete_sql, (ID,))
-            deleted = cur.fetchone()
-
-        # If no record is deleted, raise a 404 error
-        if not deleted:
-            raise HTTPException(status_code=404, detail="Config not found")
-        
-        return {"message": f"Config with ID {ID} has been deleted."}
-    except HTTPException:
-        raise
+        deleted = await database.delete_config(ID)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    finally:
-        conn.close()
+        raise database_http_error(e)
+
+    # If no record is deleted, raise a 404 error
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Config not found")
+    return {"message": f"Config with ID {ID} has been deleted."}
 
 # For local development
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))  # Use PORT env var or default to 8000
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
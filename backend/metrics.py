@@ -0,0 +1,211 @@
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Metrics settings
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"  # Set to 0 to make every timer a no-op
+
+# Latency buckets in seconds, from half a millisecond to 10s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Payload buckets in bytes, 1 KiB to 64 MiB in powers of four
+SIZE_BUCKETS = tuple(1024 * 4 ** power for power in range(9))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# A collected sample: (metric name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram keyed by positional label values.
+
+    An observation is one bisect and three additions under a lock, so timers are
+    cheap enough to leave on everywhere.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        if not METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                if len(labelvalues) != len(self.labelnames):
+                    raise ValueError(f"{self.name} expects labels {self.labelnames}")
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, *labelvalues) -> _Timer:
+        """Context manager observing the seconds spent in its block."""
+        return _Timer(self, labelvalues)
+
+    def collect(self) -> Iterable[Sample]:
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labelvalues, series in sorted(snapshot.items()):
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _number(bound)}, cumulative
+            yield f"{self.name}_sum", labels, series[-2]
+            yield f"{self.name}_count", labels, series[-1]
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    """
+    Holds histograms plus callbacks that read live stats (pool, cache, executors) at scrape time.
+    """
+
+    def __init__(self):
+        self._histograms: List[Histogram] = []
+        self._collectors: List[Tuple[str, str, str, Callable[[], Iterable[Tuple[Dict[str, str], float]]]]] = []
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        histogram = Histogram(name, documentation, labelnames, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def collector(self, name: str, kind: str, documentation: str,
+                  read: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        """Register a gauge or counter whose (labels, value) samples are read on every scrape."""
+        self._collectors.append((name, kind, documentation, read))
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        for histogram in self._histograms:
+            lines.append(f"# HELP {histogram.name} {histogram.documentation}")
+            lines.append(f"# TYPE {histogram.name} histogram")
+            lines += [f"{name}{_labels(labels)} {_number(value)}" for name, labels, value in histogram.collect()]
+        for name, kind, documentation, read in self._collectors:
+            try:
+                samples = list(read())
+            except Exception as e:
+                # A broken source shouldn't take the whole scrape down
+                print(f"Metrics collector {name} failed: {e}")
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines += [f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry; with several uvicorn workers each one reports its own series
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "schema_validator_stage_seconds", "Time spent in each processing stage",
+    ("operation", "stage"))
+REQUEST_SECONDS = registry.histogram(
+    "schema_validator_request_seconds", "HTTP request latency by route",
+    ("method", "route", "status"))
+REQUEST_BODY_BYTES = registry.histogram(
+    "schema_validator_request_body_bytes", "Request body sizes by route",
+    ("method", "route"), buckets=SIZE_BUCKETS)
+DB_CONNECT_SECONDS = registry.histogram(
+    "schema_validator_db_connect_seconds", "Time to open a new PostgreSQL connection", ("outcome",))
+DB_QUERY_SECONDS = registry.histogram(
+    "schema_validator_db_query_seconds", "Database call time on the executor, pool checkout included",
+    ("operation",))
+
+
+def observe_since_request_start(request, operation: str, stage: str = "receive"):
+    """
+    Record the time from the request arriving to the handler starting: receiving the
+    body and multipart parsing, which FastAPI does before calling the endpoint.
+    """
+    started = request.scope.get("state", {}).get("metrics_started")
+    if started is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - started, operation, stage)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and records body sizes, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        scope.setdefault("state", {})["metrics_started"] = started
+        received = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, status_send)
+        finally:
+            # Unmatched paths share one label so scanners can't blow up the series count
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method, route, str(status))
+            if received:
+                REQUEST_BODY_BYTES.observe(received, method, route)
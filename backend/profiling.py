@@ -0,0 +1,255 @@
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Profiling settings; nothing is profiled unless PROFILE_DIR is set
+PROFILE_DIR = os.getenv("PROFILE_DIR")  # Where collapsed-stack profiles are written
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))  # Profile requests still running after this long (0 = off)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Fraction of requests profiled start to finish
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "x-profile").lower()  # Request header that asks for a profile
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")  # When set, the header must carry this value
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))  # Stack sampling period
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))  # Oldest profiles are deleted past this count
+
+# Leaf frames in these files are threads parked waiting for work, not doing it
+IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def collapse(frame, thread_name: str) -> str:
+    """A thread's stack as one collapsed-stack line key, outermost frame first."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    """Stack samples collected for one request."""
+
+    def __init__(self, trigger: str):
+        self.trigger = trigger
+        self.samples: Counter = Counter()
+        self.started = time.perf_counter()
+        self.active = False  # Set once sampling starts; armed sessions may never get there
+
+
+class StackSampler:
+    """
+    Samples the stacks of every thread at a fixed interval while at least one session is active.
+
+    The sampling thread only exists while something is being profiled or armed, so
+    requests that aren't profiled pay nothing. Sessions can be armed to start after a
+    delay; the deadline is checked by this thread rather than the event loop, which
+    may be busy running the very request that is slow. Every thread is sampled (event
+    loop, threadpool, database executor), which means concurrent requests show up in
+    each other's profiles; the profiles are meant for finding hot paths, not exact
+    attribution.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self._sessions = set()
+        self._armed = {}  # session -> perf_counter() deadline
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+        self._wake.notify()
+
+    def start(self, session: ProfileSession):
+        with self._lock:
+            session.active = True
+            self._sessions.add(session)
+            self._ensure_thread()
+
+    def arm(self, session: ProfileSession, delay: float):
+        """Start sampling for the session `delay` seconds from now, unless it is stopped first."""
+        with self._lock:
+            self._armed[session] = time.perf_counter() + delay
+            self._ensure_thread()
+
+    def stop(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.discard(session)
+            self._armed.pop(session, None)
+            # A copy the sampler never touches, safe to write out from another thread
+            session.samples = Counter(session.samples)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                now = time.perf_counter()
+                for session, deadline in list(self._armed.items()):
+                    if deadline <= now:
+                        del self._armed[session]
+                        session.active = True
+                        self._sessions.add(session)
+                if not self._sessions:
+                    if not self._armed:
+                        self._thread = None
+                        return
+                    self._wake.wait(min(self._armed.values()) - now)
+                    continue
+                sessions = list(self._sessions)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own or os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                stacks.append(collapse(frame, names.get(ident, str(ident))))
+            with self._lock:
+                for session in sessions:
+                    if session in self._sessions:
+                        session.samples.update(stacks)
+            time.sleep(self.interval)
+
+
+def _declared_length(scope) -> int:
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return 0
+    return 0
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_") or "root"
+
+
+def write_profile(directory: str, session: ProfileSession, details: dict, max_files: int = PROFILE_MAX_FILES):
+    """
+    Write `<stamp>-<method>-<route>-<bytes>b-<ms>ms.collapsed` (one "stack count" line per
+    stack, the input format of flamegraph.pl and speedscope) and a .json sidecar with the
+    request details. Returns the profile path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%S") + f"{time.time() % 1:.6f}"[1:]
+    name = f"{stamp}-{details['method']}-{_slug(details['route'])}-{details['body_bytes']}b-{round(details['duration_ms'])}ms"
+    path = os.path.join(directory, f"{name}.collapsed")
+    with open(path, "w") as handle:
+        for stack, count in session.samples.most_common():
+            handle.write(f"{stack} {count}\n")
+    with open(os.path.join(directory, f"{name}.json"), "w") as handle:
+        json.dump({**details, "trigger": session.trigger, "samples": sum(session.samples.values())}, handle, indent=2)
+
+    # Keep the directory bounded
+    profiles = sorted(entry for entry in os.listdir(directory) if entry.endswith(".collapsed"))
+    for old in profiles[:max(0, len(profiles) - max_files)]:
+        for suffix in (".collapsed", ".json"):
+            try:
+                os.remove(os.path.join(directory, old[:-len(".collapsed")] + suffix))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when it carries the profile header, is picked by PROFILE_SAMPLE_RATE,
+    or is still running PROFILE_SLOW_MS after it started. A slow-request profile covers the
+    request from the moment it crossed the threshold, which is where the time went.
+
+    Unprofiled requests cost a header scan, a random() call and, with a threshold, a
+    deadline for the sampler thread to watch.
+    """
+
+    def __init__(self, app, directory: Optional[str] = PROFILE_DIR, slow_ms: float = PROFILE_SLOW_MS,
+                 sample_rate: float = PROFILE_SAMPLE_RATE, header: str = PROFILE_HEADER,
+                 token: Optional[str] = PROFILE_TOKEN, sampler: Optional[StackSampler] = None):
+        self.app = app
+        self.directory = directory
+        self.slow = slow_ms / 1000
+        self.sample_rate = sample_rate
+        self.header = header.encode("latin-1")
+        self.token = token
+        self.sampler = sampler or StackSampler()
+
+    def _trigger(self, scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                if self.token is None or hmac.compare_digest(value, self.token.encode("latin-1")):
+                    return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.directory:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        session = None
+        trigger = self._trigger(scope)
+        if trigger:
+            session = ProfileSession(trigger)
+            self.sampler.start(session)
+
+        elif self.slow > 0:
+            # Armed on the sampler thread: with inline execution the slow work blocks the
+            # event loop, so a loop timer couldn't fire until the request had finished
+            session = ProfileSession("slow")
+            self.sampler.arm(session, self.slow)
+
+        received = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, status_send)
+        finally:
+            if session is not None:
+                self.sampler.stop(session)
+                if session.active:
+                    details = {
+                        "method": scope["method"],
+                        "route": getattr(scope.get("route"), "path", None) or scope["path"],
+                        "path": scope["path"],
+                        "status": status,
+                        # The declared length also covers bodies the endpoint never read
+                        "body_bytes": max(received, _declared_length(scope)),
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    }
+                    # Written off the event loop; a failed write only loses the profile
+                    loop = asyncio.get_running_loop()
+                    loop.run_in_executor(None, self._write, session, details)
+
+    def _write(self, session: ProfileSession, details: dict):
+        try:
+            write_profile(self.directory, session, details)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"Could not write profile for {details['path']}: {e}")
@@ -0,0 +1,85 @@
+import os
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from backend import database
+from backend.validators import registry as validator_registry
+
+# Schema registry settings
+SCHEMA_REGISTRY_POLL = float(os.getenv("SCHEMA_REGISTRY_POLL", "2"))  # Seconds between change checks per worker
+
+# Names end up in URLs and cache keys
+SCHEMA_NAME_PATTERN = r"^[A-Za-z0-9_.-]{1,100}$"
+
+
+class SchemaNotFound(Exception):
+    """Raised when the requested schema (or schema version) isn't in the registry."""
+
+
+class ResolvedSchema(NamedTuple):
+    name: str
+    version: int
+    schema: Dict[str, Any]
+    hash: str
+
+
+class SchemaResolver:
+    """
+    Resolves (name, version) to a stored schema, caching what it has seen in this worker.
+
+    Stored versions never change, so cached entries stay correct until something is
+    created or deleted. Every write bumps a generation counter in the database; the
+    resolver reads that single row at most once per `poll_interval` and drops its
+    cache when it moved. Compiled validators live in the shared ValidatorRegistry,
+    keyed by content hash, so a refresh doesn't recompile unchanged schemas.
+    """
+
+    def __init__(self, poll_interval: float = SCHEMA_REGISTRY_POLL):
+        self.poll_interval = poll_interval
+        self._entries: Dict[Tuple[str, Optional[int]], ResolvedSchema] = {}
+        self._generation: Optional[int] = None
+        self._checked_at = float("-inf")
+
+    async def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.poll_interval:
+            return
+        generation = await database.schema_generation()
+        self._checked_at = now
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def invalidate(self):
+        """Forget everything; the next lookup re-reads the generation."""
+        self._entries.clear()
+        self._checked_at = float("-inf")
+
+    async def resolve(self, name: str, version: Optional[int] = None) -> ResolvedSchema:
+        await self._refresh()
+        cached = self._entries.get((name, version))
+        if cached is not None:
+            return cached
+        row = await database.get_schema(name, version)
+        if row is None:
+            missing = f"Schema {name!r}" + (f" version {version}" if version is not None else "")
+            raise SchemaNotFound(f"{missing} not found")
+        resolved = ResolvedSchema(row["name"], row["version"], row["body"], row["schema_hash"].strip())
+        self._entries[(name, version)] = resolved
+        self._entries[(name, resolved.version)] = resolved
+        return resolved
+
+    def validator(self, resolved: ResolvedSchema):
+        return validator_registry.get(resolved.schema, resolved.hash)
+
+    async def warm(self) -> int:
+        """Load and compile the latest version of every stored schema."""
+        count = 0
+        for summary in await database.list_schemas():
+            self.validator(await self.resolve(summary["name"]))
+            count += 1
+        return count
+
+
+# Process-wide resolver used by the API
+resolver = SchemaResolver()
@@ -0,0 +1,93 @@
+"""
+Startup sequencing. In `blocking` mode the app only reports ready once the database
+is bootstrapped and validators are compiled; in `background` mode (meant for scale-to-zero
+deployments) it serves at once and the same steps run behind it.
+
+Running `python -m backend.startup` applies the DDL out of band, e.g. as a deploy step
+before starting servers with STARTUP_DDL=0.
+"""
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Startup settings
+STARTUP_MODE = os.getenv("STARTUP_MODE", "blocking")  # blocking | background
+STARTUP_DDL = os.getenv("STARTUP_DDL", "1") != "0"  # 0 when the tables are created out of band
+
+STARTUP_MODES = ("blocking", "background")
+
+Step = Tuple[str, Callable[[], Awaitable[object]]]
+
+
+class Startup:
+    """
+    Runs named startup steps in order, inline or as a background task, and records
+    how long each took. A failing step is reported and the next one still runs.
+    """
+
+    def __init__(self, mode: str = STARTUP_MODE):
+        if mode not in STARTUP_MODES:
+            raise ValueError(f"Unknown STARTUP_MODE {mode!r}, expected one of {STARTUP_MODES}")
+        self.mode = mode
+        self.steps: Dict[str, float] = {}  # Step name -> seconds
+        self.failed: List[str] = []
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._finished is not None
+
+    async def run(self, steps: List[Step]):
+        self._started = time.perf_counter()
+        if self.mode == "blocking":
+            await self._run(steps)
+        else:
+            self._task = asyncio.ensure_future(self._run(steps))
+
+    async def _run(self, steps: List[Step]):
+        for name, step in steps:
+            started = time.perf_counter()
+            try:
+                await step()
+            except Exception as e:
+                print(f"Warning: startup step {name} failed: {e}")
+                self.failed.append(name)
+            self.steps[name] = round(time.perf_counter() - started, 4)
+        self._finished = time.perf_counter()
+        print(f"Startup: warm-up finished in {self._finished - self._started:.2f}s ({self.mode}).")
+
+    async def wait(self):
+        """Until every step has run (returns at once in blocking mode)."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "ready": self.ready,
+            "seconds": round((self._finished or time.perf_counter()) - self._started, 4),
+            "steps": dict(self.steps),
+            "failed": list(self.failed),
+        }
+
+
+# Process-wide startup state, reported by /health
+startup = Startup()
+
+
+if __name__ == "__main__":
+    from backend import database
+
+    database._create_tables()
+    print("Tables and indexes created or already exist.")
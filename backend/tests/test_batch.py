@@ -0,0 +1,129 @@
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+import yaml
+from fastapi.testclient import TestClient
+
+from backend import batch
+from backend.batch import BatchError, extract_documents
+from backend.main import app
+
+client = TestClient(app)
+
+VALID = "name: John Doe\nage: 25\nemail: john@example.com\n"
+INVALID = "name: Jane Doe\nage: -3\nemail: jane@example.com\n"
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, text in files.items():
+            archive.writestr(name, text)
+    return buffer.getvalue()
+
+
+def make_tar(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, text in files.items():
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_extract_yaml_stream_keeps_broken_documents_separate():
+    stream = f"---\n{VALID}---\nnot: [valid\n---\n{INVALID}".encode()
+    documents = extract_documents(stream, "configs.yaml")
+    assert [doc.key for doc in documents] == ["0", "1", "2"]
+
+
+def test_extract_yaml_stream_skips_empty_stretches_and_keeps_directives():
+    stream = f"---\n# nothing\n---\n{VALID}...\n%YAML 1.1\n---\n{INVALID}---\nbroken: [\n".encode()
+    documents = extract_documents(stream)
+    assert [doc.content for doc in documents] == [
+        f"---\n{VALID}", f"%YAML 1.1\n---\n{INVALID}", "---\nbroken: [\n"]
+
+
+def test_extract_stops_at_the_limit_with_broken_documents(monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_MAX_DOCUMENTS", 2)
+    parsed, parse = [], yaml.parse
+    monkeypatch.setattr(yaml, "parse", lambda *args, **kwargs: parsed.append(1) or parse(*args, **kwargs))
+    with pytest.raises(BatchError):
+        extract_documents(b"---\na: [\n" * 100)
+    assert len(parsed) == 3
+
+
+def test_extract_archives_keyed_by_filename():
+    files = {"a.yaml": VALID, "nested/b.yml": INVALID, "README.md": "ignored"}
+    for data, filename in ((make_zip(files), "configs.zip"), (make_tar(files), "configs.tar.gz")):
+        documents = extract_documents(data, filename)
+        assert sorted(doc.key for doc in documents) == ["a.yaml", "nested/b.yml"]
+
+
+def test_extract_json_array_mixes_text_and_objects():
+    documents = extract_documents(json.dumps([VALID, {"name": "X"}]).encode())
+    assert [(doc.key, doc.parsed) for doc in documents] == [("0", False), ("1", True)]
+
+
+def test_extract_rejects_oversized_batches(monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_MAX_DOCUMENTS", 2)
+    with pytest.raises(BatchError) as excinfo:
+        extract_documents(f"{VALID}---\n{VALID}---\n{VALID}".encode())
+    assert excinfo.value.status_code == 413
+
+
+def test_batch_endpoint_reports_per_document_results():
+    files = {"file": ("batch.zip", make_zip({"good.yaml": VALID, "bad.yaml": INVALID}), "application/zip")}
+    response = client.post("/validate/batch", files=files)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["total"], result["valid"], result["invalid"]) == (2, 1, 1)
+    assert result["results"]["good.yaml"]["is_valid"] is True
+    assert "minimum" in result["results"]["bad.yaml"]["error"]
+
+
+def test_batch_endpoint_refuses_oversized_streams(monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_MAX_DOCUMENTS", 2)
+    response = client.post("/validate/batch", files={"file": ("batch.yaml", b"---\na: [\n" * 10)})
+    assert response.status_code == 413
+    response = client.post("/validate/batch", files={"file": ("batch.yaml", b"\xff\xfe not utf-8")})
+    assert response.status_code == 400
+
+
+def test_batch_endpoint_accepts_json_array():
+    payload = json.dumps([{"name": "John Doe", "age": 25, "email": "john@example.com"}, "age: x"])
+    response = client.post("/validate/batch", files={"file": ("batch.json", payload.encode(), "application/json")})
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert results["0"]["is_valid"] is True
+    assert results["1"]["is_valid"] is False
+
+
+def test_batch_endpoint_all_errors_mode():
+    payload = json.dumps([{"age": -1}])
+    response = client.post("/validate/batch?mode=all", files={"file": ("batch.json", payload.encode())})
+    assert response.status_code == 200, response.text
+    errors = response.json()["results"]["0"]["errors"]
+    assert {error["path"] for error in errors} == {"/age", ""}
+
+
+@pytest.mark.parametrize("stream, expected", [
+    ("--- {a: 1}\n--- {a: 2}\n", [{"a": 1}, {"a": 2}]),
+    ("a: 1\n...\n--- !!map\na: 2\n...\n", [{"a": 1}, {"a": 2}]),
+    ("---\n---\na: 1\n", [{"a": 1}]),
+    ("a: 1\n--- [broken\n--- {a: 3}\n", [{"a": 1}, None, {"a": 3}]),
+])
+def test_extract_yaml_stream_splits_on_document_events(stream, expected):
+    documents = extract_documents(stream.encode())
+    parsed = []
+    for document in documents:
+        try:
+            parsed.append(yaml.safe_load(document.content))
+        except yaml.YAMLError:
+            parsed.append(None)
+    assert parsed == expected
@@ -0,0 +1,74 @@
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import bulk, database
+from backend.bulk import BulkFormatError, detect_format, iter_records
+from backend.main import app
+
+client = TestClient(app)
+
+GOOD = {"name": "John Doe", "age": 25, "email": "john@example.com"}
+BAD = {"name": "Jane Doe", "age": -3, "email": "jane@example.com"}
+
+
+def jsonl(*records):
+    return "\n".join(json.dumps(record) for record in records).encode()
+
+
+def test_detect_format():
+    assert detect_format("configs.CSV", None) == "csv"
+    assert detect_format("upload", "text/csv; charset=utf-8") == "csv"
+    assert detect_format("configs.jsonl", "application/octet-stream") == "jsonl"
+
+
+def test_jsonl_records_are_numbered_by_line():
+    data = jsonl(GOOD) + b"\n\nnot json\n[1, 2]\n"
+    records = list(iter_records(io.BytesIO(data), "jsonl"))
+    assert [(number, error is None) for number, _, error in records] == [(1, True), (3, False), (4, False)]
+    assert records[0][1] == GOOD
+
+
+def test_csv_blank_cells_are_missing_values():
+    data = b"name,age,email,city\nJohn Doe,25,john@example.com,\n"
+    [(number, record, error)] = list(iter_records(io.BytesIO(data), "csv"))
+    assert (number, error) == (1, None)
+    assert record == {"name": "John Doe", "age": "25", "email": "john@example.com", "city": None}
+
+
+def test_row_cap_and_undecodable_uploads(monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_MAX_ROWS", 1)
+    with pytest.raises(BulkFormatError):
+        list(iter_records(io.BytesIO(jsonl(GOOD, GOOD)), "jsonl"))
+    with pytest.raises(BulkFormatError):
+        list(iter_records(io.BytesIO(b"\xff\xfe"), "jsonl"))
+
+
+def test_invalid_rows_reject_the_whole_upload(monkeypatch):
+    async def fail_insert(*args):
+        raise AssertionError("nothing should be inserted")
+    monkeypatch.setattr(database, "bulk_insert_configs", fail_insert)
+
+    response = client.post("/configs/bulk", files={"file": ("configs.jsonl", jsonl(GOOD, BAD))})
+    assert response.status_code == 422, response.text
+    assert [error["row"] for error in response.json()["detail"]["errors"]] == [2]
+
+
+def test_partial_mode_inserts_valid_rows(monkeypatch):
+    calls = []
+
+    async def fake_insert(records, chunk_size, partial):
+        calls.append((records, chunk_size, partial))
+        return [101], []
+    monkeypatch.setattr(database, "bulk_insert_configs", fake_insert)
+
+    data = b"name,age,email\nJohn Doe,25,john@example.com\nJane Doe,-3,jane@example.com\n"
+    response = client.post("/configs/bulk?partial=true&chunk_size=50", files={"file": ("configs.csv", data)})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["received"], result["inserted"], result["failed"], result["ids"]) == (2, 1, 1, [101])
+    assert result["errors"][0]["row"] == 2
+    [(records, chunk_size, partial)] = calls
+    assert [number for number, _ in records] == [1] and (chunk_size, partial) == (50, True)
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.cache import FileCacheBackend, ResultCache, comparison_key, result_cache, validation_key
+from backend.main import app
+
+client = TestClient(app)
+
+VALID_YAML = b"name: Cache Test\nage: 41\nemail: cache@example.com\n"
+
+
+def test_lru_eviction_respects_byte_budget():
+    entry = {"value": "x" * 100}
+    size = len(json.dumps(entry))
+    cache = ResultCache(max_bytes=size * 2, ttl=60)
+    cache.set("a", entry)
+    cache.set("b", entry)
+    assert cache.get("a") == entry  # Touch "a" so "b" is the least recently used
+    cache.set("c", entry)
+    assert cache.get("b") is None
+    assert cache.get("a") == entry and cache.get("c") == entry
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= size * 2
+
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(max_bytes=1024, ttl=0)
+    cache.set("a", {"v": 1})
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_hits_return_independent_copies():
+    cache = ResultCache(max_bytes=1024, ttl=60)
+    cache.set("a", {"items": [1]})
+    cache.get("a")["items"].append(2)
+    assert cache.get("a") == {"items": [1]}
+
+
+def test_keys_change_with_schema_and_order():
+    assert validation_key("doc", "schema-v1") != validation_key("doc", "schema-v2")
+    assert comparison_key("a", "b") != comparison_key("b", "a")
+
+
+def test_file_backend_shares_entries_between_caches(tmp_path):
+    backend = FileCacheBackend(str(tmp_path), ttl=60)
+    ResultCache(max_bytes=1024, ttl=60, backend=backend).set("shared", {"v": 1})
+    other_worker = ResultCache(max_bytes=1024, ttl=60, backend=FileCacheBackend(str(tmp_path), ttl=60))
+    assert other_worker.get("shared") == {"v": 1}
+    assert other_worker.stats()["hits"] == 1
+
+
+def test_validate_serves_repeat_uploads_from_cache(monkeypatch):
+    result_cache.clear()
+    client.post("/validate", files={"file": ("a.yaml", VALID_YAML)})
+
+    def fail(*args, **kwargs):
+        raise AssertionError("document was validated again")
+
+    monkeypatch.setattr(main, "VALIDATE_YAML", fail)
+    response = client.post("/validate", files={"file": ("renamed.yaml", VALID_YAML)})
+    assert response.status_code == 200, response.text
+    assert response.json()["is_valid"] is True
+
+
+def test_cached_comparison_keeps_request_names():
+    result_cache.clear()
+    hits = result_cache.stats()["hits"]
+    body = {"schema1_content": "a: 1\n", "schema2_content": "a: 2\n", "schema1_name": "first"}
+    first = client.post("/compare-schemas", json=body).json()
+    second = client.post("/compare-schemas", json={**body, "schema1_name": "renamed"}).json()
+    assert second["schema1_name"] == "renamed"
+    assert second["patch"] == first["patch"]
+    assert result_cache.stats()["hits"] == hits + 1
+
+
+def test_file_backend_prunes_expired_and_oversized_entries(tmp_path):
+    backend = FileCacheBackend(str(tmp_path), ttl=60, max_bytes=250, prune_interval=3600)
+    for index in range(5):
+        backend.set(f"key{index}", "x" * 100)
+        os.utime(backend._path(f"key{index}"), (time.time() - 10 + index,) * 2)
+    os.utime(backend._path("key0"), (time.time() - 120,) * 2)  # Expired, never read again
+    assert backend.prune() == 3
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(backend._path(key)) for key in ("key3", "key4"))
@@ -0,0 +1,117 @@
+import itertools
+import os
+
+import pytest
+from jsonschema.validators import validator_for
+
+from backend.Schema import SCHEMA
+from backend.codegen import CODEGEN_VERSION, UnsupportedSchema, compile_schema, generate_source
+from backend.validators import ValidatorRegistry, collect_errors, schema_hash
+
+# Values of every JSON type, including the bool/number and int/float edge cases
+SCALARS = [None, True, False, 0, 1, -1, 2.0, 2.5, -0.5, "", "a", "abc", "john@example.com", "12345"]
+CONTAINERS = [[], [1, 2], ["a", "b"], [1, "a"], [[1]], {}, {"a": 1}, {"name": "x"}, {"a": "x", "b": 2}]
+VALUES = SCALARS + CONTAINERS
+
+KEYWORD_SCHEMAS = [
+    {"type": "integer"},
+    {"type": "number", "minimum": 0, "exclusiveMaximum": 2.5},
+    {"type": ["string", "null"], "minLength": 1, "maxLength": 3},
+    {"pattern": "^[a-z]+$"},
+    {"enum": [1, "a", None, [1, 2], {"a": 1}]},
+    {"const": True},
+    {"const": 1},
+    {"anyOf": [{"type": "string"}, {"type": "integer"}]},
+    {"oneOf": [{"type": "number"}, {"type": "integer"}]},
+    {"allOf": [{"minimum": 0}, {"maximum": 1}]},
+    {"not": {"type": "object"}},
+    {"type": "array", "items": {"type": "integer"}, "minItems": 1, "maxItems": 2},
+    {"items": False},
+    {"items": True, "properties": {"a": True}},
+    {"type": "object", "required": ["a"], "properties": {"a": {"type": "integer"}}, "additionalProperties": False},
+    {"properties": {"a": {"const": 1}}, "additionalProperties": {"type": "string"}, "minProperties": 1, "maxProperties": 1},
+    {"$schema": "http://json-schema.org/draft-07/schema#", "exclusiveMinimum": 0, "format": "email"},
+    True,
+    False,
+]
+
+# Documents around SCHEMA's edges: missing fields, wrong types, the zip_code anyOf
+BASE = {"name": "John Doe", "age": 25, "email": "john@example.com"}
+DOCUMENTS = [BASE, {}, [], "text", None,
+             {**BASE, "age": -1}, {**BASE, "age": 2.0}, {**BASE, "age": 2.5}, {**BASE, "age": True},
+             {**BASE, "is_active": 1}, {**BASE, "is_active": False},
+             {**BASE, "hobbies": []}, {**BASE, "hobbies": ["a", 1]}, {**BASE, "hobbies": "a"},
+             {**BASE, "address": {"street": "x", "city": "y"}}, {**BASE, "address": {"street": "x"}},
+             {**BASE, "address": {"street": "x", "city": "y", "zip_code": 12345}},
+             {**BASE, "address": {"street": "x", "city": "y", "zip_code": 1.5}},
+             {**BASE, "address": {"street": "x", "city": "y", "zip_code": None}},
+             {**BASE, "address": []}, {**BASE, "email": 5}, {**BASE, "extra": [1, 2]}]
+
+
+def reference(schema):
+    return validator_for(schema)(schema)
+
+
+@pytest.mark.parametrize("schema", KEYWORD_SCHEMAS, ids=lambda schema: str(schema)[:60])
+def test_keywords_match_reference(schema):
+    generated = compile_schema(schema, schema_hash(schema) if isinstance(schema, dict) else str(schema), cache_dir=None)
+    expected = reference(schema)
+    for value in itertools.chain(VALUES, [[value] for value in SCALARS]):
+        assert generated(value) is expected.is_valid(value), value
+
+
+def test_schema_matches_reference():
+    generated = compile_schema(SCHEMA, schema_hash(SCHEMA), cache_dir=None)
+    expected = reference(SCHEMA)
+    for document in DOCUMENTS:
+        assert generated(document) is expected.is_valid(document), document
+
+
+def test_generated_validator_reports_reference_errors():
+    interpreted = ValidatorRegistry(backend="jsonschema").get(SCHEMA)
+    generated = ValidatorRegistry(backend="codegen").get(SCHEMA)
+    for document in DOCUMENTS:
+        assert collect_errors(generated, document) == collect_errors(interpreted, document)
+
+
+@pytest.mark.parametrize("schema", [
+    {"$ref": "#/$defs/x", "$defs": {"x": {}}},
+    {"patternProperties": {"^a": {}}},
+    {"uniqueItems": True},
+    {"$schema": "http://json-schema.org/draft-04/schema#", "minimum": 1, "exclusiveMinimum": True},
+    {"$schema": "http://json-schema.org/draft-07/schema#", "items": [{"type": "string"}]},
+])
+def test_unsupported_keywords_fall_back(schema):
+    with pytest.raises(UnsupportedSchema):
+        generate_source(schema)
+    validator = ValidatorRegistry(backend="codegen").get(schema)
+    assert type(validator) is type(reference(schema))
+
+
+def test_generated_code_is_cached_on_disk(tmp_path):
+    key = schema_hash(SCHEMA)
+    compile_schema(SCHEMA, key, cache_dir=str(tmp_path))
+    [cached] = tmp_path.iterdir()
+    assert cached.name.startswith(key)
+
+    # A cached file is loaded instead of regenerating
+    cached.write_text("validate = lambda data: 'from cache'\n")
+    assert compile_schema(SCHEMA, key, cache_dir=str(tmp_path))(None) == "from cache"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        ValidatorRegistry(backend="fast")
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="needs POSIX ownership")
+def test_cache_others_can_write_to_is_not_loaded(tmp_path):
+    key = schema_hash(SCHEMA)
+    planted = tmp_path / f"{key}-v{CODEGEN_VERSION}.py"
+    planted.write_text("validate = lambda data: 'planted'\n")
+    tmp_path.chmod(0o777)
+    assert compile_schema(SCHEMA, key, cache_dir=str(tmp_path))(None) is False
+
+    tmp_path.chmod(0o700)
+    planted.chmod(0o666)
+    assert compile_schema(SCHEMA, key, cache_dir=str(tmp_path))(None) is False
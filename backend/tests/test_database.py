@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from psycopg2 import extensions
+
+from backend.database import ConnectionPool, DatabaseBusy, DatabaseExecutor, PoolTimeout
+
+
+class FakeConnection:
+    """
+    Minimal stand-in for a psycopg2 connection, enough for the pool's bookkeeping.
+    """
+
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = True
+        self.info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def make_pool(opened):
+    def factory(**kwargs):
+        def connect():
+            conn = FakeConnection()
+            opened.append(conn)
+            return conn
+        return ConnectionPool(connect=connect, **kwargs)
+    return factory
+
+
+def test_pool_reuses_returned_connections(make_pool, opened):
+    pool = make_pool(min_size=0, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert len(opened) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_pool_open_prefills_min_size(make_pool, opened):
+    pool = make_pool(min_size=2, max_size=4)
+    pool.open()
+    stats = pool.stats()
+    assert stats["idle"] == 2
+    assert stats["in_use"] == 0
+    assert len(opened) == 2
+
+
+def test_pool_times_out_when_exhausted(make_pool):
+    pool = make_pool(min_size=0, max_size=1)
+    conn = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn(timeout=0.05)
+    assert pool.stats()["timeouts"] == 1
+    pool.putconn(conn)
+
+
+def test_pool_waiter_gets_released_connection(make_pool):
+    pool = make_pool(min_size=0, max_size=1)
+    conn = pool.getconn()
+    threading.Timer(0.05, pool.putconn, args=(conn,)).start()
+    assert pool.getconn(timeout=2) is conn
+    assert pool.stats()["wait_time_max_ms"] > 0
+
+
+def test_pool_replaces_broken_connections(make_pool, opened):
+    pool = make_pool(min_size=0, max_size=1)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.closed = 1  # Server went away while the connection sat idle
+    replacement = pool.getconn()
+    assert replacement is not conn
+    assert len(opened) == 2
+    assert pool.stats()["discarded"] == 1
+
+
+def test_pool_rolls_back_open_transactions(make_pool):
+    pool = make_pool(min_size=0, max_size=1)
+    conn = pool.getconn()
+    conn.autocommit = False
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.autocommit is True
+    assert conn.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+
+
+def test_pool_rejects_bad_sizes():
+    with pytest.raises(ValueError):
+        ConnectionPool(min_size=3, max_size=2)
+
+
+def test_executor_refuses_work_beyond_max_pending():
+    """
+    Calls beyond max_pending fail fast instead of queueing behind a slow database.
+    """
+    executor = DatabaseExecutor(workers=1, max_pending=2)
+
+    async def scenario():
+        slow = [asyncio.ensure_future(executor.run(time.sleep, 0.1)) for _ in range(2)]
+        await asyncio.sleep(0)  # Let both calls register as pending
+        with pytest.raises(DatabaseBusy):
+            await executor.run(time.sleep, 0)
+        await asyncio.gather(*slow)
+        assert executor.stats()["pending"] == 0
+        assert await executor.run(sum, [1, 2]) == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+
+def test_invalid_indexes_are_dropped_and_rebuilt(monkeypatch):
+    from contextlib import contextmanager
+
+    from backend import database
+
+    executed = []
+    attempts = iter([(False,), (True,)])  # Another worker holds the lock at first
+    monkeypatch.setattr(database, "INDEX_LOCK_POLL_INTERVAL", 0)
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=()):
+            executed.append(sql.strip())
+
+        def fetchone(self):
+            return next(attempts)
+
+        def fetchall(self):
+            return [("configs_email_idx",)]
+
+    @contextmanager
+    def connection():
+        yield SimpleNamespace(cursor=Cursor)
+
+    monkeypatch.setattr(database, "pooled_connection", connection)
+    database._create_indexes()
+    # Polled, never blocking in pg_advisory_lock() where a concurrent build would wait on it
+    assert executed[:2] == ["SELECT pg_try_advisory_lock(%s);"] * 2
+    assert not any(sql.startswith("SELECT pg_advisory_lock") for sql in executed)
+    drop = executed.index("DROP INDEX CONCURRENTLY IF EXISTS configs_email_idx;")
+    rebuild = executed.index(next(sql for sql in database.CREATE_INDEX_SQL if "configs_email_idx" in sql))
+    assert drop < rebuild
+    assert executed[-1].startswith("SELECT pg_advisory_unlock")
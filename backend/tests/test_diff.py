@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+
+from backend.diff import MAX_FORK_LAYERS, TreeHasher, diff_trees
+from backend.main import app
+
+client = TestClient(app)
+
+
+def test_identical_trees_produce_no_operations():
+    tree = {"name": "MyApp", "settings": {"debug": True, "ports": [80, 443]}}
+    assert diff_trees(tree, {"settings": {"ports": [80, 443], "debug": True}, "name": "MyApp"}) == []
+
+
+def test_mapping_changes():
+    old = {"name": "MyApp", "version": "1.0", "legacy": True}
+    new = {"name": "MyApp", "version": "2.0", "settings": {"debug": False}}
+    assert diff_trees(old, new) == [
+        {"op": "remove", "path": "/legacy"},
+        {"op": "replace", "path": "/version", "value": "2.0", "old": "1.0"},
+        {"op": "add", "path": "/settings", "value": {"debug": False}},
+    ]
+
+
+def test_unordered_mode_ignores_reordering():
+    assert diff_trees({"tags": ["a", "b", "c"]}, {"tags": ["c", "a", "b"]}) == []
+    assert diff_trees({"tags": ["a", "b"]}, {"tags": ["b", "x"]}) == [
+        {"op": "remove", "path": "/tags/0"},
+        {"op": "add", "path": "/tags/1", "value": "x"},
+    ]
+
+
+def test_ordered_mode_reports_sequence_edits():
+    ops = diff_trees([1, 2, 3, 4], [1, 3, 4, 5], ordered=True)
+    assert ops == [{"op": "remove", "path": "/1"}, {"op": "add", "path": "/3", "value": 5}]
+
+
+def test_keyed_lists_match_items_by_name():
+    old = {"services": [{"name": "api", "port": 80}, {"name": "db", "port": 5432}]}
+    new = {"services": [{"name": "db", "port": 5433}, {"name": "api", "port": 80}]}
+    assert diff_trees(old, new) == [
+        {"op": "replace", "path": "/services/0/port", "value": 5433, "old": 5432},
+    ]
+    ordered_ops = diff_trees(old, new, ordered=True)
+    assert {"op": "move", "from": "/services/1", "path": "/services/0"} in ordered_ops
+
+
+def test_edits_inside_unkeyed_list_items_are_reported_in_place():
+    old = [{"host": "a", "port": 1}, {"host": "b", "port": 2}]
+    new = [{"host": "a", "port": 1}, {"host": "b", "port": 3}]
+    assert diff_trees(old, new) == [{"op": "replace", "path": "/1/port", "value": 3, "old": 2}]
+
+
+def test_scalar_types_are_distinguished():
+    hasher = TreeHasher(ordered=True)
+    assert len({hasher(1), hasher(1.0), hasher(True), hasher("1")}) == 4
+
+
+def test_path_tokens_are_escaped():
+    assert diff_trees({"a/b": 1}, {"a/b": 2})[0]["path"] == "/a~1b"
+
+
+def test_compare_endpoint_engines():
+    body = {"schema1_content": "tags: [a, b]\nversion: 1\n", "schema2_content": "tags: [b, a]\nversion: 2\n"}
+    structural = client.post("/compare-schemas", json=body).json()
+    assert structural["patch"] == [{"op": "replace", "path": "/version", "value": 2, "old": 1}]
+    assert structural["differences"] is None
+
+    legacy = client.post("/compare-schemas?engine=deepdiff", json=body).json()
+    assert "values_changed" in legacy["differences"]
+    assert legacy["patch"] is None
+
+    ordered = client.post("/compare-schemas?ordered=true", json=body).json()
+    assert len(ordered["patch"]) > 1
+
+
+def test_fork_chains_stay_bounded_and_hash_like_a_fresh_hasher():
+    tree = {"items": [{"id": n, "value": n} for n in range(20)], "meta": {"v": 0}}
+    hasher = TreeHasher(ordered=True)
+    hasher(tree)
+    for version in range(1, 3 * MAX_FORK_LAYERS):
+        hasher = hasher.fork(tree)
+        tree = {**tree, "meta": {"v": version}}  # Path copy: "items" is shared
+        assert hasher(tree) == TreeHasher(ordered=True)(tree)
+        assert len(hasher._bases) < MAX_FORK_LAYERS
@@ -0,0 +1,112 @@
+import hashlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import database
+from backend.Schema import SCHEMA
+from backend.database import build_document_query
+from backend.documents import InvalidFilter, containment, projection, schema_fields
+from backend.main import app
+from backend.validators import default_schema_key
+
+client = TestClient(app)
+
+CONTENT = "name: John Doe\nage: 25\nemail: john@example.com\naddress:\n  street: 1 Main St\n  city: Paris\n"
+FIELDS = schema_fields(SCHEMA)
+
+
+def test_schema_fields_follow_nested_properties():
+    assert FIELDS[("age",)] == ("integer",)
+    assert FIELDS[("hobbies",)] == ("array",)
+    assert FIELDS[("address", "city")] == ("string",)
+    assert FIELDS[("address", "zip_code")] == ("string", "integer")
+    assert ("address",) not in FIELDS
+
+
+@pytest.mark.parametrize("expression, fragment", [
+    ("address.city=Paris", [{"address": {"city": "Paris"}}]),
+    ("age=25", [{"age": 25}]),
+    ("is_active=True", [{"is_active": True}]),
+    ("hobbies=chess", [{"hobbies": ["chess"]}]),
+    # Every type the field allows that the value converts to
+    ("address.zip_code=75001", [{"address": {"zip_code": "75001"}}, {"address": {"zip_code": 75001}}]),
+    ("address.zip_code=SW1A", [{"address": {"zip_code": "SW1A"}}]),
+])
+def test_filters_become_typed_containment(expression, fragment):
+    assert containment(expression, FIELDS) == fragment
+
+
+@pytest.mark.parametrize("expression", ["age=old", "is_active=yes", "nope=1", "address=Paris", "age"])
+def test_bad_filters_are_rejected(expression):
+    with pytest.raises(InvalidFilter):
+        containment(expression, FIELDS)
+
+
+def test_document_query_projects_and_filters():
+    sql, params = build_document_query(10, after=4, contains=[[{"age": 25}], [{"zip": "1"}, {"zip": 1}]],
+                                       fields=projection(["name", "address.city"], FIELDS))
+    assert "jsonb_build_object(%s, body #> %s, %s, body #> %s) AS fields" in sql
+    assert "schema_name IS NULL" in sql and "id > %s" in sql
+    assert "(body @> %s) AND (body @> %s OR body @> %s)" in sql
+    assert params[:4] == ("name", ["name"], "address.city", ["address", "city"])
+    assert params[-2:] == (4, 11)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    rows = {}
+
+    async def find(content_hash, schema_name, schema_version, schema_hash):
+        return rows.get((content_hash, schema_name, schema_version, schema_hash))
+
+    async def store_document(content_hash, schema_name, schema_version, schema_hash, body):
+        row = {"id": len(rows) + 1, "content_hash": content_hash, "schema_name": schema_name,
+               "schema_version": schema_version, "schema_hash": schema_hash, "body": body}
+        rows[(content_hash, schema_name, schema_version, schema_hash)] = row
+        return row, True
+
+    monkeypatch.setattr(database, "find_document", find)
+    monkeypatch.setattr(database, "store_document", store_document)
+    return rows
+
+
+def test_store_skips_documents_already_stored(store, monkeypatch):
+    first = client.post("/documents", files={"file": ("a.yaml", CONTENT)})
+    assert first.status_code == 201, first.text
+    body = first.json()
+    assert body["stored"] is True
+    assert body["body"]["address"] == {"street": "1 Main St", "city": "Paris"}
+    assert body["content_hash"] == hashlib.sha256(CONTENT.encode()).hexdigest()
+    assert body["schema_hash"] == default_schema_key()
+
+    # The second upload is answered from the hash lookup, without parsing
+    monkeypatch.setattr("backend.main.parse_for_storage", None)
+    second = client.post("/documents", files={"file": ("a.yaml", CONTENT)})
+    assert second.status_code == 200
+    assert second.json()["stored"] is False and second.json()["id"] == body["id"]
+
+
+def test_invalid_documents_are_not_stored(store):
+    response = client.post("/documents", files={"file": ("a.yaml", "name: John\nage: -1\n")})
+    assert response.status_code == 422
+    assert {error["keyword"] for error in response.json()["detail"]["errors"]} == {"minimum", "required"}
+    assert store == {}
+
+
+def test_list_documents_passes_filters(monkeypatch):
+    calls = []
+
+    async def fake_list(limit, after, schema_name, schema_version, contains, fields):
+        calls.append((limit, after, schema_name, schema_version, contains, fields))
+        return [{"id": 7, "fields": {"name": "John Doe"}}], True
+    monkeypatch.setattr(database, "list_documents", fake_list)
+
+    response = client.get("/documents?limit=1&where=address.city=Paris&where=hobbies=chess&fields=name")
+    assert response.status_code == 200, response.text
+    assert calls[0] == (1, None, None, None, [[{"address": {"city": "Paris"}}], [{"hobbies": ["chess"]}]], [("name",)])
+
+    client.get(f"/documents?cursor={response.json()['next_cursor']}")
+    assert calls[1][1] == 7
+    assert client.get("/documents?where=age=old").status_code == 400
+    assert client.get("/documents?fields=unknown").status_code == 400
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.execution import CPUExecutor, ClientDisconnected, ExecutionTimeout
+
+
+class DisconnectingRequest:
+    """
+    Looks like a Starlette request whose client hangs up after `after` seconds.
+    """
+
+    def __init__(self, after):
+        self.deadline = time.monotonic() + after
+
+    async def is_disconnected(self):
+        return time.monotonic() >= self.deadline
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_small_payloads_run_inline():
+    executor = CPUExecutor(mode="process", inline_threshold=100)
+    caller = threading.get_ident()
+    assert run(executor.run(threading.get_ident, size=10)) == caller
+    assert executor._pool is None  # No worker pool was started
+
+
+def test_thread_mode_runs_off_the_event_loop():
+    executor = CPUExecutor(mode="thread", workers=1, inline_threshold=0)
+    try:
+        assert run(executor.run(threading.get_ident, size=10)) != threading.get_ident()
+    finally:
+        executor.shutdown()
+
+
+def test_process_mode_returns_results():
+    executor = CPUExecutor(mode="process", workers=1, inline_threshold=0)
+    try:
+        assert run(executor.run(sum, [1, 2, 3], size=10)) == 6
+    finally:
+        executor.shutdown()
+
+
+def test_process_timeout_recycles_pool():
+    executor = CPUExecutor(mode="process", workers=1, inline_threshold=0, timeout=0.5)
+    try:
+        run(executor.run(sum, [0], size=10))  # Start the worker outside the timed call
+        with pytest.raises(ExecutionTimeout):
+            run(executor.run(time.sleep, 30, size=10))
+        assert executor.stats()["pool_recycles"] == 1
+        # The next task gets a fresh worker instead of queueing behind the stuck one
+        assert run(executor.run(sum, [4, 5], size=10)) == 9
+    finally:
+        executor.shutdown()
+
+
+def test_client_disconnect_cancels_task():
+    executor = CPUExecutor(mode="thread", workers=1, inline_threshold=0, timeout=5)
+    try:
+        with pytest.raises(ClientDisconnected):
+            run(executor.run(time.sleep, 1, size=10, request=DisconnectingRequest(after=0.1)))
+        assert executor.stats()["cancelled"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        CPUExecutor(mode="gpu")
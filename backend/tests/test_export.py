@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from backend import database
+from backend.batch import extract_documents
+from backend.bulk import iter_records
+from backend.database import EXPORT_COLUMNS
+from backend.export import encode_batch, header
+from backend.main import app, validate_batch
+
+client = TestClient(app)
+
+STAMP = datetime(2024, 5, 1, 12, 0)
+ROWS = [
+    (1, "John Doe", 25, "john@example.com", True, ["chess", "golf"], "1 Main St", "Paris", "75001", STAMP, STAMP),
+    (2, "Jane Doe", 31, "jane@example.com", None, [], None, None, None, STAMP, STAMP),
+]
+
+
+def test_ndjson_keeps_arrays_and_iso_timestamps():
+    lines = encode_batch(ROWS, EXPORT_COLUMNS, "ndjson").decode().splitlines()
+    first = json.loads(lines[0])
+    assert first["hobbies"] == ["chess", "golf"]
+    assert first["updated_at"] == "2024-05-01T12:00:00"
+    assert len(lines) == 2
+
+
+def test_csv_round_trips_through_bulk_reader():
+    data = header(EXPORT_COLUMNS, "csv") + encode_batch(ROWS, EXPORT_COLUMNS, "csv")
+    records = [record for _, record, _ in iter_records(io.BytesIO(data), "csv")]
+    assert records[0]["hobbies"] == "chess,golf"
+    assert records[1]["city"] is None and records[1]["hobbies"] is None
+    assert next(csv.reader(io.StringIO(data.decode())))[0] == "id"
+
+
+def test_yaml_stream_validates_in_batch():
+    documents = extract_documents(encode_batch(ROWS, EXPORT_COLUMNS, "yaml"), "configs.yaml")
+    result = validate_batch(documents)
+    assert (result["total"], result["valid"]) == (2, 2)
+
+
+class FakeExport:
+    columns = EXPORT_COLUMNS
+    closed = False
+
+    async def batches(self):
+        yield ROWS[:1]
+        yield ROWS[1:]
+
+    def close(self):
+        FakeExport.closed = True
+
+
+def test_export_endpoint_streams_batches(monkeypatch):
+    async def fake_export(itersize):
+        return FakeExport()
+    monkeypatch.setattr(database, "export_configs", fake_export)
+
+    response = client.get("/configs/export?format=csv&itersize=1")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    assert len(response.text.strip().splitlines()) == 3
+    assert FakeExport.closed
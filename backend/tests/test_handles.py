@@ -0,0 +1,170 @@
+import hashlib
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import database, main
+from backend.diff import TreeHasher, diff_trees
+from backend.handles import DocumentHandles, estimate_size
+from backend.main import app
+
+client = TestClient(app)
+
+CONTENT = ("name: John Doe\nage: 25\nemail: john@example.com\nhobbies:\n  - chess\n  - golf\n"
+           "address:\n  street: 1 Main St\n  city: Paris\n  zip_code: 75001\n")
+EDITED = CONTENT.replace("age: 25", "age: 26")
+
+
+@pytest.fixture(autouse=True)
+def fresh_handles(monkeypatch):
+    store = DocumentHandles(ttl=60, max_documents=8, max_bytes=1 << 20)
+    monkeypatch.setattr("backend.main.handles", store)
+    return store
+
+
+def upload(content=CONTENT):
+    response = client.post("/handles", files={"file": ("a.yaml", content)})
+    assert response.status_code in (200, 201), response.text
+    return response.json()
+
+
+def test_same_content_gets_the_same_handle_without_parsing(monkeypatch):
+    first = client.post("/handles", files={"file": ("a.yaml", CONTENT)})
+    assert first.status_code == 201
+    assert first.json()["content_hash"] == hashlib.sha256(CONTENT.encode()).hexdigest()
+
+    monkeypatch.setattr("backend.main.parse_for_handle", None)
+    second = client.post("/handles", files={"file": ("b.yaml", CONTENT)})
+    assert second.status_code == 200
+    assert second.json()["handle"] == first.json()["handle"]
+
+
+def test_unparseable_upload_is_rejected():
+    response = client.post("/handles", files={"file": ("a.yaml", "a: [1, 2")})
+    assert response.status_code == 400
+    assert "YAML Parsing Error" in response.json()["detail"]
+
+
+def test_handles_expire_and_evict():
+    store = DocumentHandles(ttl=0.05, max_documents=2, max_bytes=100)
+    first = store.add("a", {"a": 1}, 1, memory=10)
+    store.add("b", {"b": 1}, 1, memory=10)
+    store.add("c", {"c": 1}, 1, memory=10)
+    assert store.get(first.id) is None  # Least recently used, over max_documents
+    big = store.add("d", {"d": 1}, 1, memory=95)
+    assert store.stats()["documents"] == 1 and store.get(big.id) is big  # Over max_bytes
+    time.sleep(0.06)
+    assert store.get(big.id) is None and store.find("d") is None
+
+
+def test_budget_counts_parsed_trees_and_hashes():
+    tree = {"items": [{"id": n, "name": f"item {n}"} for n in range(100)]}
+    store = DocumentHandles(ttl=60, max_documents=8, max_bytes=1 << 20)
+    document = store.add("a", tree, 10)
+    assert document.memory == estimate_size(tree) > 100 * 10
+    assert store.stats()["bytes"] == document.memory
+
+    document.hashes(False)
+    document.hashes(False)  # Charged once
+    charged = store.stats()["bytes"] - estimate_size(tree)
+    assert charged > 0 and document.memory == store.stats()["bytes"]
+
+    other = store.add("b", tree, 10)
+    store.max_bytes = other.memory + charged // 2
+    other.hashes(True)  # Its hashes push the store over budget; the older document goes
+    assert store.get(document.id) is None and store.get(other.id) is other
+
+
+def test_validation_is_computed_once_per_mode(monkeypatch):
+    handle = upload()["handle"]
+    calls = []
+    original = main.validate_parsed_document
+
+    def counting(*args):
+        calls.append(args[2])
+        return original(*args)
+
+    monkeypatch.setattr("backend.main.validate_parsed_document", counting)
+    for _ in range(2):
+        response = client.get(f"/handles/{handle}/validation")
+        assert response.json() == {"is_valid": True, "message": "YAML is valid."}
+    assert client.get(f"/handles/{handle}/validation?mode=all").json()["errors"] == []
+    assert calls == ["first", "all"]
+
+
+def test_unknown_handle_is_a_404():
+    response = client.get(f"/handles/{'0' * 32}/validation")
+    assert response.status_code == 404
+    assert "upload the document again" in response.json()["detail"]
+
+
+def test_compare_by_handle_matches_compare_by_content(monkeypatch):
+    monkeypatch.setattr("backend.main.result_cache.max_bytes", 0)
+    first, second = upload()["handle"], upload(EDITED)["handle"]
+    by_handle = client.post("/compare-schemas", json={"schema1_handle": first, "schema2_handle": second})
+    by_content = client.post("/compare-schemas", json={"schema1_content": CONTENT, "schema2_content": EDITED})
+    mixed = client.post("/compare-schemas", json={"schema1_handle": first, "schema2_content": EDITED})
+    assert by_handle.status_code == 200, by_handle.text
+    assert by_handle.json() == by_content.json() == mixed.json()
+    assert by_handle.json()["patch"] == [{"op": "replace", "path": "/age", "value": 26, "old": 25}]
+
+
+def test_compare_needs_exactly_one_source_per_schema():
+    handle = upload()["handle"]
+    both = client.post("/compare-schemas", json={"schema1_content": CONTENT, "schema1_handle": handle,
+                                                 "schema2_content": CONTENT})
+    neither = client.post("/compare-schemas", json={"schema2_content": CONTENT})
+    assert both.status_code == neither.status_code == 422
+
+
+def test_diff_reuses_base_hashes():
+    old, new = {"a": [1, 2], "b": {"c": 1}}, {"a": [1, 2], "b": {"c": 2}}
+    base = TreeHasher(False)
+    base(old)
+    hasher = TreeHasher(False, [base])
+    assert diff_trees(old, new, hasher=hasher) == [{"op": "replace", "path": "/b/c", "value": 2, "old": 1}]
+    assert id(old) not in hasher._hashes  # Found in the base, not hashed again
+
+
+def test_config_from_handle(monkeypatch):
+    stored = []
+
+    async def insert(values):
+        stored.append(values)
+        return {"id": 1}
+
+    monkeypatch.setattr(database, "insert_config", insert)
+    handle = upload()["handle"]
+    response = client.post(f"/configs/?handle={handle}")
+    assert response.status_code == 200, response.text
+    assert stored == [("John Doe", 25, "john@example.com", None, ["chess", "golf"], "1 Main St", "Paris", "75001")]
+
+
+def test_invalid_config_from_handle_is_a_422():
+    handle = upload("name: John Doe\nemail: john@example.com\n")["handle"]
+    response = client.post(f"/configs/?handle={handle}")
+    assert response.status_code == 422
+    assert response.json()["detail"] == ["age: Input should be a valid integer"]
+
+
+def test_config_needs_a_body_or_a_handle():
+    assert client.post("/configs/").status_code == 422
+
+
+
+def test_document_from_handle_reuses_the_parsed_tree(monkeypatch):
+    async def find(content_hash, schema_name, schema_version, schema_hash):
+        return None
+
+    async def store_document(content_hash, schema_name, schema_version, schema_hash, body):
+        return {"id": 1, "content_hash": content_hash, "body": body}, True
+
+    monkeypatch.setattr(database, "find_document", find)
+    monkeypatch.setattr(database, "store_document", store_document)
+    handle = upload()
+    monkeypatch.setattr("backend.main.parse_for_storage", None)
+    response = client.post(f"/documents?handle={handle['handle']}")
+    assert response.status_code == 201, response.text
+    assert response.json()["content_hash"] == handle["content_hash"]
+    assert response.json()["body"]["hobbies"] == ["chess", "golf"]
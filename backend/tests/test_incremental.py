@@ -0,0 +1,136 @@
+import copy
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.Schema import SCHEMA
+from backend.incremental import IncrementalSession, PatchError, apply_patch
+from backend.main import app
+from backend.validators import collect_errors, get_validator
+
+client = TestClient(app)
+
+DOCUMENT = {
+    "name": "John Doe",
+    "age": 25,
+    "email": "john@example.com",
+    "hobbies": ["chess", "golf"],
+    "address": {"street": "1 Main St", "city": "Paris", "zip_code": "75001"},
+}
+
+
+def full_errors(document):
+    return {(error["path"], error["keyword"], error["schema_path"]) for error in collect_errors(get_validator(), document)}
+
+
+def incremental_errors(result):
+    return {(error["path"], error["keyword"], error["schema_path"]) for error in result["errors"]}
+
+
+@pytest.mark.parametrize("document", [
+    DOCUMENT,
+    {**DOCUMENT, "age": -1, "hobbies": ["ok", 3]},
+    {**DOCUMENT, "address": {"street": 5}},
+    {"hobbies": "chess"},
+    ["not", "an", "object"],
+])
+def test_matches_full_validation(document):
+    result = IncrementalSession().validate(SCHEMA, copy.deepcopy(document))
+    assert incremental_errors(result) == full_errors(document)
+    assert result["is_valid"] is (not full_errors(document))
+
+
+def test_unchanged_subtrees_are_reused():
+    session = IncrementalSession()
+    first = session.validate(SCHEMA, copy.deepcopy(DOCUMENT))
+    assert first["subtrees_reused"] == 0
+
+    edited = copy.deepcopy(DOCUMENT)
+    edited["address"]["city"] = 12
+    second = session.validate(SCHEMA, edited)
+    assert second["subtrees_reused"] == 1  # hobbies
+    assert incremental_errors(second) == {("/address/city", "type", "/properties/address/properties/city/type")}
+
+
+def test_patch_against_stored_base():
+    session = IncrementalSession()
+    base = session.validate(SCHEMA, copy.deepcopy(DOCUMENT))
+    patched = session.validate(SCHEMA, base_hash=base["document_hash"],
+                               patch=[{"op": "replace", "path": "/age", "value": -4}])
+    assert incremental_errors(patched) == {("/age", "minimum", "/properties/age/minimum")}
+    assert patched["subtrees_reused"] == 2  # hobbies and address
+
+    # Reverting lands on the original document hash
+    reverted = session.validate(SCHEMA, base_hash=patched["document_hash"],
+                                patch=[{"op": "replace", "path": "/age", "value": 25}])
+    assert reverted["document_hash"] == base["document_hash"]
+
+    with pytest.raises(KeyError):
+        session.validate(SCHEMA, base_hash="unknown", patch=[])
+
+
+def test_apply_patch_copies_only_edited_paths():
+    original = copy.deepcopy(DOCUMENT)
+    result = apply_patch(original, [
+        {"op": "add", "path": "/hobbies/-", "value": "golf"},
+        {"op": "remove", "path": "/hobbies/0"},
+        {"op": "move", "from": "/address/zip_code", "path": "/zip"},
+        {"op": "copy", "from": "/name", "path": "/alias"},
+        {"op": "test", "path": "/alias", "value": "John Doe"},
+    ])
+    assert original == DOCUMENT
+    assert result["hobbies"] == ["golf", "golf"]
+    assert result["zip"] == "75001" and "zip_code" not in result["address"]
+    assert result["alias"] == "John Doe"
+    untouched = apply_patch(original, [{"op": "replace", "path": "/age", "value": 1}])
+    assert untouched["address"] is original["address"]
+
+
+def test_copied_values_are_not_shared_with_their_source():
+    result = apply_patch({"a": {"x": 1}}, [
+        {"op": "replace", "path": "/a/x", "value": 2},
+        {"op": "copy", "from": "/a", "path": "/b"},
+        {"op": "replace", "path": "/b/x", "value": 3},
+    ])
+    assert result == {"a": {"x": 2}, "b": {"x": 3}}
+
+
+@pytest.mark.parametrize("operation", [
+    {"op": "remove", "path": "/missing"},
+    {"op": "replace", "path": "/hobbies/5", "value": 1},
+    {"op": "add", "path": "/hobbies/01", "value": 1},
+    {"op": "test", "path": "/age", "value": 99},
+    {"op": "test", "path": "/age", "value": 25.5},
+    {"op": "test", "path": "/address/zip_code", "value": ["75001"]},
+    {"op": "move", "from": "/address", "path": "/address/inner"},
+    {"op": "frobnicate", "path": "/age"},
+    {"op": "add", "path": "age", "value": 1},
+])
+def test_invalid_patches_are_rejected(operation):
+    with pytest.raises(PatchError):
+        apply_patch(copy.deepcopy(DOCUMENT), [operation])
+
+
+@pytest.mark.parametrize("value, expected", [(1, True), (0, False), ([1], [True]), ({"a": 0}, {"a": False})])
+def test_test_op_tells_booleans_from_numbers(value, expected):
+    with pytest.raises(PatchError):
+        apply_patch({"a": value}, [{"op": "test", "path": "/a", "value": expected}])
+    assert apply_patch({"a": value}, [{"op": "test", "path": "/a", "value": value}]) == {"a": value}
+    assert apply_patch({"a": 1}, [{"op": "test", "path": "/a", "value": 1.0}]) == {"a": 1}
+
+
+def test_incremental_endpoint_round_trip():
+    content = "name: John Doe\nage: 25\nemail: john@example.com\nhobbies: [chess]\n"
+    first = client.post("/validate/incremental", json={"content": content})
+    assert first.status_code == 200, first.text
+    assert first.json()["is_valid"] is True
+
+    patch = {"base_hash": first.json()["document_hash"], "patch": [{"op": "add", "path": "/hobbies/-", "value": 7}]}
+    second = client.post("/validate/incremental", json=patch).json()
+    assert second["is_valid"] is False
+    assert second["errors"][0]["path"] == "/hobbies/1"
+
+    assert client.post("/validate/incremental", json={**patch, "base_hash": "0" * 32}).status_code == 409
+    assert client.post("/validate/incremental", json={"content": content, **patch}).status_code == 400
+    bad_patch = {**patch, "patch": [{"op": "remove", "path": "/nope"}]}
+    assert client.post("/validate/incremental", json=bad_patch).status_code == 400
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.jobs import ClientLimitReached, JobQueue, JobRejected, JobStore, jobs
+from backend.main import app
+
+client = TestClient(app)
+
+SCHEMA1 = "name: John Doe\nage: 25\nemail: john@example.com\n"
+SCHEMA2 = "name: John Doe\nage: 26\nemail: john@example.com\n"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path))
+    monkeypatch.setattr(jobs, "_store", store)
+    return store
+
+
+def test_jobs_run_by_priority(tmp_path):
+    queue = JobQueue(JobStore(str(tmp_path)), workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    queue.submit("block", blocker)
+    started.wait(5)  # The single worker is busy, so the rest queue up
+    low = queue.submit("low", order.append, "low", priority="low")
+    normal = queue.submit("normal", order.append, "normal")
+    high = queue.submit("high", order.append, "high", priority="high")
+    release.set()
+    queue.join()
+
+    assert order == ["high", "normal", "low"]
+    assert all(queue.get(job["id"])["status"] == "done" for job in (low, normal, high))
+
+
+def test_per_client_limit_and_failures(tmp_path):
+    queue = JobQueue(JobStore(str(tmp_path)), workers=1, max_per_client=1)
+    release = threading.Event()
+    queue.submit("block", release.wait, 5, client="bulk")
+    with pytest.raises(ClientLimitReached):
+        queue.submit("block", release.wait, 5, client="bulk")
+
+    failing = queue.submit("fail", lambda: 1 / 0, client="interactive")
+    release.set()
+    queue.join()
+    record = queue.get(failing["id"])
+    assert record["status"] == "failed" and "division" in record["error"]
+
+    # Finished jobs no longer count against the client
+    queue.submit("ok", lambda: None, client="bulk")
+    queue.join()
+
+
+def test_full_queue_is_rejected(tmp_path):
+    queue = JobQueue(JobStore(str(tmp_path)), workers=0, max_queued=1)
+    queue.submit("one", lambda: None, client="a")
+    with pytest.raises(JobRejected):
+        queue.submit("two", lambda: None, client="b")
+    assert queue.stats()["clients"] == 1
+
+
+def test_expired_jobs_are_pruned(tmp_path):
+    store = JobStore(str(tmp_path), ttl=-1)
+    store.save({"id": "a" * 32, "status": "done"})
+    assert store.get("a" * 32) is None
+    store.save({"id": "b" * 32, "status": "done"})
+    assert store.prune() == 1
+
+
+def test_unfinished_jobs_and_their_uploads_outlive_the_ttl(tmp_path):
+    import io
+
+    store = JobStore(str(tmp_path), ttl=-1)
+    store.save({"id": "a" * 32, "status": "queued"})
+    payload = store.spool(io.BytesIO(b"data"))
+    assert store.prune() == 0
+    assert store.get("a" * 32)["status"] == "queued" and os.path.exists(payload)
+
+    # Once the owning process is gone, nothing will run them
+    with open(os.path.join(store.directory, "a" * 32 + ".json"), "w") as f:
+        json.dump({"id": "a" * 32, "status": "queued", "owner": None}, f)
+    orphan = os.path.join(store.directory, "0-orphan.payload")
+    open(orphan, "w").close()
+    assert store.prune() == 2
+    assert store.get("a" * 32) is None and not os.path.exists(orphan) and os.path.exists(payload)
+
+
+def wait_for_status(queue, job, status):
+    deadline = time.monotonic() + 5
+    while queue.get(job["id"])["status"] != status and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return queue.get(job["id"])
+
+
+def test_jobs_past_the_timeout_fail_but_keep_their_slots(tmp_path):
+    queue = JobQueue(JobStore(str(tmp_path)), workers=1, max_per_client=1, timeout=0.05)
+    release = threading.Event()
+    slow = queue.submit("slow", release.wait, 5, client="bulk")
+    fast = queue.submit("fast", lambda: "done", client="interactive")
+    assert wait_for_status(queue, slow, "failed")["error"] == "Job timed out after 0.05s"
+    assert queue.stats()["timed_out"] == 1
+
+    # The abandoned job still runs, so neither its runner slot nor its client's is free yet
+    time.sleep(0.1)
+    assert queue.get(fast["id"])["status"] == "queued"
+    with pytest.raises(ClientLimitReached):
+        queue.submit("again", lambda: None, client="bulk")
+
+    release.set()
+    queue.join()
+    assert queue.get(fast["id"])["result"] == "done"
+    assert wait_for_status(queue, queue.submit("again", lambda: None, client="bulk"), "done")
+
+
+def test_compare_job_round_trip(store, monkeypatch):
+    monkeypatch.setattr("backend.main.JOB_PRIORITY_TOKEN", "secret")
+    files = {"file1": ("a.yaml", SCHEMA1), "file2": ("b.yaml", SCHEMA2)}
+    response = client.post("/jobs/compare-schema-files?priority=high", files=files,
+                           headers={"X-Job-Priority-Token": "secret"})
+    assert response.status_code == 202, response.text
+    job_id = response.json()["job_id"]
+    jobs.join()
+    assert not [name for name in os.listdir(store.directory) if name.endswith(".payload")]
+
+    job = client.get(f"/jobs/{job_id}").json()
+    assert job["status"] == "done"
+    assert job["result"]["patch"] == [{"op": "replace", "path": "/age", "value": 26, "old": 25}]
+    assert job["result"]["schema1_name"] == "a.yaml"
+
+    events = client.get(f"/jobs/{job_id}/events")
+    assert events.headers["content-type"].startswith("text/event-stream")
+    [event] = [json.loads(line[len("data: "):]) for line in events.text.splitlines() if line]
+    assert event["status"] == "done"
+
+
+def test_batch_job_and_missing_job(store):
+    content = "---\nname: A\nage: 1\nemail: a@example.com\n---\nname: B\nage: -1\nemail: b@example.com\n"
+    response = client.post("/jobs/validate/batch", files={"file": ("batch.yaml", content)})
+    assert response.status_code == 202
+    jobs.join()
+    result = client.get(response.json()["status_url"]).json()["result"]
+    assert (result["valid"], result["invalid"]) == (1, 1)
+
+    assert client.get("/jobs/" + "0" * 32).status_code == 404
+    assert client.get("/jobs/" + "0" * 32 + "/events").status_code == 404
+    assert client.post("/jobs/validate/batch?priority=urgent", files={"file": ("b.yaml", content)}).status_code == 422
+
+
+def test_client_limit_over_http(store, monkeypatch):
+    monkeypatch.setattr(jobs, "max_per_client", 0)
+    files = {"file1": ("a.yaml", SCHEMA1), "file2": ("b.yaml", SCHEMA2)}
+    response = client.post("/jobs/compare-schema-files", files=files)
+    assert response.status_code == 429
+    assert not [name for name in os.listdir(store.directory) if name.endswith(".payload")]
+
+
+def test_high_priority_needs_the_token(store, monkeypatch):
+    files = {"file1": ("a.yaml", SCHEMA1), "file2": ("b.yaml", SCHEMA2)}
+    assert client.post("/jobs/compare-schema-files?priority=high", files=files).status_code == 403
+    monkeypatch.setattr("backend.main.JOB_PRIORITY_TOKEN", "secret")
+    response = client.post("/jobs/compare-schema-files?priority=high", files=files,
+                           headers={"X-Job-Priority-Token": "wrong"})
+    assert response.status_code == 403
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.Schema import SCHEMA
+from backend.incremental import IncrementalSession, ValidationCancelled
+from backend.live import LiveProtocolError, LiveSession, coalesce, parse_message
+from backend.main import app
+
+client = TestClient(app)
+
+CONTENT = "name: John Doe\nage: 25\nemail: john@example.com\nhobbies: [chess]\n"
+
+
+def test_coalesce_keeps_newest_snapshot_and_following_patches():
+    edits = [
+        {"type": "patch", "patch": [{"op": "remove", "path": "/x"}]},
+        {"type": "snapshot", "content": "a: 1"},
+        {"type": "patch", "patch": [{"op": "add", "path": "/b", "value": 2}]},
+        {"type": "patch", "patch": [{"op": "add", "path": "/c", "value": 3}]},
+    ]
+    snapshot, patches = coalesce(edits)
+    assert snapshot["content"] == "a: 1"
+    assert [edit["patch"][0]["path"] for edit in patches] == ["/b", "/c"]
+
+
+@pytest.mark.parametrize("raw", [
+    "not json", "[]", '{"type": "snapshot"}', '{"type": "patch", "patch": {}}',
+    '{"type": "other"}', '{"type": "snapshot", "content": "a", "seq": "1"}',
+])
+def test_malformed_messages_are_rejected(raw):
+    with pytest.raises(LiveProtocolError):
+        parse_message(raw)
+
+
+def test_cancelled_validation_raises():
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ValidationCancelled):
+        IncrementalSession().validate(SCHEMA, {"name": "x", "hobbies": ["a"]}, cancel=cancel)
+
+
+def test_burst_of_edits_is_validated_once():
+    async def scenario():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        live = LiveSession(send, SCHEMA, debounce=0.05, documents=IncrementalSession())
+        live.submit({"type": "snapshot", "seq": 1, "content": CONTENT})
+        for seq in range(2, 6):
+            live.submit({"type": "patch", "seq": seq, "patch": [{"op": "replace", "path": "/age", "value": seq}]})
+        await asyncio.sleep(0.3)
+        await live.close()
+        return live, sent
+
+    live, sent = asyncio.run(scenario())
+    assert live.runs == 1
+    [result] = sent
+    assert result["seq"] == 5 and result["is_valid"] is True
+    assert live.pending == [] and live.base_hash == result["document_hash"]
+
+
+def test_bad_patch_keeps_the_edits_before_it():
+    async def scenario():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        live = LiveSession(send, SCHEMA, debounce=0.05, documents=IncrementalSession())
+        live.submit({"type": "snapshot", "seq": 1, "content": CONTENT})
+        live.submit({"type": "patch", "seq": 2, "patch": [{"op": "replace", "path": "/age", "value": 30}]})
+        live.submit({"type": "patch", "seq": 3, "patch": [{"op": "remove", "path": "/nope"}]})
+        live.submit({"type": "patch", "seq": 4, "patch": [{"op": "replace", "path": "/age", "value": 40}]})
+        await asyncio.sleep(0.3)
+        await live.close()
+        return live, sent
+
+    live, sent = asyncio.run(scenario())
+    result, error = sent
+    assert result["type"] == "result" and result["seq"] == 2
+    assert live.documents.documents.get(result["document_hash"])[0]["age"] == 30
+    assert error["type"] == "error" and error["seq"] == 3 and error["discarded"] == [3, 4]
+    assert live.base_hash == result["document_hash"]
+
+
+def test_websocket_session_round_trip():
+    with client.websocket_connect("/ws/validate?debounce_ms=0") as websocket:
+        assert websocket.receive_json() == {"type": "ready"}
+
+        websocket.send_json({"type": "snapshot", "seq": 1, "content": CONTENT})
+        first = websocket.receive_json()
+        assert first["type"] == "result" and first["seq"] == 1
+        assert first["is_valid"] is True and first["diff"] is None
+
+        websocket.send_json({"type": "patch", "seq": 2, "patch": [{"op": "add", "path": "/hobbies/-", "value": 7}]})
+        second = websocket.receive_json()
+        assert second["is_valid"] is False
+        assert second["errors"][0]["path"] == "/hobbies/1"
+        assert second["diff"] == [{"op": "add", "path": "/hobbies/1", "value": 7}]
+
+        websocket.send_json({"type": "patch", "seq": 3, "patch": [{"op": "remove", "path": "/nope"}]})
+        assert websocket.receive_json()["detail"].startswith("Invalid patch")
+
+        websocket.send_text("not json")
+        assert websocket.receive_json()["type"] == "error"
+
+
+def test_patch_before_snapshot_asks_for_snapshot():
+    with client.websocket_connect("/ws/validate?debounce_ms=0") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "patch", "seq": 1, "patch": []})
+        message = websocket.receive_json()
+        assert message == {"type": "error", "seq": 1, "detail": "No document yet; send a snapshot"}
@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.metrics import Histogram, Registry
+
+client = TestClient(app)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("op_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "parse")
+    samples = {(name, labels.get("le")): value for name, labels, value in histogram.collect()}
+    assert samples[("op_seconds_bucket", "0.1")] == 2
+    assert samples[("op_seconds_bucket", "1.0")] == 3
+    assert samples[("op_seconds_bucket", "+Inf")] == 4
+    assert samples[("op_seconds_count", None)] == 4
+    assert samples[("op_seconds_sum", None)] == pytest.approx(3.65)
+
+
+def test_histogram_rejects_wrong_label_count():
+    with pytest.raises(ValueError):
+        Histogram("x", "Test", ("a", "b")).observe(1.0, "only-one")
+
+
+def test_registry_renders_exposition_format():
+    registry = Registry()
+    registry.histogram("t_seconds", "Timer", ("name",), buckets=(1.0,)).observe(0.5, 'say "hi"')
+    registry.collector("t_pool", "gauge", "Pool", lambda: [({"stat": "idle"}, 3)])
+    registry.collector("t_broken", "gauge", "Broken", lambda: 1 / 0)
+    text = registry.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{name="say \\"hi\\"",le="1.0"} 1' in text
+    assert 't_pool{stat="idle"} 3' in text
+    assert "t_broken" not in text
+
+
+def test_metrics_endpoint_reports_stages_and_routes():
+    client.post("/validate", files={"file": ("c.yaml", b"name: Metrics Probe\nage: 25\nemail: probe@example.com\n")})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'schema_validator_stage_seconds_count{operation="validate",stage="parse"}' in text
+    assert 'schema_validator_stage_seconds_count{operation="validate",stage="receive"}' in text
+    assert 'route="/validate",status="200"' in text
+    assert 'schema_validator_request_body_bytes_count{method="POST",route="/validate"}' in text
+    assert 'schema_validator_result_cache{stat="hits"}' in text
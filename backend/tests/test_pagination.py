@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import database
+from backend.database import InvalidCursor, build_list_query, decode_cursor, encode_cursor
+from backend.main import app
+
+client = TestClient(app)
+
+
+def test_cursor_round_trip():
+    row = {"id": 42, "updated_at": datetime(2024, 5, 1, 12, 30, 0, 123456)}
+    assert decode_cursor(encode_cursor(row, "id"), "id") == (42, 42)
+    assert decode_cursor(encode_cursor(row, "updated_at"), "updated_at") == (row["updated_at"], 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", encode_cursor({"id": 1, "updated_at": datetime.now()}, "updated_at")])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "id")
+
+
+def test_first_page_has_no_keyset_condition():
+    sql, params = build_list_query(10)
+    assert "WHERE" not in sql and "ORDER BY id ASC" in sql
+    assert params == (11,)
+
+
+def test_keyset_condition_and_filters():
+    after = (datetime(2024, 1, 1), 7)
+    sql, params = build_list_query(5, "updated_at", True, after, city="Paris", is_active=True, hobbies=["chess"])
+    assert "(updated_at, id) < (%s, %s)" in sql
+    assert "hobbies @> %s::text[]" in sql
+    assert "ORDER BY updated_at DESC, id DESC" in sql
+    assert params == ("Paris", True, ["chess"], datetime(2024, 1, 1), 7, 6)
+
+
+def test_list_endpoint_returns_next_cursor(monkeypatch):
+    calls = []
+
+    async def fake_list(limit, sort, descending, after, **filters):
+        calls.append((limit, sort, descending, after, filters))
+        return [{"id": 3}, {"id": 5}], True
+    monkeypatch.setattr(database, "list_configs", fake_list)
+
+    response = client.get("/configs?limit=2&hobby=chess&hobby=golf&is_active=false")
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == [3, 5]
+    assert decode_cursor(body["next_cursor"], "id") == (5, 5)
+
+    client.get(f"/configs?limit=2&cursor={body['next_cursor']}")
+    assert calls[0][4] == {"city": None, "is_active": False, "email": None, "hobbies": ["chess", "golf"]}
+    assert calls[1][3] == (5, 5)
+
+
+def test_list_endpoint_rejects_bad_cursor():
+    assert client.get("/configs?cursor=garbage").status_code == 400
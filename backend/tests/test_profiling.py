@@ -0,0 +1,107 @@
+import json
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.profiling import ProfileSession, ProfilingMiddleware, StackSampler, write_profile
+
+
+def make_client(tmp_path, **options):
+    app = FastAPI()
+
+    @app.post("/work/{name}")
+    async def work(name: str):
+        return {"name": name}
+
+    @app.get("/slow")
+    def slow():
+        # Busy loop so the sampler has something to see
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+        return {}
+
+    @app.get("/blocking")
+    async def blocking():
+        # Runs on the event loop, so nothing scheduled there can fire until it returns
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+        return {}
+
+    app.add_middleware(ProfilingMiddleware, directory=str(tmp_path), **options)
+    return TestClient(app)
+
+
+def wait_for_profiles(directory, count):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        profiles = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+        if len(profiles) >= count:
+            return [json.loads((directory / name).read_text()) for name in profiles]
+        time.sleep(0.01)
+    raise AssertionError("profile was not written")
+
+
+def test_unflagged_requests_are_not_profiled(tmp_path):
+    client = make_client(tmp_path)
+    assert client.post("/work/a", content=b"x" * 10).status_code == 200
+    time.sleep(0.05)
+    assert os.listdir(tmp_path) == []
+
+
+def test_header_triggers_profile_with_request_details(tmp_path):
+    client = make_client(tmp_path, token="secret")
+    client.post("/work/a", headers={"X-Profile": "wrong"})
+    client.post("/work/a", content=b"x" * 10, headers={"X-Profile": "secret"})
+    [details] = wait_for_profiles(tmp_path, 1)
+    assert (details["route"], details["body_bytes"], details["trigger"]) == ("/work/{name}", 10, "header")
+    assert any(name.endswith("-POST-work_name-10b-" + f"{round(details['duration_ms'])}ms.collapsed")
+               for name in os.listdir(tmp_path))
+
+
+def test_slow_requests_are_profiled_after_threshold(tmp_path):
+    client = make_client(tmp_path, slow_ms=20)
+    client.get("/slow")
+    [details] = wait_for_profiles(tmp_path, 1)
+    assert details["trigger"] == "slow"
+    assert details["samples"] > 0
+
+
+def test_slow_requests_blocking_the_event_loop_are_profiled(tmp_path):
+    client = make_client(tmp_path, slow_ms=20)
+    client.get("/blocking")
+    [details] = wait_for_profiles(tmp_path, 1)
+    assert details["trigger"] == "slow"
+    assert details["samples"] > 0
+
+
+def test_fast_requests_under_threshold_are_not_profiled(tmp_path):
+    client = make_client(tmp_path, slow_ms=1000)
+    client.post("/work/a")
+    time.sleep(0.05)
+    assert os.listdir(tmp_path) == []
+
+
+def test_sampler_collects_stacks_and_stops():
+    sampler = StackSampler(interval=0.001)
+    session = ProfileSession("test")
+    sampler.start(session)
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    sampler.stop(session)
+    assert any("test_profiling.py:test_sampler_collects_stacks_and_stops" in stack for stack in session.samples)
+    time.sleep(0.01)
+    assert sampler._thread is None
+
+
+def test_old_profiles_are_pruned(tmp_path):
+    details = {"method": "GET", "route": "/", "path": "/", "status": 200, "body_bytes": 0, "duration_ms": 1.0}
+    for _ in range(3):
+        write_profile(str(tmp_path), ProfileSession("test"), details, max_files=2)
+        time.sleep(0.002)
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".collapsed")]) == 2
+    assert len(os.listdir(tmp_path)) == 4
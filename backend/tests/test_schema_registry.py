@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import database, schema_registry
+from backend.main import app
+from backend.schema_registry import SchemaNotFound, SchemaResolver
+from backend.validators import schema_hash
+
+client = TestClient(app)
+
+NAME_ONLY = {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]}
+
+
+class FakeStore:
+    """Stands in for the registry tables."""
+
+    def __init__(self):
+        self.generation = 0
+        self.versions = {}
+        self.counters = {}  # Never wound back by deletes, like schema_version_counters
+        self.reads = 0
+
+    def add(self, name, body):
+        version = self.counters[name] = self.counters.get(name, 0) + 1
+        self.versions[(name, version)] = {"name": name, "version": version, "body": body,
+                                          "schema_hash": schema_hash(body), "created_at": None}
+        self.generation += 1
+
+    def install(self, monkeypatch):
+        async def generation():
+            return self.generation
+
+        async def get_schema(name, version=None):
+            self.reads += 1
+            if version is None:
+                versions = [v for n, v in self.versions if n == name]
+                version = max(versions) if versions else None
+            return self.versions.get((name, version))
+
+        async def list_schemas():
+            latest = {}
+            for (name, version), row in sorted(self.versions.items()):
+                latest[name] = row
+            return list(latest.values())
+
+        monkeypatch.setattr(database, "schema_generation", generation)
+        monkeypatch.setattr(database, "get_schema", get_schema)
+        monkeypatch.setattr(database, "list_schemas", list_schemas)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    fake = FakeStore()
+    fake.install(monkeypatch)
+    monkeypatch.setattr(schema_registry, "resolver", SchemaResolver(poll_interval=0))
+    monkeypatch.setattr("backend.main.schema_resolver", schema_registry.resolver)
+    return fake
+
+
+def resolve(resolver, *args):
+    return asyncio.run(resolver.resolve(*args))
+
+
+def test_resolver_caches_until_generation_moves(store):
+    store.add("people", NAME_ONLY)
+    resolver = SchemaResolver(poll_interval=0)
+    assert resolve(resolver, "people").version == 1
+    resolve(resolver, "people")
+    resolve(resolver, "people", 1)
+    assert store.reads == 1
+
+    store.add("people", {"type": "object"})
+    assert resolve(resolver, "people").version == 2
+    assert store.reads == 2
+
+
+def test_resolver_polls_at_most_once_per_interval(store):
+    store.add("people", NAME_ONLY)
+    resolver = SchemaResolver(poll_interval=3600)
+    resolve(resolver, "people")
+    store.add("people", {"type": "object"})
+    assert resolve(resolver, "people").version == 1  # Not rechecked yet
+    with pytest.raises(SchemaNotFound):
+        resolve(resolver, "missing")
+
+
+def test_warm_compiles_latest_versions(store):
+    store.add("people", NAME_ONLY)
+    store.add("empty", {"type": "object"})
+    assert asyncio.run(SchemaResolver(poll_interval=0).warm()) == 2
+
+
+def test_validate_against_registry_schema(store):
+    store.add("people", NAME_ONLY)
+    store.add("people", {"type": "object", "required": ["nickname"]})
+    upload = {"file": ("doc.yaml", b"name: Registry Probe\n")}
+
+    first = client.post("/validate?schema=people&version=1", files=upload).json()
+    assert first["is_valid"] is True
+    assert first["schema"] == {"name": "people", "version": 1}
+
+    latest = client.post("/validate?schema=people", files=upload).json()
+    assert latest["is_valid"] is False and "nickname" in latest["error"]
+    assert latest["schema"]["version"] == 2
+
+    assert client.post("/validate?schema=unknown", files=upload).status_code == 404
+    assert client.post("/validate?version=1", files=upload).status_code == 400
+
+
+def test_create_rejects_invalid_schema_before_storing(monkeypatch):
+    async def fail_insert(*args):
+        raise AssertionError("invalid schemas must not be stored")
+    monkeypatch.setattr(database, "insert_schema", fail_insert)
+
+    response = client.post("/schemas/people", json={"type": 12})
+    assert response.status_code == 400
+    assert client.post("/schemas/bad name", json=NAME_ONLY).status_code == 422
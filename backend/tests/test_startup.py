@@ -0,0 +1,69 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from backend.lazy import lazy_import
+from backend.startup import Startup
+
+
+def test_heavy_modules_are_not_imported_with_the_app():
+    code = "import sys, backend.main; print(sorted({'jsonschema', 'deepdiff', 'uvicorn'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
+
+
+def test_lazy_module_imports_on_first_attribute():
+    module = lazy_import("json")
+    assert not module.loaded
+    assert module.dumps([1]) == "[1]"
+    assert module.loaded
+
+
+def steps(log, gate=None):
+    async def database():
+        if gate is not None:
+            await gate.wait()
+        log.append("database")
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def validators():
+        log.append("validators")
+
+    return [("database", database), ("broken", broken), ("validators", validators)]
+
+
+def test_blocking_startup_runs_every_step_first():
+    async def scenario():
+        log = []
+        startup = Startup("blocking")
+        await startup.run(steps(log))
+        return log, startup.stats()
+
+    log, stats = asyncio.run(scenario())
+    assert log == ["database", "validators"]
+    assert stats["ready"] is True and stats["failed"] == ["broken"]
+    assert set(stats["steps"]) == {"database", "broken", "validators"}
+
+
+def test_background_startup_returns_before_steps_finish():
+    async def scenario():
+        log, gate = [], asyncio.Event()
+        startup = Startup("background")
+        await startup.run(steps(log, gate))
+        before = (list(log), startup.ready)
+        gate.set()
+        await startup.wait()
+        return before, log, startup.ready
+
+    before, log, ready = asyncio.run(scenario())
+    assert before == ([], False)
+    assert log == ["database", "validators"] and ready is True
+
+
+def test_unknown_startup_mode_is_rejected():
+    with pytest.raises(ValueError):
+        Startup("eager")
@@ -0,0 +1,74 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.uploads import MaxBodySizeMiddleware, upload_size
+
+client = TestClient(app)
+
+# Small app with a tight limit so the tests don't need huge payloads
+limited_app = FastAPI()
+limited_app.add_middleware(MaxBodySizeMiddleware, max_bytes=1024)
+
+
+@limited_app.post("/upload")
+async def upload(file: UploadFile = File(...)):
+    return {"size": upload_size(file)}
+
+
+limited_client = TestClient(limited_app)
+
+
+def test_declared_oversized_body_is_rejected():
+    response = limited_client.post("/upload", files={"file": ("big.yaml", b"a" * 4096)})
+    assert response.status_code == 413, response.text
+
+
+def test_streamed_oversized_body_is_cut_off():
+    """
+    Chunked bodies carry no Content-Length, so the limit is enforced while streaming.
+    """
+    def chunks():
+        yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="big.yaml"\r\n\r\n'
+        for _ in range(16):
+            yield b"x" * 256
+        yield b"\r\n--b--\r\n"
+
+    response = limited_client.post("/upload", content=chunks(), headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413, response.text
+
+
+def test_body_within_limit_is_accepted():
+    response = limited_client.post("/upload", files={"file": ("small.yaml", b"a: 1\n")})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"size": 5}
+
+
+def test_validate_streams_large_upload():
+    """
+    A document bigger than the in-memory spool threshold still validates.
+    """
+    hobbies = "".join(f"  - hobby{i}\n" for i in range(120_000))
+    content = f"name: John Doe\nage: 25\nemail: john@example.com\nhobbies:\n{hobbies}".encode()
+    assert len(content) > 1024 * 1024
+    response = client.post("/validate", files={"file": ("large.yaml", content)})
+    assert response.status_code == 200, response.text
+    assert response.json()["is_valid"] is True
+
+
+def test_validate_reports_undecodable_upload():
+    response = client.post("/validate", files={"file": ("bad.yaml", b"name: \xff\xfe\xfa")})
+    assert response.status_code == 200, response.text
+    assert response.json()["is_valid"] is False
+
+
+def test_compare_schema_files_streams_both_uploads():
+    files = {
+        "file1": ("a.yaml", b"name: MyApp\nversion: 1\n"),
+        "file2": ("b.yaml", b"name: MyApp\nversion: 2\n"),
+    }
+    response = client.post("/compare-schema-files", files=files)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["are_identical"] is False
+    assert result["schema1_name"] == "a.yaml"
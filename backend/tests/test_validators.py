@@ -0,0 +1,75 @@
+import pytest
+from jsonschema import SchemaError
+
+from backend.Schema import SCHEMA
+from backend.validators import ValidatorRegistry, collect_errors, get_validator, json_pointer, schema_hash
+
+
+def test_schema_hash_is_order_independent():
+    """
+    The registry key must not depend on dict insertion order.
+    """
+    reordered = dict(reversed(list(SCHEMA.items())))
+    assert schema_hash(reordered) == schema_hash(SCHEMA)
+    assert schema_hash({"type": "string"}) != schema_hash(SCHEMA)
+
+
+def test_registry_compiles_once():
+    """
+    Registering the same schema twice should reuse the compiled validator.
+    """
+    registry = ValidatorRegistry()
+    first = registry.get(SCHEMA)
+    second = registry.get(dict(SCHEMA))
+    assert first is second
+    assert len(registry) == 1
+
+
+def test_registry_rejects_invalid_schema():
+    """
+    A broken schema should fail at compile time, not on each request.
+    """
+    registry = ValidatorRegistry()
+    with pytest.raises(SchemaError):
+        registry.register({"type": 12})
+    assert len(registry) == 0
+
+
+def test_default_validator_matches_schema():
+    validator = get_validator()
+    assert validator.is_valid({"name": "John Doe", "age": 25, "email": "john@example.com"})
+    assert not validator.is_valid({"name": "John Doe", "age": -1, "email": "john@example.com"})
+
+
+def test_collect_errors_reports_every_violation_with_pointers():
+    document = {"age": -1, "email": "a@b.c", "hobbies": ["ok", 3], "address": {"street": "x", "city/x": 1}}
+    errors = collect_errors(get_validator(), document)
+    found = {(error["path"], error["keyword"]) for error in errors}
+    assert ("/age", "minimum") in found
+    assert ("/hobbies/1", "type") in found
+    assert ("/address", "required") in found  # city missing
+    assert ("", "required") in found  # name missing
+    age_error = next(error for error in errors if error["path"] == "/age")
+    assert age_error["value"] == -1
+    assert age_error["schema_path"] == "/properties/age/minimum"
+
+
+def test_collect_errors_stops_at_cap():
+    document = {"hobbies": list(range(50))}
+    assert len(collect_errors(get_validator(), document, max_errors=5)) == 5
+
+
+def test_json_pointer_escapes_special_characters():
+    assert json_pointer(["a/b", "c~d", 0]) == "/a~1b/c~0d/0"
+    assert json_pointer([]) == ""
+
+
+def test_registry_evicts_least_recently_used():
+    registry = ValidatorRegistry(max_size=2)
+    first, second, third = ({"type": kind} for kind in ("string", "integer", "boolean"))
+    first_key = registry.register(first)
+    second_key = registry.register(second)
+    registry.get_by_hash(first_key)  # Touch, so `second` is the oldest
+    registry.register(third)
+    assert first_key in registry and second_key not in registry
+    assert registry.stats()["evictions"] == 1
@@ -0,0 +1,119 @@
+import io
+import json
+
+import pytest
+import yaml
+
+from backend import yaml_loader
+from backend.yaml_loader import YAMLError, YAMLLimitExceeded, load_all_yaml, load_yaml
+
+
+def test_auto_prefers_libyaml_when_available():
+    loader, backend = yaml_loader._select_loader("auto")
+    if hasattr(yaml, "CSafeLoader"):
+        assert (loader, backend) == (yaml.CSafeLoader, "libyaml")
+    else:
+        assert (loader, backend) == (yaml.SafeLoader, "python")
+
+
+def test_falls_back_without_libyaml(monkeypatch):
+    monkeypatch.delattr(yaml, "CSafeLoader", raising=False)
+    assert yaml_loader._select_loader("libyaml") == (yaml.SafeLoader, "python")
+
+
+def test_python_backend_can_be_forced():
+    assert yaml_loader._select_loader("python") == (yaml.SafeLoader, "python")
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        yaml_loader._select_loader("fast")
+
+
+def test_load_yaml_accepts_text_and_bytes():
+    assert load_yaml("name: John\nage: 25\n") == {"name": "John", "age": 25}
+    assert load_yaml(b"name: John\n") == {"name": "John"}
+    assert list(load_all_yaml("a: 1\n---\na: 2\n")) == [{"a": 1}, {"a": 2}]
+
+
+def test_load_yaml_stays_safe():
+    with pytest.raises(YAMLError):
+        load_yaml("!!python/object/apply:os.system ['true']")
+
+
+def billion_laughs(levels=9):
+    lines = ["a0: &a0 [lol, lol, lol, lol, lol, lol, lol, lol, lol, lol]"]
+    for level in range(1, levels):
+        lines.append(f"a{level}: &a{level} [" + ", ".join([f"*a{level - 1}"] * 10) + "]")
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.parametrize("source, limit", [
+    (billion_laughs(), "expanded_nodes"),
+    ("[" * 100000 + "]" * 100000, "depth"),  # Would overflow libyaml's recursive composer
+    ("- " * 150 + "x\n", "depth"),
+    ("a: &a [*a]\n", "recursion"),
+    ("x: " + "a" * (1024 * 1024 + 1) + "\n", "scalar_length"),
+])
+def test_limits_reject_pathological_documents(source, limit):
+    before = yaml_loader.rejections[limit]
+    with pytest.raises(YAMLLimitExceeded) as raised:
+        load_yaml(source)
+    assert raised.value.describe()["limit"] == limit
+    assert yaml_loader.rejections[limit] == before + 1
+
+
+def test_limits_are_configurable(monkeypatch):
+    monkeypatch.setattr(yaml_loader, "YAML_MAX_NODES", 5)
+    monkeypatch.setattr(yaml_loader, "YAML_MAX_ALIASES", 1)
+    assert load_yaml("a: 1\nb: 2\n") == {"a": 1, "b": 2}
+    with pytest.raises(YAMLLimitExceeded, match="nodes"):
+        load_yaml("a: 1\nb: 2\nc: 3\n")
+    with pytest.raises(YAMLLimitExceeded, match="aliases"):
+        load_yaml("- &x 1\n- *x\n- *x\n")
+
+
+def test_aliases_within_limits_still_load():
+    document = load_yaml(billion_laughs(levels=3))
+    assert len(document["a2"]) == 10 and document["a2"][0] is document["a1"]
+
+
+def test_deep_file_streams_are_rewound_and_rejected():
+    stream = io.BytesIO(b"a: [" * 50000 + b"]" * 50000)
+    with pytest.raises(YAMLLimitExceeded, match="depth"):
+        load_yaml(stream)
+    shallow = io.BytesIO(b"a: [1, 2]\n")
+    assert load_yaml(shallow) == {"a": [1, 2]}
+
+
+def test_limits_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(yaml_loader, "YAML_LIMITS", False)
+    assert len(load_yaml("- " * 150 + "x\n")) == 1
+
+
+def test_validate_reports_the_limit():
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    response = TestClient(app).post("/validate", files={"file": ("bomb.yaml", billion_laughs())})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["is_valid"] is False
+    assert body["limit"] == {"limit": "expanded_nodes", "maximum": yaml_loader.YAML_MAX_EXPANDED_NODES}
+
+
+def test_flat_json_scans_to_its_real_depth():
+    # Thousands of sibling objects, with brackets and asterisks inside strings
+    document = json.dumps([{"id": i, "note": "]] [[ {\"*x\"} \\"} for i in range(3000)])
+    assert yaml_loader._scan(document) == (2, False)
+    stream = io.BytesIO(document.encode())
+    assert yaml_loader._scan(stream) == (2, False)
+    assert stream.tell() == 0
+    assert len(load_yaml(document)) == 3000
+
+
+def test_non_json_keeps_the_bracket_count():
+    # Not JSON, so quoted brackets can't be told apart from ones that nest
+    document = "a: '" + "[" * 3000 + "'\nb: [1]\n"
+    bound, _ = yaml_loader._scan(document)
+    assert bound > yaml_loader.LIBYAML_SAFE_DEPTH
@@ -0,0 +1,100 @@
+import os
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+# Largest request body accepted, in bytes (multipart uploads included)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+
+
+class PayloadTooLarge(HTTPException):
+    """
+    Raised from the wrapped receive channel once a body passes the size limit.
+
+    It is an HTTPException so FastAPI's body parsing re-raises it as a 413 instead of
+    turning it into a generic 400.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"Request body exceeds {max_bytes} bytes")
+
+
+class MaxBodySizeMiddleware:
+    """
+    Rejects request bodies larger than `max_bytes` with a 413.
+
+    A declared Content-Length is checked before anything is read. Bodies without one
+    (chunked uploads) are counted as they stream in and cut off at the limit, so an
+    oversized upload is never buffered in full.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    def _too_large(self):
+        return JSONResponse(status_code=413, content={"detail": f"Request body exceeds {self.max_bytes} bytes"})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > self.max_bytes:
+                    await self._too_large()(scope, receive, send)
+                    return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise PayloadTooLarge(self.max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except PayloadTooLarge:
+            if response_started:
+                raise
+            await self._too_large()(scope, receive, send)
+
+
+def upload_size(file: UploadFile) -> int:
+    """Size of an already-received upload, without reading it."""
+    if file.size is not None:
+        return file.size
+    position = file.file.tell()
+    size = file.file.seek(0, os.SEEK_END)
+    file.file.seek(position)
+    return size
+
+
+async def upload_source(file: UploadFile, picklable: bool = False):
+    """
+    Something the YAML loader can parse straight from the upload.
+
+    Normally that's the spooled upload file itself, which the parser reads in chunks,
+    so neither the raw bytes nor a decoded copy are held in memory. Work shipped to
+    another process needs a picklable payload, so then the raw bytes are returned.
+    """
+    await file.seek(0)
+    if picklable:
+        return await file.read()
+    return file.file
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+from backend.Schema import SCHEMA
+from backend.lazy import lazy_import
+from backend.codegen import GeneratedValidator, UnsupportedSchema, compile_schema
+
+# Imported on first compile, off the app's import path
+jsonschema = lazy_import("jsonschema")
+
+# Upper bound on violations reported by a single "all errors" validation
+MAX_VALIDATION_ERRORS = int(os.getenv("MAX_VALIDATION_ERRORS", "100"))
+
+# Compiled validators kept in memory; least recently used ones are dropped past this
+VALIDATOR_CACHE_SIZE = int(os.getenv("VALIDATOR_CACHE_SIZE", "256"))
+
+# jsonschema interprets schemas; codegen runs generated Python for the validity checks
+VALIDATOR_BACKEND = os.getenv("VALIDATOR_BACKEND", "jsonschema")
+
+
+# Stable content hash for a JSON Schema, used as the registry key
+def schema_hash(schema: Dict[str, Any]) -> str:
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ValidatorRegistry:
+    """
+    Holds compiled jsonschema validators keyed by schema content hash.
+
+    jsonschema.validate() checks the schema against its metaschema and builds a
+    new validator on every call; the registry does that once per schema. With
+    registry-stored schemas the set is open-ended, so it is an LRU of `max_size`.
+    """
+
+    def __init__(self, max_size: int = VALIDATOR_CACHE_SIZE, backend: str = VALIDATOR_BACKEND):
+        if backend not in ("jsonschema", "codegen"):
+            raise ValueError(f"Unknown VALIDATOR_BACKEND {backend!r}, expected jsonschema or codegen")
+        self.max_size = max_size
+        self.backend = backend
+        self._validators: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def compile(self, schema: Dict[str, Any], key: Optional[str] = None):
+        """Check the schema once and return a ready-to-use validator instance."""
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)  # Raises SchemaError for a broken schema
+        reference = cls(schema)
+        if self.backend == "codegen":
+            try:
+                return GeneratedValidator(compile_schema(schema, key or schema_hash(schema)), reference)
+            except UnsupportedSchema:
+                pass  # Interpreted by jsonschema instead
+        return reference
+
+    def _register(self, schema: Dict[str, Any], key: Optional[str] = None):
+        key = key or schema_hash(schema)
+        validator = self.get_by_hash(key)
+        if validator is None:
+            # Compiled outside the lock; a concurrent compile of the same schema just loses the race
+            compiled = self.compile(schema, key)
+            with self._lock:
+                validator = self._validators.setdefault(key, compiled)
+                self._validators.move_to_end(key)
+                while len(self._validators) > self.max_size:
+                    self._validators.popitem(last=False)
+                    self.evictions += 1
+        return key, validator
+
+    def register(self, schema: Dict[str, Any], key: Optional[str] = None) -> str:
+        """Compile and cache a schema, returning its hash (pass `key` when it's already known)."""
+        return self._register(schema, key)[0]
+
+    def get(self, schema: Dict[str, Any], key: Optional[str] = None):
+        """Return the cached validator for a schema, compiling it on first use."""
+        return self._register(schema, key)[1]
+
+    def get_by_hash(self, key: str):
+        with self._lock:
+            validator = self._validators.get(key)
+            if validator is not None:
+                self._validators.move_to_end(key)
+            return validator
+
+    def clear(self):
+        with self._lock:
+            self._validators.clear()
+
+    def __len__(self):
+        return len(self._validators)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._validators), "max_size": self.max_size, "evictions": self.evictions}
+
+    def __contains__(self, key: str):
+        return key in self._validators
+
+
+# Process-wide registry used by the API
+registry = ValidatorRegistry()
+
+# SCHEMA is a module constant, so its hash only needs computing once
+_default_schema_key: Optional[str] = None
+
+
+def default_schema_key() -> str:
+    global _default_schema_key
+    if _default_schema_key is None:
+        _default_schema_key = registry.register(SCHEMA)
+    return _default_schema_key
+
+
+def get_validator(schema: Optional[Dict[str, Any]] = None, key: Optional[str] = None):
+    """Return the compiled validator for the given schema (defaults to SCHEMA)."""
+    if schema is None:
+        key = default_schema_key()
+        validator = registry.get_by_hash(key)
+        if validator is not None:
+            return validator
+        schema = SCHEMA
+    return registry.get(schema, key)
+
+
+def warm_validators():
+    """Compile the built-in schemas so the first request doesn't pay for it."""
+    return default_schema_key()
+
+
+def json_pointer(path) -> str:
+    """RFC 6901 pointer for a jsonschema error path ("" is the document root)."""
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in path)
+
+
+def describe_error(error) -> Dict[str, Any]:
+    """Structured form of a ValidationError. Objects and arrays are not echoed back in full."""
+    value = None if isinstance(error.instance, (dict, list)) else error.instance
+    return {
+        "path": json_pointer(error.absolute_path),
+        "keyword": error.validator,
+        "value": value,
+        "message": error.message,
+        "schema_path": json_pointer(error.absolute_schema_path),
+    }
+
+
+def collect_errors(validator, instance, max_errors: int = MAX_VALIDATION_ERRORS) -> List[Dict[str, Any]]:
+    """
+    Every violation in one pass, up to max_errors.
+
+    iter_errors is lazy, so validation stops as soon as the cap is reached.
+    """
+    return [describe_error(error) for error in islice(validator.iter_errors(instance), max_errors)]
@@ -0,0 +1,334 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from itertools import accumulate
+
+import yaml
+from yaml.composer import Composer
+from yaml.nodes import MappingNode, ScalarNode
+
+# Which YAML parser to use: auto (libyaml when available), libyaml or python
+YAML_LOADER = os.getenv("YAML_LOADER", "auto")
+
+# Per-document parsing limits; YAML_LIMITS=0 turns every check off
+YAML_LIMITS = os.getenv("YAML_LIMITS", "1") != "0"
+YAML_MAX_DEPTH = int(os.getenv("YAML_MAX_DEPTH", "100"))  # Nesting, counting aliased subtrees where they are used
+YAML_MAX_NODES = int(os.getenv("YAML_MAX_NODES", "1000000"))  # Nodes written out in the source
+YAML_MAX_ALIASES = int(os.getenv("YAML_MAX_ALIASES", "10000"))  # References to anchored nodes
+YAML_MAX_EXPANDED_NODES = int(os.getenv("YAML_MAX_EXPANDED_NODES", "2000000"))  # Nodes once every alias is expanded
+YAML_MAX_SCALAR_LENGTH = int(os.getenv("YAML_MAX_SCALAR_LENGTH", str(1024 * 1024)))  # Characters in one scalar
+YAML_MAX_SECONDS = float(os.getenv("YAML_MAX_SECONDS", "10"))  # Wall time to compose and check a document
+
+# Deepest syntax handed to libyaml's composer, which recurses on the C stack (8 MB
+# thread stacks overflow somewhere past 20000 levels); deeper-looking documents are
+# composed in Python, where the depth limit stops them early
+LIBYAML_SAFE_DEPTH = 2000
+
+# Re-exported so callers only need this module
+YAMLError = yaml.YAMLError
+
+
+class YAMLLimitExceeded(YAMLError):
+    """Raised when a document goes over one of the YAML_MAX_* limits."""
+
+    def __init__(self, limit: str, maximum):
+        super().__init__(limit, maximum)
+        self.limit = limit
+        self.maximum = maximum
+
+    def __str__(self):
+        return f"document exceeds the {self.limit} limit of {self.maximum}"
+
+    def describe(self):
+        return {"limit": self.limit, "maximum": self.maximum}
+
+
+# Rejections per limit since startup, exported on /metrics
+LIMIT_NAMES = ("depth", "nodes", "aliases", "expanded_nodes", "scalar_length", "seconds", "recursion")
+rejections = Counter({name: 0 for name in LIMIT_NAMES})
+_rejections_lock = threading.Lock()
+
+
+def _reject(limit: str, maximum):
+    with _rejections_lock:
+        rejections[limit] += 1
+    raise YAMLLimitExceeded(limit, maximum)
+
+
+def describe_yaml_error(e: YAMLError):
+    """The "error" of a result for an unparseable document, plus which limit it crossed if any."""
+    if isinstance(e, YAMLLimitExceeded):
+        return {"error": f"YAML Limit Exceeded: {e}", "limit": e.describe()}
+    return {"error": f"YAML Parsing Error: {e}"}
+
+
+def _select_loader(preference: str):
+    """Pick the safe loader class for the requested backend, falling back to pure Python."""
+    if preference not in ("auto", "libyaml", "python"):
+        raise ValueError(f"Unknown YAML_LOADER {preference!r}, expected auto, libyaml or python")
+    if preference != "python":
+        c_loader = getattr(yaml, "CSafeLoader", None)
+        if c_loader is not None:
+            return c_loader, "libyaml"
+        if preference == "libyaml":
+            print("Warning: libyaml is not available - falling back to the pure Python YAML loader")
+    return yaml.SafeLoader, "python"
+
+
+SafeLoader, LOADER_BACKEND = _select_loader(YAML_LOADER)
+# The emitter follows the parser's backend
+SafeDumper = yaml.CSafeDumper if LOADER_BACKEND == "libyaml" else yaml.SafeDumper
+
+
+class _DepthLimitedComposer(Composer):
+    """Python composer that stops at YAML_MAX_DEPTH or the deadline while building the node graph."""
+
+    def compose_node(self, parent, index):
+        self.nesting += 1
+        if self.nesting > YAML_MAX_DEPTH:
+            _reject("depth", YAML_MAX_DEPTH)
+        if time.monotonic() > self.deadline:
+            _reject("seconds", YAML_MAX_SECONDS)
+        try:
+            return super().compose_node(parent, index)
+        finally:
+            self.nesting -= 1
+
+
+class LimitedLoader(_DepthLimitedComposer, SafeLoader):
+    """The safe loader with composition done by _DepthLimitedComposer, even on top of libyaml's parser."""
+
+    def __init__(self, stream):
+        SafeLoader.__init__(self, stream)
+        Composer.__init__(self)
+        self.nesting = 0
+        self.deadline = time.monotonic() + YAML_MAX_SECONDS
+
+
+# Indentation plus leading "- " and "? " indicators, where block collections open
+_BLOCK_PREFIX = {str: re.compile(r"^[ \t?-]*", re.MULTILINE), bytes: re.compile(rb"^[ \t?-]*", re.MULTILINE)}
+_BRACKETS = {str: ("[", "{"), bytes: (b"[", b"{")}
+_ALIAS = {str: "*", bytes: b"*"}
+_NEWLINE = {str: "\n", bytes: b"\n"}
+_JSON_ESCAPES = {str: ("\\\\", '\\"', '"'), bytes: (b"\\\\", b'\\"', b'"')}  # Escaped \, escaped ", quote
+_NOT_BRACKET = {str: re.compile(r"[^\[\]{}]+"), bytes: re.compile(rb"[^\[\]{}]+")}
+_BRACKET_STEP = {"[": 1, "{": 1, "]": -1, "}": -1, 91: 1, 123: 1, 93: -1, 125: -1}
+
+
+def _discard(_):
+    return None
+
+
+# Checks JSON syntax without keeping what it parses
+_JSON_CHECK = json.JSONDecoder(object_pairs_hook=_discard, parse_float=_discard, parse_int=_discard,
+                               parse_constant=_discard)
+
+
+def _json_depth(text):
+    """
+    How deeply `text` nests if it is a JSON document, else None. In JSON every quote
+    delimits a string, so the brackets left once strings are removed are exactly the
+    structure and their running count is the depth. That doesn't hold for YAML in
+    general, where quotes and "#" can also be plain text and closing brackets inside
+    quoted scalars or comments would hide real nesting.
+    """
+    try:
+        _JSON_CHECK.decode(text if isinstance(text, str) else text.decode("utf-8"))
+    except (ValueError, RecursionError):  # Also UnicodeDecodeError and JSONDecodeError
+        return None
+    kind = type(text)
+    backslash, quote_escape, quote = _JSON_ESCAPES[kind]
+    # With escapes gone, quotes alternate opening and closing strings
+    outside = text.replace(backslash, kind()).replace(quote_escape, kind()).split(quote)[::2]
+    brackets = _NOT_BRACKET[kind].sub(kind(), kind().join(outside))
+    return max(accumulate(map(_BRACKET_STEP.__getitem__, brackets)), default=0)
+
+
+def _scan(stream, chunk_size: int = 1024 * 1024):
+    """
+    (upper bound on how deeply the source nests, whether it may contain aliases).
+
+    Every flow collection needs a bracket, and nested block collections open further
+    along the line prefix of indentation and indicators, so brackets plus twice the
+    longest such prefix bound the depth. Aliases need a "*". File objects are read in
+    chunks and rewound; sources that can't be scanned are assumed to be the worst case.
+
+    That bound counts every bracket, so large flat JSON would look deep; when it is
+    over LIBYAML_SAFE_DEPTH and the source is JSON, the exact depth is used instead.
+    """
+    if isinstance(stream, (str, bytes)):
+        chunks, rewind = iter([stream]), None
+    else:
+        try:
+            position = stream.tell()
+        except (AttributeError, OSError, ValueError):
+            return float("inf"), True
+        chunks, rewind = iter(lambda: stream.read(chunk_size), stream.read(0)), position
+
+    brackets, prefix, aliases, carry = 0, 0, False, None
+    try:
+        for chunk in chunks:
+            kind = type(chunk)
+            if carry is None and kind is bytes and chunk[:2] in (b"\xff\xfe", b"\xfe\xff"):
+                return float("inf"), True  # UTF-16 interleaves NULs, which the patterns don't follow
+            text = chunk if carry is None else carry + chunk
+            # Lines split across chunks are scanned with the next one
+            cut = text.rfind(_NEWLINE[kind]) + 1 if rewind is not None else len(text)
+            text, carry = text[:cut], text[cut:]
+            brackets += sum(text.count(bracket) for bracket in _BRACKETS[kind])
+            prefix = max(prefix, max(map(len, _BLOCK_PREFIX[kind].findall(text)), default=0))
+            aliases = aliases or _ALIAS[kind] in text
+            if brackets + 2 * (prefix + 2) > LIBYAML_SAFE_DEPTH and aliases:
+                break  # Nothing left to learn
+        if carry:
+            kind = type(carry)
+            brackets += sum(carry.count(bracket) for bracket in _BRACKETS[kind])
+            prefix = max(prefix, len(_BLOCK_PREFIX[kind].match(carry).group()))
+            aliases = aliases or _ALIAS[kind] in carry
+        bound = brackets + 2 * (prefix + 2)
+        if bound > LIBYAML_SAFE_DEPTH:
+            if rewind is not None:
+                stream.seek(rewind)
+            depth = _json_depth(stream if rewind is None else stream.read())
+            if depth is not None:
+                return depth, False  # JSON has no aliases; a "*" was inside a string
+    finally:
+        if rewind is not None:
+            stream.seek(rewind)
+    return bound, aliases
+
+
+def _children(node):
+    if isinstance(node, ScalarNode):
+        return ()
+    if isinstance(node, MappingNode):
+        return [child for pair in node.value for child in pair]
+    return node.value
+
+
+def check_tree_limits(root, deadline: float):
+    """
+    Checks a composed node tree without aliases in one pass; raises YAMLLimitExceeded at
+    the first limit crossed. With no shared nodes the expanded size is the node count.
+    """
+    maximum = min(YAML_MAX_NODES, YAML_MAX_EXPANDED_NODES)
+    nodes = 0
+    stack = [(root, 1)]
+    while stack:
+        node, depth = stack.pop()
+        nodes += 1
+        if nodes > maximum:
+            _reject("nodes" if maximum == YAML_MAX_NODES else "expanded_nodes", maximum)
+        value = node.value
+        if isinstance(value, str):
+            if len(value) > YAML_MAX_SCALAR_LENGTH:
+                _reject("scalar_length", YAML_MAX_SCALAR_LENGTH)
+            continue
+        if not value:
+            continue
+        if depth >= YAML_MAX_DEPTH:
+            _reject("depth", YAML_MAX_DEPTH)
+        depth += 1
+        if isinstance(node, MappingNode):
+            for key, item in value:
+                stack.append((key, depth))
+                stack.append((item, depth))
+        else:
+            stack.extend([(item, depth) for item in value])
+        if time.monotonic() > deadline:
+            _reject("seconds", YAML_MAX_SECONDS)
+
+
+def check_limits(root, deadline: float):
+    """
+    Walks a composed node graph once, memoising each node's expanded size and height,
+    so aliases are measured as if copied out without being expanded. Raises
+    YAMLLimitExceeded at the first limit crossed.
+    """
+    measured = {}  # id(node) -> (expanded nodes, height)
+    entered = set()
+    nodes = aliases = 0
+    stack = [(root, False)]
+    while stack:
+        node, leaving = stack.pop()
+        key = id(node)
+        if leaving:
+            children = [measured[id(child)] for child in _children(node)]
+            size = 1 + sum(child[0] for child in children)
+            height = 1 + max((child[1] for child in children), default=0)
+            if height > YAML_MAX_DEPTH:
+                _reject("depth", YAML_MAX_DEPTH)
+            if size > YAML_MAX_EXPANDED_NODES:
+                _reject("expanded_nodes", YAML_MAX_EXPANDED_NODES)
+            measured[key] = (size, height)
+            continue
+        if key in measured:
+            aliases += 1
+            if aliases > YAML_MAX_ALIASES:
+                _reject("aliases", YAML_MAX_ALIASES)
+            continue
+        if key in entered:
+            _reject("recursion", 0)  # An alias inside its own anchor
+        entered.add(key)
+        nodes += 1
+        if nodes > YAML_MAX_NODES:
+            _reject("nodes", YAML_MAX_NODES)
+        if nodes % 4096 == 0 and time.monotonic() > deadline:
+            _reject("seconds", YAML_MAX_SECONDS)
+        if isinstance(node, ScalarNode):
+            if len(node.value) > YAML_MAX_SCALAR_LENGTH:
+                _reject("scalar_length", YAML_MAX_SCALAR_LENGTH)
+        stack.append((node, True))
+        stack.extend((child, False) for child in _children(node))
+
+
+def _limited_loader(stream):
+    bound, aliases = _scan(stream)
+    # libyaml composes far faster, so it gets every document shallow enough for its stack
+    if LOADER_BACKEND == "libyaml" and bound <= LIBYAML_SAFE_DEPTH:
+        loader = SafeLoader(stream)
+        loader.deadline = time.monotonic() + YAML_MAX_SECONDS
+    else:
+        loader = LimitedLoader(stream)
+    loader.check = check_limits if aliases else check_tree_limits
+    return loader
+
+
+def _construct_checked(loader, node):
+    loader.check(node, loader.deadline)
+    if time.monotonic() > loader.deadline:
+        _reject("seconds", YAML_MAX_SECONDS)
+    return loader.construct_document(node)
+
+
+def load_yaml(stream):
+    """Parse a single YAML document (str, bytes or file object) with the safe loader, within the YAML_* limits."""
+    if not YAML_LIMITS:
+        return yaml.load(stream, Loader=SafeLoader)
+    loader = _limited_loader(stream)
+    try:
+        node = loader.get_single_node()
+        return None if node is None else _construct_checked(loader, node)
+    finally:
+        loader.dispose()
+
+
+def load_all_yaml(stream):
+    """Parse every document of a YAML stream with the safe loader, each within the YAML_* limits."""
+    if not YAML_LIMITS:
+        yield from yaml.load_all(stream, Loader=SafeLoader)
+        return
+    loader = _limited_loader(stream)
+    try:
+        while loader.check_node():
+            yield _construct_checked(loader, loader.get_node())
+    finally:
+        loader.dispose()
+
+
+def dump_all_yaml(documents) -> str:
+    """Emit documents as a --- separated YAML stream with the safe dumper."""
+    return yaml.dump_all(documents, Dumper=SafeDumper, explicit_start=True, sort_keys=False)
@@ -663,11 +663,11 @@ settings:
                 </div>
               </div>
 
-              {!comparisonResult.are_identical && comparisonResult.differences && (
+              {!comparisonResult.are_identical && (comparisonResult.patch || comparisonResult.differences) && (
                 <div className="differences-section">
                   <h4>Differences Found:</h4>
                   <pre className="differences-display">
-                    {JSON.stringify(comparisonResult.differences, null, 2)}
+                    {JSON.stringify(comparisonResult.patch || comparisonResult.differences, null, 2)}
                   </pre>
                 </div>
               )}
@@ -736,11 +736,11 @@ settings:
                   </div>
                 </div>
 
-                {!comparisonResult.are_identical && comparisonResult.differences && (
+                {!comparisonResult.are_identical && (comparisonResult.patch || comparisonResult.differences) && (
                   <div className="differences-section">
                     <h4>Differences Found:</h4>
                     <pre className="differences-display">
-                      {JSON.stringify(comparisonResult.differences, null, 2)}
+                      {JSON.stringify(comparisonResult.patch || comparisonResult.differences, null, 2)}
                     </pre>
                   </div>
                 )}